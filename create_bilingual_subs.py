@@ -1,104 +1,13 @@
 #!/usr/bin/env python3
-"""Create bilingual subtitles from English and Chinese SRT files"""
+"""Create bilingual subtitles from English and Chinese SRT files
 
-import re
-from pathlib import Path
-from typing import List, Dict
-
-
-def parse_srt(content: str) -> List[Dict]:
-    """Parse SRT file content into entries"""
-    parts = [p.strip() for p in content.split("\n\n") if p.strip()]
-    entries = []
-
-    for part in parts:
-        lines = part.splitlines()
-        if len(lines) < 3:
-            continue
-
-        # Extract index
-        try:
-            index = int(lines[0].strip())
-        except ValueError:
-            continue
-
-        # Extract timestamp
-        if "-->" not in lines[1]:
-            continue
-        timestamp = lines[1].strip()
-
-        # Extract text (all remaining lines)
-        text = "\n".join(lines[2:]).strip()
-
-        entries.append({
-            "index": index,
-            "timestamp": timestamp,
-            "text": text
-        })
-
-    return entries
-
-
-def merge_subtitles(en_entries: List[Dict], zh_entries: List[Dict]) -> List[Dict]:
-    """Merge English and Chinese subtitles into bilingual format"""
-    bilingual_entries = []
+Kept for the old work/subs layout; see `youdoub sub bilingual` for per-video workdirs.
+"""
 
-    # Use the longer list as base
-    max_len = max(len(en_entries), len(zh_entries))
-    min_len = min(len(en_entries), len(zh_entries))
-
-    for i in range(max_len):
-        en_text = ""
-        zh_text = ""
-
-        # Get English text if available
-        if i < len(en_entries):
-            en_text = en_entries[i]["text"]
-
-        # Get Chinese text if available
-        if i < len(zh_entries):
-            zh_text = zh_entries[i]["text"]
-
-        # Clean Chinese text - remove English parts if they exist at the beginning
-        if zh_text and en_text:
-            # If Chinese text starts with English text, remove the English part
-            if zh_text.startswith(en_text[:50]):  # Check first 50 chars
-                zh_text = zh_text[len(en_text):].strip()
-                # Remove leading punctuation
-                zh_text = re.sub(r'^[.,\s]+', '', zh_text)
-
-        # Create bilingual text
-        bilingual_text = ""
-        if zh_text:
-            bilingual_text += zh_text
-        if en_text and zh_text:
-            bilingual_text += "\n"
-        if en_text:
-            bilingual_text += en_text
-
-        # Use English entry as base for timestamp/index, fallback to Chinese
-        base_entry = en_entries[i] if i < len(en_entries) else zh_entries[i]
-
-        bilingual_entries.append({
-            "index": base_entry["index"],
-            "timestamp": base_entry["timestamp"],
-            "text": bilingual_text.strip()
-        })
-
-    return bilingual_entries
-
-
-def write_srt(entries: List[Dict], output_path: Path):
-    """Write entries to SRT file"""
-    parts = []
-    for entry in entries:
-        parts.append(str(entry["index"]))
-        parts.append(entry["timestamp"])
-        parts.append(entry["text"])
-        parts.append("")  # Empty line between entries
+from pathlib import Path
 
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text("\n".join(parts), encoding="utf-8")
+from youdoub.subtitles.bilingual import build_bilingual
+from youdoub.subtitles.srt import parse_srt, write_srt
 
 
 def main():
@@ -116,24 +25,23 @@ def main():
         return
 
     print(f"📄 读取英文字幕: {en_file}")
-    en_content = en_file.read_text(encoding="utf-8")
-    en_entries = parse_srt(en_content)
+    en_entries = parse_srt(en_file)
     print(f"📊 英文条目数: {len(en_entries)}")
 
     print(f"📄 读取中文字幕: {zh_file}")
-    zh_content = zh_file.read_text(encoding="utf-8")
-    zh_entries = parse_srt(zh_content)
+    zh_entries = parse_srt(zh_file)
     print(f"📊 中文条目数: {len(zh_entries)}")
 
+    # 按时间重叠对齐，译文合并或拆分条目后也不会错位
     print("🔀 合并字幕...")
-    bilingual_entries = merge_subtitles(en_entries, zh_entries)
+    bilingual_entries = build_bilingual(en_entries, zh_entries)
 
     print(f"💾 保存双语字幕: {output_file}")
-    write_srt(bilingual_entries, output_file)
+    write_srt(output_file, bilingual_entries)
 
     print(f"✅ 完成！生成了 {len(bilingual_entries)} 个双语字幕条目")
     print(f"📂 输出文件: {output_file}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
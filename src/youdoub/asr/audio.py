@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+
+from ..paths import WorkPaths
+from ..utils.hash import sha256_file
+
+SAMPLE_RATE = 16000
+
+
+def find_media(wp: WorkPaths) -> Optional[Path]:
+    """The workspace file to take audio from: an audio stream if present, else ``video.mp4``."""
+    audio_files = sorted(wp.root.glob("*.webm")) + sorted(wp.root.glob("*.m4a"))
+    if audio_files:
+        return audio_files[0]
+    return wp.video if wp.video.exists() else None
+
+
+def _source_stamp(src: Path) -> Dict[str, Any]:
+    st = src.stat()
+    return {"source": str(src.resolve()), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def pcm_is_current(pcm: Path, meta_path: Path, src: Path) -> bool:
+    """Whether ``pcm`` was extracted from ``src`` as it is now and is complete."""
+    if not pcm.exists() or not meta_path.exists():
+        return False
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    stamp = _source_stamp(src)
+    return (
+        all(meta.get(k) == v for k, v in stamp.items())
+        and meta.get("sample_rate") == SAMPLE_RATE
+        and pcm.stat().st_size == meta.get("samples", -1) * 4
+    )
+
+
+def extract_pcm(src: Path, pcm: Path, meta_path: Path) -> int:
+    """Decode ``src`` to raw 16 kHz mono float32 (native byte order) at ``pcm``.
+
+    Frames are resampled and written as they are decoded, so memory use does
+    not grow with the length of the video. The samples are converted the same
+    way as ``faster_whisper.decode_audio`` (s16 then / 32768). A JSON sidecar
+    records the source size/mtime, the sample count and the SHA-256 of the
+    samples (computed while writing). Returns the number of samples.
+    """
+    import av
+
+    tmp = pcm.with_name(pcm.name + ".part")
+    samples = 0
+    digest = hashlib.sha256()
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=SAMPLE_RATE)
+
+    def write(frames, f) -> int:
+        n = 0
+        for frame in frames:
+            data = frame.to_ndarray().reshape(-1)
+            raw = (data.astype(np.float32) / 32768.0).tobytes()
+            f.write(raw)
+            digest.update(raw)
+            n += data.size
+        return n
+
+    with av.open(str(src), mode="r", metadata_errors="ignore") as container, tmp.open("wb") as f:
+        for frame in container.decode(audio=0):
+            try:
+                samples += write(resampler.resample(frame), f)
+            except av.error.InvalidDataError:
+                # 跳过损坏的帧
+                continue
+        samples += write(resampler.resample(None), f)
+    tmp.replace(pcm)
+    meta = dict(_source_stamp(src), sample_rate=SAMPLE_RATE, samples=samples, dtype="float32", sha256=digest.hexdigest())
+    meta_path.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+    return samples
+
+
+def pcm_fingerprint(pcm: Path, meta_path: Path) -> str:
+    """SHA-256 of the extracted samples, from the sidecar (hashed and stored if missing)."""
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    if not meta.get("sha256"):
+        meta["sha256"] = sha256_file(pcm)
+        meta_path.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+    return meta["sha256"]
+
+
+def ensure_pcm(wp: WorkPaths, src: Path, force: bool = False) -> Path:
+    """Return ``wp.audio_pcm``, extracting it from ``src`` unless it is already current."""
+    if force or not pcm_is_current(wp.audio_pcm, wp.audio_meta, src):
+        extract_pcm(src, wp.audio_pcm, wp.audio_meta)
+    return wp.audio_pcm
+
+
+def load_pcm(pcm: Path) -> np.ndarray:
+    """Memory-map an extracted PCM file read-only; slicing it does not copy."""
+    if pcm.stat().st_size == 0:
+        return np.zeros(0, dtype=np.float32)
+    return np.memmap(pcm, dtype=np.float32, mode="r")
+
+
+def load_audio(path: Path) -> Union[np.ndarray, str]:
+    """Input for faster-whisper: the memory-mapped samples of a ``.f32`` file, else the path to decode."""
+    path = Path(path)
+    return load_pcm(path) if path.suffix == ".f32" else str(path)
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import json
+import shutil
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ..paths import cache_root
+from ..utils.hash import sha256_hex
+from ..utils.logging import get_logger
+from .resegment import Segmentation
+from .transcribe import TRANSCRIBE_OPTIONS
+
+logger = get_logger(__name__)
+
+
+def _engine() -> str:
+    try:
+        return f"faster-whisper {version('faster-whisper')}"
+    except PackageNotFoundError:
+        return "faster-whisper"
+
+
+def asr_params(
+    *,
+    model: str,
+    lang: str,
+    compute_type: str = "default",
+    batch_size: int = 0,
+    workers: int = 1,
+    segmentation: Optional[Segmentation] = None,
+) -> Dict[str, Any]:
+    """Everything that changes the ASR output for the same audio.
+
+    Thread counts only change the speed and are left out; the chunking of
+    ``workers`` and batched decoding change the segments and are kept.
+    """
+    options = {k: v for k, v in TRANSCRIBE_OPTIONS.items() if k != "log_progress"}
+    params = {
+        "engine": _engine(),
+        "model": model,
+        "lang": lang,
+        "compute_type": compute_type,
+        "batch_size": batch_size,
+        "workers": workers,
+        "options": options,
+    }
+    # 仅在启用时加入，未重新分句的结果沿用原来的缓存键
+    if segmentation is not None:
+        params["segmentation"] = segmentation.to_dict()
+    return params
+
+
+def asr_cache_key(fingerprint: str, params: Dict[str, Any]) -> str:
+    return sha256_hex(fingerprint + "\x1f" + json.dumps(params, sort_keys=True, ensure_ascii=False))
+
+
+def provenance_path(srt: Path) -> Path:
+    # 记录 asr.<lang>.srt 由哪段音频、哪组参数生成
+    return srt.with_name(srt.name + ".json")
+
+
+def read_provenance(srt: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(provenance_path(srt).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def write_provenance(srt: Path, key: str, fingerprint: str, params: Dict[str, Any]) -> None:
+    data = {"key": key, "audio_sha256": fingerprint, "params": params}
+    provenance_path(srt).write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+class ASRCache:
+    """Content-addressed store of finished ASR subtitles under ``<cache root>/asr``.
+
+    Entries are ``<key[:2]>/<key>.srt`` with a ``.json`` sidecar holding the
+    parameters, and are shared by every workspace, so the same audio
+    transcribed with the same settings under another video ID is a copy.
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = (root or cache_root()) / "asr"
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.srt"
+
+    def get(self, key: str) -> Optional[Path]:
+        path = self._path(key)
+        return path if path.exists() else None
+
+    def put(self, key: str, srt: Path, params: Dict[str, Any]) -> Path:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        shutil.copyfile(srt, tmp)
+        tmp.replace(path)
+        path.with_suffix(".json").write_text(json.dumps(params, ensure_ascii=False, indent=2), encoding="utf-8")
+        logger.info(f"ASR 结果已缓存: {path}")
+        return path
+
+    def restore(self, key: str, dst: Path) -> bool:
+        """Copy a cached result to ``dst``; returns False on a miss."""
+        path = self.get(key)
+        if path is None:
+            return False
+        tmp = dst.with_name(dst.name + ".tmp")
+        shutil.copyfile(path, tmp)
+        tmp.replace(dst)
+        return True
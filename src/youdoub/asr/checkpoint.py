@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import json
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..subtitles.srt import Cue, CueWriter, iter_cues
+
+
+def input_stamp(input_path: Path, lang: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Identifies the audio and settings a checkpoint belongs to; any change invalidates it.
+
+    ``params`` are the decoding parameters (:func:`.cache.asr_params`), so
+    resuming with another model or options starts over instead of splicing
+    cues from two configurations.
+    """
+    st = Path(input_path).stat()
+    stamp = {"input": str(Path(input_path).resolve()), "size": st.st_size, "mtime_ns": st.st_mtime_ns, "lang": lang}
+    if params is not None:
+        # 经过一次 JSON 往返，与从检查点文件读回的形式一致
+        stamp["params"] = json.loads(json.dumps(params, sort_keys=True))
+    return stamp
+
+
+class SegmentLog:
+    """Streams ASR cues to ``<output>.part`` with a checkpoint in ``<output>.part.json``.
+
+    Every cue is flushed as it is written and :meth:`checkpoint` records how
+    many cues are final and up to which time the audio is done. With
+    ``resume=True`` a matching checkpoint is picked up: the cues it covers are
+    kept (anything written after it is dropped) and :attr:`start_ms` tells
+    the caller where to restart decoding. Leaving the ``with`` block normally
+    renames the ``.part`` file to ``output_file`` and removes the checkpoint;
+    on an exception both stay for the next ``--resume``.
+    """
+
+    def __init__(self, output_file: Path, stamp: Dict[str, Any], resume: bool = False):
+        self.output_file = output_file
+        self.part = output_file.with_name(output_file.name + ".part")
+        self.meta = output_file.with_name(output_file.name + ".part.json")
+        self.stamp = stamp
+        self.start_ms = 0
+        kept: List[Cue] = []
+        if resume:
+            kept = self._load()
+        self.resumed = len(kept)
+        self.tail_text = " ".join(c.text for c in kept[-2:])
+        self.writer = CueWriter(self.part, flush=True)
+        self.writer.write_all(kept)
+
+    def _load(self) -> List[Cue]:
+        try:
+            ck = json.loads(self.meta.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return []
+        if ck.get("stamp") != self.stamp or not self.part.exists():
+            return []
+        kept = list(islice(iter_cues(self.part), ck.get("count", 0)))
+        if len(kept) != ck.get("count"):
+            return []
+        self.start_ms = int(ck.get("end_ms", 0))
+        return kept
+
+    def write(self, cue: Cue) -> None:
+        self.writer.write(cue)
+
+    def checkpoint(self, end_ms: int) -> None:
+        """Mark everything written so far, and the audio up to ``end_ms``, as done."""
+        data = {"stamp": self.stamp, "count": self.writer.count, "end_ms": int(end_ms)}
+        tmp = self.meta.with_name(self.meta.name + ".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self.meta)
+
+    def add(self, cue: Cue) -> None:
+        self.write(cue)
+        self.checkpoint(cue.end)
+
+    @property
+    def count(self) -> int:
+        return self.writer.count
+
+    def __enter__(self) -> "SegmentLog":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> Optional[bool]:
+        self.writer.close()
+        if exc_type is None:
+            self.part.replace(self.output_file)
+            self.meta.unlink(missing_ok=True)
+        return None
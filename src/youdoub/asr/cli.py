@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import List
+
+import typer
+from rich.console import Console
+
+from ..utils.logging import setup_logging
+from .client import server_status, server_url, stop_server
+from .server import DEFAULT_HOST, DEFAULT_PORT, serve
+
+app = typer.Typer(no_args_is_help=True)
+console = Console()
+
+
+@app.command("serve")
+def serve_cmd(
+    host: str = typer.Option(DEFAULT_HOST, "--host", help="监听地址（默认仅本机；其他地址需通过 YOUDOUB_ASR_TOKEN 把令牌告知客户端）"),
+    port: int = typer.Option(DEFAULT_PORT, "--port", help="监听端口"),
+    preload: List[str] = typer.Option([], "--model", "-m", help="启动时预加载的模型，可重复指定"),
+    max_models: int = typer.Option(2, "--max-models", min=1, help="最多常驻内存的模型数量"),
+    model_dir: str = typer.Option(None, "--model-dir", help="模型下载目录（默认为 ./models）"),
+    compute_type: str = typer.Option("default", "--compute-type", help="预加载模型的计算精度（CPU 上推荐 int8 / int8_float32）"),
+    cpu_threads: int = typer.Option(0, "--cpu-threads", min=0, help="预加载模型的 CPU 线程数（0 为自动）"),
+    root: Path = typer.Option(Path(os.getenv("YOUDOUB_WORKDIR", "./work")), "--root", help="工作目录，识别结果只允许写入此目录之下"),
+):
+    """启动常驻的 ASR 服务，模型只加载一次；运行期间 yt asr 会自动交给它处理。"""
+    setup_logging(log_to_file=False)
+    if server_status(f"http://{host}:{port}"):
+        console.print(f"[yellow]ASR 服务已在运行: http://{host}:{port}[/yellow]")
+        raise typer.Exit(1)
+    serve(
+        host=host,
+        port=port,
+        max_models=max_models,
+        model_dir=model_dir,
+        preload=preload,
+        compute_type=compute_type,
+        cpu_threads=cpu_threads,
+        root=root,
+    )
+
+
+@app.command("status")
+def status():
+    """查看 ASR 服务状态（地址由 YOUDOUB_ASR_SERVER 指定）。"""
+    url = server_url()
+    info = server_status(url)
+    if info is None:
+        console.print(f"[yellow]ASR 服务未运行: {url}[/yellow]")
+        raise typer.Exit(1)
+    console.print(f"[green]ASR 服务运行中[/green] {url} (pid {info['pid']})")
+    console.print(f"已加载模型: {', '.join(info['models']) or '无'}")
+
+
+@app.command("stop")
+def stop():
+    """停止正在运行的 ASR 服务。"""
+    url = server_url()
+    if stop_server(url):
+        console.print(f"[green]完成[/green] 已通知 ASR 服务退出: {url}")
+    else:
+        console.print(f"[yellow]ASR 服务未运行: {url}[/yellow]")
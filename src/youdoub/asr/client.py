@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import httpx
+
+from .resegment import Segmentation
+from .server import DEFAULT_HOST, DEFAULT_PORT, read_token
+
+
+def server_url() -> str:
+    return os.getenv("YOUDOUB_ASR_SERVER", f"http://{DEFAULT_HOST}:{DEFAULT_PORT}").rstrip("/")
+
+
+def _auth_headers() -> Dict[str, str]:
+    token = read_token()
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+def server_status(url: Optional[str] = None, timeout: float = 0.5) -> Optional[Dict[str, Any]]:
+    """Health info of the ASR server, or ``None`` when nothing is listening."""
+    try:
+        resp = httpx.get(f"{url or server_url()}/health", timeout=timeout)
+        resp.raise_for_status()
+        return resp.json()
+    except (httpx.HTTPError, ValueError):
+        return None
+
+
+def transcribe_remote(
+    *,
+    input_path: Path,
+    output_file: Path,
+    lang: str,
+    model: str,
+    model_dir: Optional[str] = None,
+    batch_size: int = 0,
+    compute_type: str = "default",
+    cpu_threads: int = 0,
+    resume: bool = False,
+    segmentation: Optional[Segmentation] = None,
+    params: Optional[Dict[str, Any]] = None,
+    url: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Send a transcription job to the running ASR server and wait for it.
+
+    The server reads the input and writes the SRT itself, so paths are sent
+    as absolute paths on the shared filesystem; the output has to lie under
+    the server's ``--root``. The token comes from :func:`read_token`.
+    """
+    job = {
+        "input": str(Path(input_path).resolve()),
+        "output": str(Path(output_file).resolve()),
+        "lang": lang,
+        "model": model,
+        "model_dir": str(Path(model_dir).resolve()) if model_dir else None,
+        "batch_size": batch_size,
+        "compute_type": compute_type,
+        "cpu_threads": cpu_threads,
+        "resume": resume,
+        "segmentation": segmentation.to_dict() if segmentation else None,
+        "params": params,
+    }
+    # 长视频识别可能需要很久，不设读取超时
+    resp = httpx.post(
+        f"{url or server_url()}/transcribe", json=job, headers=_auth_headers(), timeout=httpx.Timeout(10.0, read=None)
+    )
+    try:
+        payload = resp.json()
+    except ValueError:
+        payload = {"error": resp.text}
+    if resp.status_code != 200:
+        raise RuntimeError(f"ASR 服务出错: {payload.get('error', resp.status_code)}")
+    return payload
+
+
+def stop_server(url: Optional[str] = None) -> bool:
+    try:
+        httpx.post(f"{url or server_url()}/shutdown", headers=_auth_headers(), timeout=2.0).raise_for_status()
+        return True
+    except httpx.HTTPError:
+        return False
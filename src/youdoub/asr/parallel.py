@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from ..subtitles.srt import Cue
+from .audio import SAMPLE_RATE, load_pcm
+from .checkpoint import SegmentLog, input_stamp
+from .resegment import Segmentation, resegment, words_from_segments
+from .transcribe import TRANSCRIBE_OPTIONS, load_model, prepare_model_dir
+
+# 子进程里的模型，由 _init_worker 加载
+_worker_model = None
+
+
+def plan_chunks(speech: Sequence[Dict[str, int]], total: int, target: int) -> List[Tuple[int, int]]:
+    """Cut ``[0, total)`` into contiguous ranges of roughly ``target`` samples.
+
+    Cuts are only placed in the middle of a silence between two VAD speech
+    regions, so no word is split between chunks. A speech region longer than
+    ``target`` stays whole.
+    """
+    chunks: List[Tuple[int, int]] = []
+    begin = 0
+    for cur, nxt in zip(speech, speech[1:]):
+        if cur["end"] - begin >= target:
+            cut = (cur["end"] + nxt["start"]) // 2
+            chunks.append((begin, cut))
+            begin = cut
+    chunks.append((begin, total))
+    return chunks
+
+
+def chunk_target(total: int, workers: int, max_seconds: int = 600, min_seconds: int = 30) -> int:
+    """Chunk length giving every worker a few chunks to balance uneven speech density."""
+    per_chunk = total // (workers * 3) if workers > 0 else total
+    return max(min_seconds * SAMPLE_RATE, min(max_seconds * SAMPLE_RATE, per_chunk))
+
+
+def _norm(text: str) -> str:
+    return re.sub(r"\W+", "", text).lower()
+
+
+def stitch_segments(chunks: Iterable[Tuple[int, int, List[Cue]]]) -> Iterator[Cue]:
+    """Shift per-chunk cues by their chunk offset and join them into one track.
+
+    ``chunks`` yields ``(offset_ms, end_ms, cues)`` in time order with cue
+    times relative to the chunk. Cues are clipped to their chunk, a cue
+    repeating the previous one's text across a boundary (Whisper tends to
+    echo context near the edges) is dropped, and starts never go backwards.
+    """
+    prev: Optional[Cue] = None
+    for offset, chunk_end, cues in chunks:
+        first = True
+        for c in cues:
+            start = min(offset + c.start, chunk_end)
+            end = min(max(offset + c.end, start), chunk_end)
+            if prev is not None:
+                if first and _norm(c.text) and _norm(c.text) == _norm(prev.text) and start - prev.end < 1000:
+                    first = False
+                    continue
+                start = max(start, prev.end)
+                end = max(end, start)
+            first = False
+            prev = Cue(start, end, c.text)
+            yield prev
+
+
+def _init_worker(model: str, model_dir: Optional[str], compute_type: str, cpu_threads: int) -> None:
+    global _worker_model
+    _worker_model = load_model(model, model_dir, compute_type=compute_type, cpu_threads=cpu_threads)
+
+
+def _transcribe_chunk(
+    audio, language: Optional[str], batch_size: int, segmentation: Optional[Segmentation] = None
+) -> Tuple[List[Cue], str, float]:
+    if isinstance(audio, tuple):
+        # (PCM 文件, 起, 止)：子进程自己 memmap，无需经管道传送采样
+        path, start, end = audio
+        audio = load_pcm(Path(path))[start:end]
+    options = dict(TRANSCRIBE_OPTIONS, log_progress=False, word_timestamps=segmentation is not None)
+    if batch_size > 0:
+        from faster_whisper import BatchedInferencePipeline
+
+        segments, info = BatchedInferencePipeline(_worker_model).transcribe(
+            audio, language=language, batch_size=batch_size, **options
+        )
+    else:
+        segments, info = _worker_model.transcribe(audio, language=language, **options)
+    if segmentation is not None:
+        cues = list(resegment(words_from_segments(segments), segmentation))
+    else:
+        cues = [Cue(round(s.start * 1000), round(s.end * 1000), s.text.strip()) for s in segments]
+    return cues, info.language, info.language_probability
+
+
+def transcribe_parallel(
+    input_path: Path,
+    output_file: Path,
+    lang: str,
+    *,
+    model: str,
+    workers: int,
+    model_dir: Optional[str] = None,
+    compute_type: str = "default",
+    cpu_threads: int = 0,
+    batch_size: int = 0,
+    resume: bool = False,
+    segmentation: Optional[Segmentation] = None,
+    params: Optional[Dict[str, Any]] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, Any]:
+    """Transcribe with ``workers`` processes, each holding its own model.
+
+    A ``.f32`` input (the workspace PCM) is memory-mapped and workers map
+    their own slice of it; anything else is decoded once up front. The
+    audio is split at VAD silences (:func:`plan_chunks`)
+    and the chunks are fanned out to a process pool. ``cpu_threads`` is the
+    budget per process (0 = the machine's cores divided by ``workers``).
+    Results are stitched in order (:func:`stitch_segments`) and streamed to
+    ``<output>.part``, checkpointed after every chunk so ``resume=True``
+    only re-plans the audio after the last finished chunk (and only when
+    ``params`` match the checkpoint). ``segmentation``
+    rebuilds each chunk's cues from word timestamps (chunks end in silence,
+    so no sentence spans two of them).
+    """
+    from faster_whisper.utils import download_model
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    # 先在主进程下载好模型，避免多个子进程同时下载
+    model_dir = prepare_model_dir(model_dir)
+    if not os.path.isdir(model):
+        download_model(model, cache_dir=model_dir)
+
+    pcm = Path(input_path) if Path(input_path).suffix == ".f32" else None
+    if pcm is not None:
+        audio = load_pcm(pcm)
+    else:
+        from faster_whisper import decode_audio
+
+        audio = decode_audio(str(input_path), sampling_rate=SAMPLE_RATE)
+    threads = cpu_threads or max(1, (os.cpu_count() or 1) // workers)
+    language = lang if lang != "auto" else None
+    languages: List[Tuple[str, float]] = []
+
+    with SegmentLog(output_file, input_stamp(input_path, lang, params), resume=resume) as log:
+        # 续跑时只对检查点之后的音频切块
+        base = log.start_ms * SAMPLE_RATE // 1000
+        rest = audio[base:]
+        speech = get_speech_timestamps(rest, VadOptions())
+        ranges = [(base + a, base + b) for a, b in plan_chunks(speech, len(rest), chunk_target(len(rest), workers))]
+
+        def results(pool: ProcessPoolExecutor) -> Iterator[Tuple[int, int, List[Cue]]]:
+            futures = [pool.submit(_transcribe_chunk, (str(pcm), a, b) if pcm else audio[a:b], language, batch_size, segmentation) for a, b in ranges]
+            for i, ((a, b), fut) in enumerate(zip(ranges, futures)):
+                cues, lang_code, prob = fut.result()
+                languages.append((lang_code, prob))
+                if progress:
+                    progress(i + 1, len(ranges))
+                yield a * 1000 // SAMPLE_RATE, b * 1000 // SAMPLE_RATE, cues
+                # 拼接器取下一块之前，这一块的字幕已全部写出
+                log.checkpoint(b * 1000 // SAMPLE_RATE)
+
+        # spawn：避免在已加载 onnxruntime/PyAV 线程的父进程上 fork
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(model, model_dir, compute_type, threads),
+        ) as pool:
+            for cue in stitch_segments(results(pool)):
+                log.write(cue)
+    detected, prob = languages[0] if languages else (lang, 0.0)
+    return {
+        "language": detected,
+        "language_probability": prob,
+        "segments": log.count,
+        "resumed": log.resumed,
+        "chunks": len(ranges),
+    }
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterator, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+class PipelineStopped(RuntimeError):
+    """Raised in the producer when the consumer has given up."""
+
+
+def run_pipeline(
+    produce: Callable[[Callable[[Any], None]], T],
+    consume: Callable[[Iterator[Any]], Any],
+    maxsize: int = 256,
+) -> Tuple[T, Any]:
+    """Run ``produce(emit)`` in a background thread and ``consume(items)`` in this one.
+
+    Items passed to ``emit`` reach the consumer's iterator through a queue of
+    at most ``maxsize`` items, so a slow consumer holds the producer back
+    instead of buffering without limit. An exception in the producer is
+    re-raised from the consumer's iterator once the items before it are
+    consumed; if the consumer fails, the producer is stopped at its next
+    ``emit``. Returns both results.
+    """
+    q: "queue.Queue[Any]" = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+    outcome: Dict[str, Any] = {}
+
+    def emit(item: Any) -> None:
+        while True:
+            if stop.is_set():
+                raise PipelineStopped("下游已停止")
+            try:
+                q.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def target() -> None:
+        try:
+            outcome["value"] = produce(emit)
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            if not stop.is_set():
+                q.put(_DONE)
+
+    thread = threading.Thread(target=target, name="pipeline-producer", daemon=True)
+    thread.start()
+
+    def items() -> Iterator[Any]:
+        while True:
+            item = q.get()
+            if item is _DONE:
+                break
+            yield item
+        if "error" in outcome:
+            raise outcome["error"]
+
+    try:
+        consumed = consume(items())
+    except BaseException:
+        stop.set()
+        # 腾出队列，让阻塞在 put 上的生产者看到停止信号
+        while thread.is_alive():
+            try:
+                q.get(timeout=0.5)
+            except queue.Empty:
+                pass
+        raise
+    thread.join()
+    return outcome.get("value"), consumed
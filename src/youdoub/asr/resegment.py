@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from ..subtitles.srt import Cue
+
+# 句末标点：遇到即断句
+SENTENCE_END = tuple(".?!。？！…")
+# 从句标点：超长时优先在这里断开
+CLAUSE_END = tuple(",;:，；：、")
+
+
+@dataclass(frozen=True)
+class Segmentation:
+    """Limits for building cues from word timestamps; times in milliseconds."""
+
+    max_duration_ms: int = 7000
+    max_chars: int = 84
+    pause_ms: int = 600
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> Optional["Segmentation"]:
+        return cls(**data) if data else None
+
+
+def words_from_segments(segments: Iterable[Any], offset_ms: int = 0) -> Iterator[Cue]:
+    """Flatten faster-whisper segments into one cue per word, shifted by ``offset_ms``.
+
+    Word text keeps Whisper's leading space, so joining words back is plain
+    concatenation for both spaced and CJK languages. A segment without word
+    timings is passed through as a single "word".
+    """
+    for s in segments:
+        words = getattr(s, "words", None)
+        if not words:
+            yield Cue(offset_ms + round(s.start * 1000), offset_ms + round(s.end * 1000), " " + s.text.strip())
+            continue
+        for w in words:
+            yield Cue(offset_ms + round(w.start * 1000), offset_ms + round(w.end * 1000), w.word)
+
+
+def _join(words: List[Cue]) -> Cue:
+    return Cue(words[0].start, words[-1].end, "".join(w.text for w in words).strip())
+
+
+def resegment(words: Iterable[Cue], seg: Segmentation = Segmentation()) -> Iterator[Cue]:
+    """Group timed words into cues in a single pass.
+
+    A cue ends after a word closing a sentence, before a pause of at least
+    ``seg.pause_ms``, or before the word that would take it past
+    ``seg.max_chars`` / ``seg.max_duration_ms``. In the last case the cut
+    goes back to the latest clause punctuation in the cue when there is one,
+    and the words after it start the next cue. Cues are yielded as soon as
+    they are final, so this can sit directly behind a streaming transcriber.
+    """
+    buf: List[Cue] = []
+    chars = 0
+    soft = 0  # buf[:soft] 以从句标点结尾
+    for w in words:
+        if not w.text.strip():
+            continue
+        if buf and w.start - buf[-1].end >= seg.pause_ms:
+            yield _join(buf)
+            buf, chars, soft = [], 0, 0
+        elif buf and (chars + len(w.text) > seg.max_chars or w.end - buf[0].start > seg.max_duration_ms):
+            cut = soft or len(buf)
+            yield _join(buf[:cut])
+            buf = buf[cut:]
+            chars, soft = sum(len(b.text) for b in buf), 0
+            if buf and (chars + len(w.text) > seg.max_chars or w.end - buf[0].start > seg.max_duration_ms):
+                yield _join(buf)
+                buf, chars = [], 0
+        buf.append(w)
+        chars += len(w.text)
+        tail = w.text.rstrip()
+        if tail.endswith(SENTENCE_END):
+            yield _join(buf)
+            buf, chars, soft = [], 0, 0
+        elif tail.endswith(CLAUSE_END):
+            soft = len(buf)
+    if buf:
+        yield _join(buf)
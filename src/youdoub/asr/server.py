@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..paths import cache_root
+from ..utils.logging import get_logger
+from .resegment import Segmentation
+from .transcribe import load_model, prepare_model_dir, transcribe_to_srt
+
+logger = get_logger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+def token_path() -> Path:
+    return cache_root() / "asr-server.token"
+
+
+def read_token() -> Optional[str]:
+    """Shared secret for the ASR server: ``YOUDOUB_ASR_TOKEN``, else the file written by ``serve``."""
+    if os.getenv("YOUDOUB_ASR_TOKEN"):
+        return os.environ["YOUDOUB_ASR_TOKEN"]
+    try:
+        return token_path().read_text(encoding="utf-8").strip() or None
+    except OSError:
+        return None
+
+
+def _write_token(token: str) -> None:
+    path = token_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.unlink(missing_ok=True)
+    # 只有当前用户可读
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token)
+
+
+class ModelPool:
+    """Keeps up to ``max_models`` Whisper models resident, least recently used evicted first.
+
+    Each model has its own lock: jobs for the same model run one after
+    another, jobs for different models run side by side. Loading also holds
+    only a per-model lock, so a slow load does not hold up jobs for models
+    that are already resident.
+    """
+
+    def __init__(self, max_models: int = 2, model_dir: Optional[str] = None):
+        self.max_models = max(1, max_models)
+        self.model_dir = model_dir
+        self._models: "OrderedDict[Tuple[str, str, str, int], Tuple[Any, threading.Lock]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[Tuple[str, str, str, int], threading.Lock] = {}
+
+    def get(
+        self,
+        model: str,
+        model_dir: Optional[str] = None,
+        compute_type: str = "default",
+        cpu_threads: int = 0,
+    ) -> Tuple[Any, threading.Lock]:
+        key = (model, prepare_model_dir(model_dir or self.model_dir), compute_type, cpu_threads)
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key]
+            load_lock = self._loading.setdefault(key, threading.Lock())
+        # 全局锁只保护字典；加载在该模型自己的锁内进行，不阻塞已加载模型的任务
+        with load_lock:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key]
+            logger.info(f"加载模型: {model} ({key[1]}, compute_type={compute_type}, cpu_threads={cpu_threads})")
+            started = time.monotonic()
+            try:
+                entry = (load_model(model, key[1], compute_type=compute_type, cpu_threads=cpu_threads), threading.Lock())
+            except Exception:
+                with self._lock:
+                    self._loading.pop(key, None)
+                raise
+            logger.info(f"模型已加载: {model}，耗时 {time.monotonic() - started:.1f}s")
+            with self._lock:
+                self._models[key] = entry
+                self._loading.pop(key, None)
+                while len(self._models) > self.max_models:
+                    (old, *_), _ = self._models.popitem(last=False)
+                    logger.info(f"卸载模型: {old}")
+            return entry
+
+    def loaded(self) -> List[str]:
+        with self._lock:
+            return [key[0] for key in self._models]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "ASRServer"
+
+    def _reply(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self) -> None:
+        if self.path != "/health":
+            self._reply(404, {"error": f"unknown path: {self.path}"})
+            return
+        self._reply(200, {"status": "ok", "pid": os.getpid(), "models": self.server.pool.loaded()})
+
+    def _authorized(self) -> bool:
+        scheme, _, token = (self.headers.get("Authorization") or "").partition(" ")
+        return scheme == "Bearer" and hmac.compare_digest(token.encode(), self.server.token.encode())
+
+    def do_POST(self) -> None:
+        if not self._authorized():
+            self._reply(401, {"error": "missing or invalid token"})
+            return
+        if self.path == "/shutdown":
+            self._reply(200, {"status": "stopping"})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+        if self.path != "/transcribe":
+            self._reply(404, {"error": f"unknown path: {self.path}"})
+            return
+        try:
+            job = self._read_json()
+            input_path = Path(job["input"])
+            output_file = Path(job["output"]).resolve()
+            if not output_file.is_relative_to(self.server.root):
+                # 只写入服务工作目录之下，避免客户端覆盖任意文件
+                self._reply(403, {"error": f"输出路径不在服务工作目录 {self.server.root} 之下: {output_file}"})
+                return
+            if not input_path.exists():
+                raise FileNotFoundError(f"输入文件不存在: {input_path}")
+            model_instance, model_lock = self.server.pool.get(
+                job["model"],
+                job.get("model_dir"),
+                compute_type=job.get("compute_type", "default"),
+                cpu_threads=job.get("cpu_threads", 0),
+            )
+            logger.info(f"开始识别: {input_path} -> {output_file}")
+            started = time.monotonic()
+            with model_lock:
+                result = transcribe_to_srt(
+                    model_instance,
+                    input_path,
+                    output_file,
+                    job.get("lang", "en"),
+                    batch_size=job.get("batch_size", 0),
+                    resume=job.get("resume", False),
+                    segmentation=Segmentation.from_dict(job.get("segmentation")),
+                    params=job.get("params"),
+                )
+            result["elapsed"] = time.monotonic() - started
+            logger.info(f"识别完成: {output_file} ({result['segments']} 段，{result['elapsed']:.1f}s)")
+            self._reply(200, result)
+        except Exception as e:
+            logger.error(f"识别失败: {e}")
+            self._reply(500, {"error": str(e)})
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(format % args)
+
+
+class ASRServer(ThreadingHTTPServer):
+    """HTTP front end of a :class:`ModelPool`.
+
+    ``POST`` requests must carry ``Authorization: Bearer <token>``, and job
+    outputs must resolve to a path under ``root``; ``GET /health`` is open.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str, port: int, pool: ModelPool, token: str, root: Path):
+        super().__init__((host, port), _Handler)
+        self.pool = pool
+        self.token = token
+        self.root = Path(root).expanduser().resolve()
+
+
+def serve(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    max_models: int = 2,
+    model_dir: Optional[str] = None,
+    preload: Optional[List[str]] = None,
+    compute_type: str = "default",
+    cpu_threads: int = 0,
+    root: Optional[Path] = None,
+) -> None:
+    """Run the ASR server in the foreground until shut down.
+
+    ``compute_type``/``cpu_threads`` only apply to the preloaded models; jobs
+    carry their own settings. The token is ``YOUDOUB_ASR_TOKEN`` when set,
+    otherwise a new one is written to :func:`token_path` for local clients.
+    ``root`` (default ``YOUDOUB_WORKDIR`` or ``./work``) bounds job outputs.
+    """
+    token = os.getenv("YOUDOUB_ASR_TOKEN")
+    if not token:
+        token = secrets.token_urlsafe(32)
+        _write_token(token)
+    root = root or Path(os.getenv("YOUDOUB_WORKDIR", "./work"))
+    pool = ModelPool(max_models=max_models, model_dir=model_dir)
+    for model in preload or []:
+        pool.get(model, compute_type=compute_type, cpu_threads=cpu_threads)
+    server = ASRServer(host, port, pool, token, root)
+    logger.info(f"ASR 服务已启动: http://{host}:{port}，工作目录 {server.root}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        logger.info("ASR 服务已停止")
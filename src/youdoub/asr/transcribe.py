@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from ..subtitles.srt import Cue
+from .audio import SAMPLE_RATE, load_audio
+from .checkpoint import SegmentLog, input_stamp
+from .resegment import Segmentation, resegment, words_from_segments
+
+DEFAULT_MODEL_DIR = "./models"
+
+# yt asr 一直使用的识别参数
+TRANSCRIBE_OPTIONS: Dict[str, Any] = dict(
+    beam_size=5,
+    patience=1,
+    length_penalty=1,
+    repetition_penalty=1,
+    no_repeat_ngram_size=0,
+    compression_ratio_threshold=2.4,
+    log_prob_threshold=-1.0,
+    no_speech_threshold=0.6,
+    condition_on_previous_text=True,
+    prompt_reset_on_temperature=0.5,
+    initial_prompt=None,
+    prefix=None,
+    suppress_blank=True,
+    suppress_tokens=[-1],
+    without_timestamps=False,
+    max_initial_timestamp=1.0,
+    hallucination_silence_threshold=None,
+    # 启用进度显示
+    log_progress=True,
+)
+
+
+def prepare_model_dir(model_dir: Optional[str]) -> str:
+    """Create the model directory and point the Hugging Face cache at it."""
+    model_dir = model_dir or DEFAULT_MODEL_DIR
+    Path(model_dir).mkdir(parents=True, exist_ok=True)
+    os.environ["HF_HOME"] = model_dir
+    os.environ["HUGGINGFACE_HUB_CACHE"] = model_dir
+    # 确保显示下载进度条
+    os.environ["HF_HUB_DISABLE_PROGRESS_BARS"] = "False"
+    # 使用标准下载器以确保进度条显示
+    os.environ["HF_HUB_ENABLE_HF_TRANSFER"] = "False"
+    return model_dir
+
+
+def load_model(model: str, model_dir: Optional[str] = None, compute_type: str = "default", cpu_threads: int = 0):
+    """Load a faster-whisper model, downloading it on first use.
+
+    ``compute_type`` is passed to CTranslate2 (``int8`` / ``int8_float32``
+    are the fast choices on CPU); ``cpu_threads=0`` lets it pick.
+    """
+    # 延迟导入：只作为 ASR 服务客户端时无需加载 ctranslate2
+    from faster_whisper import WhisperModel
+
+    model_dir = prepare_model_dir(model_dir)
+    return WhisperModel(
+        model,
+        device="auto",
+        compute_type=compute_type,
+        cpu_threads=cpu_threads,
+        download_root=model_dir,
+        local_files_only=False,
+    )
+
+
+def transcribe_to_srt(
+    model_instance,
+    input_path: Path,
+    output_file: Path,
+    lang: str,
+    batch_size: int = 0,
+    resume: bool = False,
+    on_cue: Optional[Callable[[Cue], None]] = None,
+    segmentation: Optional[Segmentation] = None,
+    params: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Transcribe ``input_path`` and stream the segments to ``output_file``.
+
+    A ``.f32`` input is the workspace PCM (see :mod:`.audio`) and is
+    memory-mapped instead of decoded.
+
+    With ``batch_size > 0`` the audio is cut at VAD silences and the chunks
+    are decoded ``batch_size`` at a time by faster-whisper's
+    ``BatchedInferencePipeline``; chunks are decoded independently, so the
+    previous text is not used as a prompt.
+
+    Segments are appended to ``<output>.part`` and checkpointed one by one
+    (see :class:`.checkpoint.SegmentLog`), so an interrupted run never leaves
+    a complete-looking SRT behind and ``resume=True`` continues decoding
+    after the last finished segment; ``params`` (:func:`.cache.asr_params`)
+    are part of the checkpoint stamp, so a resume with other settings starts
+    over. ``on_cue`` is called with every new cue
+    right after it is written, e.g. to feed a translation pipeline.
+
+    With ``segmentation`` the model is asked for word timestamps and the
+    cues are rebuilt from the words by :func:`.resegment.resegment` instead
+    of following Whisper's segments. Returns the detected language, its
+    probability, the number of cues written and how many were resumed.
+    """
+    language = lang if lang != "auto" else None
+    options = dict(TRANSCRIBE_OPTIONS, word_timestamps=segmentation is not None)
+    with SegmentLog(output_file, input_stamp(input_path, lang, params), resume=resume) as log:
+        audio = load_audio(input_path)
+        offset = log.start_ms
+        if offset:
+            if isinstance(audio, str):
+                from faster_whisper import decode_audio
+
+                audio = decode_audio(audio, sampling_rate=SAMPLE_RATE)
+            audio = audio[offset * SAMPLE_RATE // 1000:]
+            # 续跑时用已识别的最后几句作为提示，保持上下文
+            if batch_size == 0 and log.tail_text:
+                options["initial_prompt"] = log.tail_text
+        if batch_size > 0:
+            from faster_whisper import BatchedInferencePipeline
+
+            pipeline = BatchedInferencePipeline(model_instance)
+            segments, info = pipeline.transcribe(audio, language=language, batch_size=batch_size, **options)
+        else:
+            segments, info = model_instance.transcribe(audio, language=language, **options)
+        if segmentation is not None:
+            cues = resegment(words_from_segments(segments, offset), segmentation)
+        else:
+            cues = (Cue(offset + round(s.start * 1000), offset + round(s.end * 1000), s.text.strip()) for s in segments)
+        for cue in cues:
+            log.add(cue)
+            if on_cue is not None:
+                on_cue(cue)
+    return {
+        "language": info.language,
+        "language_probability": info.language_probability,
+        "segments": log.count,
+        "resumed": log.resumed,
+    }
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from ..paths import cache_root
+from .audio import SAMPLE_RATE
+from .parallel import _init_worker, _transcribe_chunk
+from .transcribe import prepare_model_dir
+
+# CPU 上值得比较的计算精度
+CPU_COMPUTE_TYPES = ("int8", "int8_float32", "float32")
+
+
+def profile_path() -> Path:
+    """Machine-local ASR profile written by ``yt asr-bench``."""
+    return cache_root() / "asr_profile.json"
+
+
+def candidate_settings(cores: int, compute_types: Sequence[str] = CPU_COMPUTE_TYPES, max_workers: int = 4) -> List[Dict[str, Any]]:
+    """Combinations worth timing on a machine with ``cores`` logical CPUs.
+
+    Processes split the cores evenly (``workers * cpu_threads == cores``);
+    a single process is also tried on half the cores, which often wins on
+    machines with hyper-threading.
+    """
+    cores = max(1, cores)
+    layouts = []
+    workers = 1
+    while workers <= min(max_workers, cores):
+        layouts.append((workers, cores // workers))
+        workers *= 2
+    if cores >= 4:
+        layouts.append((1, cores // 2))
+    return [
+        {"compute_type": ct, "cpu_threads": threads, "workers": w}
+        for ct in compute_types
+        for w, threads in layouts
+    ]
+
+
+def _timed_chunk(audio, language: Optional[str], batch_size: int) -> float:
+    started = time.perf_counter()
+    _transcribe_chunk(audio, language, batch_size)
+    return time.perf_counter() - started
+
+
+def measure(
+    pcm: Path,
+    start: int,
+    end: int,
+    *,
+    model: str,
+    lang: str,
+    compute_type: str,
+    cpu_threads: int,
+    workers: int,
+    model_dir: Optional[str] = None,
+    batch_size: int = 0,
+) -> float:
+    """Audio seconds transcribed per wall-clock second for one setting.
+
+    ``workers`` processes each load the model and decode the same clip
+    ``pcm[start:end]`` at once, which is how ``--workers`` loads the machine.
+    Model loading is not timed; the slowest process sets the wall time.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    language = lang if lang != "auto" else None
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(model, model_dir, compute_type, cpu_threads),
+    ) as pool:
+        futures = [pool.submit(_timed_chunk, (str(pcm), start, end), language, batch_size) for _ in range(workers)]
+        slowest = max(f.result() for f in futures)
+    clip_seconds = (end - start) / SAMPLE_RATE
+    return workers * clip_seconds / slowest if slowest > 0 else 0.0
+
+
+def autotune(
+    pcm: Path,
+    *,
+    model: str,
+    lang: str,
+    clip_seconds: int = 60,
+    offset_seconds: int = 0,
+    model_dir: Optional[str] = None,
+    batch_size: int = 0,
+    candidates: Optional[List[Dict[str, Any]]] = None,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Time every candidate on a clip of ``pcm`` and return the fastest with all results.
+
+    A candidate that fails (e.g. a compute type the CPU does not support)
+    is recorded with its error and skipped.
+    """
+    from faster_whisper.utils import download_model
+
+    # 先下载好模型，计时的子进程只从本地加载
+    model_dir = prepare_model_dir(model_dir)
+    if not os.path.isdir(model):
+        download_model(model, cache_dir=model_dir)
+
+    total = pcm.stat().st_size // 4
+    start = min(offset_seconds * SAMPLE_RATE, max(0, total - clip_seconds * SAMPLE_RATE))
+    end = min(total, start + clip_seconds * SAMPLE_RATE)
+    if end <= start:
+        raise RuntimeError(f"音频为空: {pcm}")
+
+    results = []
+    for setting in candidates or candidate_settings(os.cpu_count() or 1):
+        row = dict(setting)
+        try:
+            row["speed"] = round(
+                measure(pcm, start, end, model=model, lang=lang, model_dir=model_dir, batch_size=batch_size, **setting), 3
+            )
+        except Exception as e:
+            row["error"] = str(e)
+        results.append(row)
+        if progress:
+            progress(row)
+    best = pick_best(results)
+    if best is None:
+        raise RuntimeError("所有组合均失败")
+    return {
+        "best": best,
+        "results": results,
+        "clip_seconds": (end - start) / SAMPLE_RATE,
+        "batch_size": batch_size,
+    }
+
+
+def pick_best(results: Sequence[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    ok = [r for r in results if "speed" in r]
+    if not ok:
+        return None
+    # 速度相同时取进程更少的（占内存少）
+    best = max(ok, key=lambda r: (r["speed"], -r["workers"]))
+    return {k: best[k] for k in ("compute_type", "cpu_threads", "workers", "speed")}
+
+
+def load_profile(path: Optional[Path] = None) -> Dict[str, Any]:
+    path = path or profile_path()
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_profile(model: str, tuned: Dict[str, Any], path: Optional[Path] = None) -> Path:
+    """Record the fastest setting for ``model``, keeping other models' entries."""
+    path = path or profile_path()
+    data = load_profile(path)
+    data.setdefault("models", {})[model] = dict(
+        tuned["best"],
+        batch_size=tuned["batch_size"],
+        cpu_count=os.cpu_count(),
+        measured_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp.replace(path)
+    return path
+
+
+def tuned_settings(model: str, path: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """The profile entry for ``model``, unless it was measured on a machine with another CPU count."""
+    entry = load_profile(path).get("models", {}).get(model)
+    if not entry or entry.get("cpu_count") != os.cpu_count():
+        return None
+    return entry
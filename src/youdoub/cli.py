@@ -28,6 +28,12 @@ app.add_typer(youtube_cli.app, name="yt")
 from .bilibili import cli as bilibili_cli
 
 app.add_typer(bilibili_cli.app, name="bili")
+from .subtitles import cli as subtitles_cli
+
+app.add_typer(subtitles_cli.app, name="sub")
+from .asr import cli as asr_cli
+
+app.add_typer(asr_cli.app, name="asr")
 
 
 def version_callback(value: bool):
@@ -52,7 +58,6 @@ def main(
 
 
 # NOTE: Remaining commands are implemented as subcommand groups.
-# Next: add `asr` group (Buzz ASR) and `bili` group (biliup config/upload).
 
 
 if __name__ == "__main__":
@@ -1,9 +1,17 @@
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass
 from pathlib import Path
 
 
+def cache_root() -> Path:
+    """Cache shared by all workspaces: ``YOUDOUB_CACHE_DIR``, else ``$XDG_CACHE_HOME/youdoub`` or ``~/.cache/youdoub``."""
+    if os.getenv("YOUDOUB_CACHE_DIR"):
+        return Path(os.environ["YOUDOUB_CACHE_DIR"]).expanduser()
+    return Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache").expanduser() / "youdoub"
+
+
 @dataclass(frozen=True)
 class WorkPaths:
     """Filesystem layout for a single video workspace (workdir)."""
@@ -19,6 +27,15 @@ class WorkPaths:
         # we will download as video.mp4 (merged) for simplicity
         return self.root / "video.mp4"
 
+    @property
+    def audio_pcm(self) -> Path:
+        # 16 kHz 单声道 float32 原始采样，可直接 memmap
+        return self.root / "audio.f32"
+
+    @property
+    def audio_meta(self) -> Path:
+        return self.root / "audio.f32.json"
+
     @property
     def subs_dir(self) -> Path:
         return self.root / "subs"
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import heapq
+import re
+from typing import List, Tuple
+
+from .srt import CueList
+
+
+def _overlap_links(a: CueList, b: CueList, min_overlap: float) -> List[Tuple[int, int, int]]:
+    """Triples ``(i, j, shared_ms)`` for cues of ``a`` and ``b`` that overlap in time.
+
+    A pair counts when the shared time is at least ``min_overlap`` of the
+    shorter cue, so cues that merely touch at a boundary or jitter by a few
+    frames are not linked. Sweep line over both tracks sorted by start: ``b``
+    cues enter a heap keyed by end once they start before the current ``a``
+    cue ends, and leave it for good once they end before an ``a`` cue starts.
+    O((n + m) log m + pairs).
+    """
+    order_a = sorted(range(len(a)), key=a.starts.__getitem__)
+    order_b = sorted(range(len(b)), key=b.starts.__getitem__)
+    active: List[Tuple[int, int]] = []  # (end, j)
+    links: List[Tuple[int, int, int]] = []
+    k = 0
+    for i in order_a:
+        # 零时长条目按 1ms 处理，使其仍能落入覆盖它的条目
+        s, e = a.starts[i], max(a.ends[i], a.starts[i] + 1)
+        while k < len(order_b) and b.starts[order_b[k]] < e:
+            j = order_b[k]
+            heapq.heappush(active, (max(b.ends[j], b.starts[j] + 1), j))
+            k += 1
+        while active and active[0][0] <= s:
+            heapq.heappop(active)
+        for end_j, j in active:
+            shared = min(e, end_j) - max(s, b.starts[j])
+            if shared > 0 and shared >= min_overlap * min(e - s, end_j - b.starts[j]):
+                links.append((i, j, shared))
+    return links
+
+
+def _duration(cues: CueList, i: int) -> int:
+    return max(cues.ends[i] - cues.starts[i], 1)
+
+
+def align_cues(a: CueList, b: CueList, min_overlap: float = 0.5) -> List[Tuple[List[int], List[int]]]:
+    """Group the cues of two tracks by temporal overlap.
+
+    Groups never chain: every cue belongs to exactly one group, which is
+    either a cue together with the several cues on the other side it covers
+    (a translated cue that merged three source cues, or a source cue the
+    translation split in two), a one-to-one pair, or the cue alone. A cue is
+    covered by the partner sharing the most time with it when that is more
+    than ``min_overlap`` of its own duration. Remaining cues are paired
+    greedily by shared time, preferring partners that start together, so
+    rolling captions that each overlap the next still pair up one by one.
+    Returns ``(positions in a, positions in b)`` per group, in time order.
+    """
+    links = _overlap_links(a, b, min_overlap)
+
+    def closeness(i: int, j: int) -> int:
+        return abs(a.starts[i] - b.starts[j])
+
+    # 每条字幕被哪条对侧字幕覆盖：共享时长最多者，平局取起点最接近的
+    cover_a = {}  # i -> (key, j)
+    cover_b = {}  # j -> (key, i)
+    for i, j, shared in links:
+        key = (shared, -closeness(i, j))
+        if shared > min_overlap * _duration(a, i) and (i not in cover_a or key > cover_a[i][0]):
+            cover_a[i] = (key, j)
+        if shared > min_overlap * _duration(b, j) and (j not in cover_b or key > cover_b[j][0]):
+            cover_b[j] = (key, i)
+
+    leaves_of_b: dict = {}  # j -> 被 j 覆盖的 a 条目
+    leaves_of_a: dict = {}  # i -> 被 i 覆盖的 b 条目
+    for i, (_, j) in cover_a.items():
+        leaves_of_b.setdefault(j, []).append(i)
+    for j, (_, i) in cover_b.items():
+        leaves_of_a.setdefault(i, []).append(j)
+
+    used_a, used_b = set(), set()
+    groups: List[Tuple[List[int], List[int]]] = []
+    # 一对多：先处理覆盖条目多的
+    hubs = [(len(v), 1, j, v) for j, v in leaves_of_b.items() if len(v) >= 2]
+    hubs += [(len(v), 0, i, v) for i, v in leaves_of_a.items() if len(v) >= 2]
+    for _, side, hub, leaves in sorted(hubs, key=lambda h: -h[0]):
+        if side == 1:
+            free = [i for i in leaves if i not in used_a]
+            if hub in used_b or len(free) < 2:
+                continue
+            used_b.add(hub)
+            used_a.update(free)
+            groups.append((free, [hub]))
+        else:
+            free = [j for j in leaves if j not in used_b]
+            if hub in used_a or len(free) < 2:
+                continue
+            used_a.add(hub)
+            used_b.update(free)
+            groups.append(([hub], free))
+
+    # 一对一：按共享时长贪心配对
+    for i, j, _ in sorted(links, key=lambda l: (-l[2], closeness(l[0], l[1]), a.starts[l[0]], b.starts[l[1]])):
+        if i not in used_a and j not in used_b:
+            used_a.add(i)
+            used_b.add(j)
+            groups.append(([i], [j]))
+
+    groups += [([i], []) for i in range(len(a)) if i not in used_a]
+    groups += [([], [j]) for j in range(len(b)) if j not in used_b]
+
+    def group_start(g: Tuple[List[int], List[int]]) -> int:
+        return min([a.starts[i] for i in g[0]] + [b.starts[j] for j in g[1]])
+
+    out = []
+    for ga, gb in sorted(groups, key=group_start):
+        ga.sort(key=a.starts.__getitem__)
+        gb.sort(key=b.starts.__getitem__)
+        out.append((ga, gb))
+    return out
+
+
+def _strip_echo(translation: str, source: str) -> str:
+    # 模型偶尔会把原文抄在译文开头
+    if translation and source and translation.startswith(source[:50]):
+        translation = re.sub(r"^[.,\s]+", "", translation[len(source):].strip())
+    return translation
+
+
+def build_bilingual(source: CueList, translation: CueList, min_overlap: float = 0.5, translation_first: bool = True) -> CueList:
+    """Merge a source track and its translation into bilingual cues aligned by time.
+
+    Each overlap group becomes one cue spanning all of its members, with the
+    translation and source texts on separate lines. Cue ends are clipped so
+    neighbouring groups never overlap.
+    """
+    out = CueList()
+    for ga, gb in align_cues(source, translation, min_overlap):
+        src_text = " ".join(source.texts[i] for i in ga if source.texts[i])
+        tr_text = _strip_echo(" ".join(translation.texts[j] for j in gb if translation.texts[j]), src_text)
+        start = min([source.starts[i] for i in ga] + [translation.starts[j] for j in gb])
+        end = max([source.ends[i] for i in ga] + [translation.ends[j] for j in gb])
+        lines = [tr_text, src_text] if translation_first else [src_text, tr_text]
+        if out and out.ends[-1] > start:
+            out.ends[-1] = max(out.starts[-1], start)
+        out.add(start, end, "\n".join(t for t in lines if t))
+    return out
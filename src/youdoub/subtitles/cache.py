@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from ..utils.hash import sha256_hex
+from ..utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so formatting-only differences share a cache entry."""
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def cache_key(model: str, target_lang: str, prompt: str, text: str) -> str:
+    # 用不可见分隔符拼接，避免字段边界产生歧义
+    return sha256_hex("\x1f".join([model, target_lang, prompt, normalize_text(text)]))
+
+
+class TranslationCache:
+    """Content-addressed translation cache backed by an append-only JSONL file.
+
+    The whole file is read once into an in-memory index; new translations are
+    appended (and flushed) immediately, so a crashed run keeps everything it paid for.
+    Later lines win when a key appears more than once.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._index: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        with self.path.open("r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rec = json.loads(line)
+                    self._index[rec["key"]] = rec["translation"]
+                except (ValueError, KeyError, TypeError):
+                    # 崩溃时可能留下半行，跳过即可
+                    continue
+        logger.info(f"加载翻译缓存: {len(self._index)} 条 ({self.path})")
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._index.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, key: str, text: str, translation: str) -> None:
+        with self._lock:
+            if self._index.get(key) == translation:
+                return
+            self._index[key] = translation
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "text": text, "translation": translation}, ensure_ascii=False) + "\n")
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import typer
+from rich.console import Console
+
+from ..paths import ensure_workdir
+from .bilingual import build_bilingual
+from . import timeline
+from .srt import parse_srt, write_srt
+
+app = typer.Typer(no_args_is_help=True)
+console = Console()
+
+
+@app.command("bilingual")
+def bilingual(
+    video_id: str = typer.Option(..., "--video-id", "-v", help="视频 ID"),
+    workdir: Path = typer.Option(Path(os.getenv("YOUDOUB_WORKDIR", "./work")), "--workdir", "-w", help="工作目录"),
+    lang: str = typer.Option("zh-CN", "--lang", "-l", help="译文语言代码，对应 work/subs/asr.<lang>.srt"),
+    source: str = typer.Option(None, "--source", "-i", help="原文 SRT（默认 work/subs/asr.en.srt）"),
+    translated: str = typer.Option(None, "--translated", "-t", help="译文 SRT（默认 work/subs/asr.<lang>.srt）"),
+    min_overlap: float = typer.Option(0.5, "--min-overlap", min=0.0, max=1.0, help="两条字幕重叠时长占较短一条的比例达到该值才视为对应"),
+    source_first: bool = typer.Option(False, "--source-first", help="原文在上、译文在下（默认译文在上）"),
+    force: bool = typer.Option(False, "--force", help="强制覆盖已存在的输出文件"),
+):
+    """按时间重叠对齐原文和译文，生成双语字幕 work/<VIDEO_ID>/out/bilingual.srt。"""
+    wp = ensure_workdir(workdir / video_id)
+    source_path = Path(source) if source else wp.subs_dir / "asr.en.srt"
+    translated_path = Path(translated) if translated else wp.subs_dir / f"asr.{lang}.srt"
+    for path in (source_path, translated_path):
+        if not path.exists():
+            console.print(f"[red]错误[/red] 未找到字幕: {path}")
+            raise typer.Exit(1)
+
+    out_path = wp.out_bilingual
+    if out_path.exists() and not force:
+        console.print(f"[green]完成[/green] 双语字幕已存在: {out_path}")
+        return
+
+    source_cues = parse_srt(source_path)
+    translated_cues = parse_srt(translated_path)
+    console.print(f"原文: {source_path} ({len(source_cues)} 条)")
+    console.print(f"译文: {translated_path} ({len(translated_cues)} 条)")
+
+    cues = build_bilingual(source_cues, translated_cues, min_overlap=min_overlap, translation_first=not source_first)
+    write_srt(out_path, cues)
+    console.print(f"[green]完成[/green] 双语字幕: {out_path} ({len(cues)} 条)")
+
+
+@app.command("retime")
+def retime(
+    video_id: str = typer.Option(..., "--video-id", "-v", help="视频 ID"),
+    workdir: Path = typer.Option(Path(os.getenv("YOUDOUB_WORKDIR", "./work")), "--workdir", "-w", help="工作目录"),
+    input_file: str = typer.Option(None, "--input", "-i", help="输入 SRT（默认 work/subs/asr.en.srt）"),
+    output_file: str = typer.Option(None, "--output", "-o", help="输出 SRT（默认覆盖输入文件）"),
+    offset: int = typer.Option(0, "--offset", help="整体平移（毫秒，可为负）"),
+    fps_from: float = typer.Option(None, "--fps-from", help="帧率换算：字幕原本对应的帧率"),
+    fps_to: float = typer.Option(None, "--fps-to", help="帧率换算：目标视频的帧率"),
+    min_duration: int = typer.Option(0, "--min-duration", help="合并连续的短于该时长（毫秒）的条目"),
+    max_chars: int = typer.Option(0, "--max-chars", help="拆分超过该字符数的条目，按字数分配时间"),
+    max_cps: float = typer.Option(0.0, "--max-cps", help="阅读速度上限（字符/秒），超出时向后延长显示时间"),
+    min_gap: int = typer.Option(0, "--min-gap", help="相邻条目之间至少保留的间隔（毫秒）"),
+    close_gaps: int = typer.Option(0, "--close-gaps", help="闭合短于该值（毫秒）的间隔，避免字幕闪烁"),
+):
+    """批量调整字幕时间轴：平移、帧率换算、合并短条目、拆分长条目、阅读速度和重叠修复。
+
+    各步骤按上面的顺序执行，最后总会排序并修复重叠。
+    """
+    wp = ensure_workdir(workdir / video_id)
+    in_path = Path(input_file) if input_file else wp.subs_dir / "asr.en.srt"
+    if not in_path.exists():
+        console.print(f"[red]错误[/red] 未找到字幕: {in_path}")
+        raise typer.Exit(1)
+    if (fps_from is None) != (fps_to is None):
+        console.print("[red]错误[/red] --fps-from 和 --fps-to 需要同时指定")
+        raise typer.Exit(1)
+    out_path = Path(output_file) if output_file else in_path
+
+    cues = parse_srt(in_path)
+    original = len(cues)
+    if offset:
+        cues = timeline.shift(cues, offset)
+    if fps_from and fps_to:
+        cues = timeline.rescale(cues, fps_from / fps_to)
+    if min_duration > 0:
+        cues = timeline.merge_short(cues, min_duration)
+    if max_chars > 0:
+        cues = timeline.split_long(cues, max_chars)
+    cues = timeline.fix_overlaps(cues, min_gap_ms=min_gap, close_gaps_ms=close_gaps)
+    if max_cps > 0:
+        cues = timeline.enforce_cps(cues, max_cps, min_gap_ms=min_gap)
+
+    # 先写临时文件再替换，覆盖输入时也不会留下半截文件
+    tmp = out_path.with_name(out_path.name + ".part")
+    write_srt(tmp, cues)
+    tmp.replace(out_path)
+    console.print(f"[green]完成[/green] 时间轴已调整: {out_path} ({original} -> {len(cues)} 条)")
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+from typing import Dict, List
+
+from ..utils.hash import sha256_hex
+from ..utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def run_fingerprint(*parts: str) -> str:
+    """Identify a translation run by its input and settings."""
+    return sha256_hex("\x1f".join(parts))[:16]
+
+
+class TranslationJournal:
+    """Append-only checkpoint of finished batches for one translation run.
+
+    Each line records the entry positions of a finished batch and their
+    translations, so an interrupted run can pick up at the first unfinished
+    batch. The file name carries the run fingerprint, so a changed input,
+    language, model or prompt never resumes from a stale journal.
+    """
+
+    def __init__(self, cache_dir: Path, fingerprint: str):
+        self.path = cache_dir / f"translate.{fingerprint}.journal.jsonl"
+        self.done: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        with self.path.open("r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                    self.done.update(zip(rec["positions"], rec["texts"]))
+                except (ValueError, KeyError, TypeError):
+                    continue
+
+    def record(self, positions: List[int], texts: List[str]) -> None:
+        with self._lock:
+            self.done.update(zip(positions, texts))
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps({"positions": positions, "texts": texts}, ensure_ascii=False) + "\n")
+
+    def clear(self) -> None:
+        self.done.clear()
+        self.path.unlink(missing_ok=True)
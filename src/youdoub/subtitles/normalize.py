@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from typing import List, Tuple
+
+from .srt import CueList
+
+# 与上一条比较时最多回看的词数
+_TAIL_WORDS = 64
+
+
+def _words(text: str) -> List[str]:
+    return text.split()
+
+
+def _overlap(tail: List[str], words: List[str]) -> int:
+    """Length of the longest suffix of ``tail`` that is a prefix of ``words``."""
+    tail_l = [w.lower() for w in tail]
+    words_l = [w.lower() for w in words]
+    for k in range(min(len(tail_l), len(words_l)), 0, -1):
+        if tail_l[-k:] == words_l[:k]:
+            return k
+    return 0
+
+
+def looks_like_rolling(entries: CueList, threshold: float = 0.5) -> bool:
+    """Detect YouTube-style rolling captions, where each cue repeats the end of the previous one."""
+    if len(entries) < 4:
+        return False
+    rolling = 0
+    for prev, cur in zip(entries.texts, entries.texts[1:]):
+        prev_words = _words(prev)
+        cur_words = _words(cur)
+        if not prev_words or not cur_words:
+            continue
+        k = _overlap(prev_words[-_TAIL_WORDS:], cur_words)
+        if k >= min(3, len(cur_words)):
+            rolling += 1
+    return rolling / (len(entries) - 1) >= threshold
+
+
+def dedupe_rolling_captions(entries: CueList) -> Tuple[CueList, int]:
+    """Collapse rolling captions into non-overlapping cues that carry only new words.
+
+    Words a cue repeats from the text already emitted are dropped; a cue with
+    nothing new extends the previous cue instead. Overlapping timings are clipped
+    so every cue ends where the next one starts. Returns the cleaned entries
+    and the number of characters saved.
+    """
+    before = sum(len(t) for t in entries.texts)
+    out = CueList()
+    tail: List[str] = []
+
+    for start, end, text in zip(entries.starts, entries.ends, entries.texts):
+        words = _words(text)
+        new_words = words[_overlap(tail, words):]
+        tail = (tail + new_words)[-_TAIL_WORDS:]
+
+        if not new_words:
+            # 纯重复条目：并入上一条
+            if out:
+                out.ends[-1] = max(out.ends[-1], end)
+            continue
+
+        if out and out.ends[-1] > start:
+            out.ends[-1] = max(out.starts[-1], start)
+        out.add(start, max(start, end), " ".join(new_words))
+
+    after = sum(len(t) for t in out.texts)
+    return out, before - after
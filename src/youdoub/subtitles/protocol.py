@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, Iterable, Iterator, Sequence, Tuple
+
+# 条目内换行在线路格式中的占位符
+LINE_BREAK = "<br>"
+
+# 追加在提示词之后的格式约定
+FORMAT_RULES = """
+
+输入每行格式为 `编号|原文`，请逐行翻译，输出每行格式为 `编号|译文`：
+- 编号与输入一一对应，不要合并、拆分、遗漏或新增行。
+- `<br>` 表示条目内换行，请在译文中原样保留。
+- 只输出译文行，不要添加解释、注释或代码块标记。"""
+
+_LINE_RE = re.compile(r"^\s*\[?(\d+)\]?\s*[|｜]\s?(.*)$")
+
+
+def with_format_rules(prompt_template: str) -> str:
+    """Append the `id|text` format rules to a prompt template."""
+    return prompt_template.rstrip() + FORMAT_RULES
+
+
+def encode_items(items: Iterable[Tuple[int, str]]) -> str:
+    """Render ``(id, text)`` pairs as one ``id|text`` line each."""
+    lines = []
+    for item_id, text in items:
+        body = LINE_BREAK.join(ln.strip() for ln in text.strip().splitlines())
+        lines.append(f"{item_id}|{body}")
+    return "\n".join(lines)
+
+
+def decode_line(line: str) -> Tuple[int, str] | None:
+    """Parse one ``id|text`` line; returns None for anything else."""
+    m = _LINE_RE.match(line)
+    if m is None:
+        return None
+    text = m.group(2).strip()
+    text = "\n".join(part.strip() for part in text.split(LINE_BREAK))
+    return int(m.group(1)), text
+
+
+def _iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+    buf = ""
+    for chunk in chunks:
+        buf += chunk
+        *lines, buf = buf.split("\n")
+        yield from lines
+    if buf:
+        yield buf
+
+
+def iter_items(chunks: Iterable[str], expected_ids: Sequence[int]) -> Iterator[Tuple[int, str]]:
+    """Incrementally parse an ``id|text`` response arriving in arbitrary chunks.
+
+    Only ids that were asked for are yielded, and the first occurrence of an id wins.
+    Lines without an id are treated as a wrapped continuation of the previous
+    line, so an item is yielded once the next id line (or the end) arrives.
+    Empty translations are skipped and count as missing.
+    """
+    wanted = set(expected_ids)
+    seen = set()
+    cur: Tuple[int, str] | None = None
+    for line in _iter_lines(chunks):
+        stripped = line.strip()
+        if not stripped or stripped.startswith("```"):
+            continue
+        parsed = decode_line(line)
+        if parsed is None:
+            if cur is not None:
+                cur = (cur[0], (cur[1] + " " + stripped).strip())
+            continue
+        if cur is not None and cur[1]:
+            yield cur
+        cur = None
+        item_id, body = parsed
+        if item_id in wanted and item_id not in seen:
+            seen.add(item_id)
+            cur = (item_id, body)
+    if cur is not None and cur[1]:
+        yield cur
+
+
+def decode_items(text: str, expected_ids: Sequence[int]) -> Dict[int, str]:
+    """Parse a complete ``id|text`` response; see :func:`iter_items`."""
+    return dict(iter_items([text], expected_ids))
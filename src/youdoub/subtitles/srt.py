@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import re
+from array import array
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+# 时间戳：HH:MM:SS,mmm；容忍小数点分隔、省略小时和不足三位的毫秒
+_TS_RE = re.compile(r"(?:(\d+):)?(\d{1,2}):(\d{1,2})[,.](\d{1,3})")
+
+
+def parse_timestamp(ts: str) -> int:
+    """Parse an SRT timestamp into integer milliseconds."""
+    m = _TS_RE.fullmatch(ts.strip())
+    if m is None:
+        raise ValueError(f"Invalid SRT timestamp: {ts!r}")
+    hours, minutes, seconds, frac = m.groups()
+    return ((int(hours or 0) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(frac.ljust(3, "0"))
+
+
+def format_timestamp(ms: int) -> str:
+    """Format integer milliseconds as ``HH:MM:SS,mmm``."""
+    hours, ms = divmod(max(0, int(ms)), 3_600_000)
+    minutes, ms = divmod(ms, 60_000)
+    seconds, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{ms:03d}"
+
+
+class Cue:
+    """One subtitle cue; times are integer milliseconds.
+
+    Cue numbers are not stored: they are always the 1-based position at write time.
+    """
+
+    __slots__ = ("start", "end", "text")
+
+    def __init__(self, start: int, end: int, text: str = ""):
+        self.start = start
+        self.end = end
+        self.text = text
+
+    @property
+    def duration(self) -> int:
+        return self.end - self.start
+
+    def with_text(self, text: str) -> "Cue":
+        return Cue(self.start, self.end, text)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Cue):
+            return NotImplemented
+        return (self.start, self.end, self.text) == (other.start, other.end, other.text)
+
+    def __repr__(self) -> str:
+        return f"Cue({format_timestamp(self.start)} --> {format_timestamp(self.end)}, {self.text!r})"
+
+
+class CueList:
+    """Column-wise cue storage: start/end times in ``array('q')``, texts in a list.
+
+    Keeps a long ASR transcript at a few dozen bytes per cue plus its text,
+    instead of a dict and two timestamp strings each. Indexing and iteration
+    hand out :class:`Cue` objects; slicing returns a new ``CueList``.
+    """
+
+    __slots__ = ("starts", "ends", "texts")
+
+    def __init__(self, cues: Iterable[Cue] = ()):
+        self.starts = array("q")
+        self.ends = array("q")
+        self.texts: List[str] = []
+        self.extend(cues)
+
+    @classmethod
+    def from_columns(cls, starts: Iterable[int], ends: Iterable[int], texts: Iterable[str]) -> "CueList":
+        out = cls()
+        out.starts = array("q", starts)
+        out.ends = array("q", ends)
+        out.texts = list(texts)
+        if not len(out.starts) == len(out.ends) == len(out.texts):
+            raise ValueError("starts, ends and texts must have the same length")
+        return out
+
+    def add(self, start: int, end: int, text: str) -> None:
+        self.starts.append(start)
+        self.ends.append(end)
+        self.texts.append(text)
+
+    def append(self, cue: Cue) -> None:
+        self.add(cue.start, cue.end, cue.text)
+
+    def extend(self, cues: Iterable[Cue]) -> None:
+        for cue in cues:
+            self.add(cue.start, cue.end, cue.text)
+
+    def with_texts(self, texts: Sequence[str]) -> "CueList":
+        """Same timings with new texts (e.g. the translation)."""
+        if len(texts) != len(self.texts):
+            raise ValueError(f"Expected {len(self.texts)} texts, got {len(texts)}")
+        return CueList.from_columns(self.starts, self.ends, texts)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __iter__(self) -> Iterator[Cue]:
+        return map(Cue, self.starts, self.ends, self.texts)
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[Cue, "CueList"]:
+        if isinstance(i, slice):
+            return CueList.from_columns(self.starts[i], self.ends[i], self.texts[i])
+        return Cue(self.starts[i], self.ends[i], self.texts[i])
+
+    def __setitem__(self, i: int, cue: Cue) -> None:
+        self.starts[i] = cue.start
+        self.ends[i] = cue.end
+        self.texts[i] = cue.text
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CueList):
+            return NotImplemented
+        return self.starts == other.starts and self.ends == other.ends and self.texts == other.texts
+
+    def __repr__(self) -> str:
+        return f"CueList({len(self)} cues)"
+
+
+def parse_timing_line(line: str) -> Optional[Tuple[int, int]]:
+    """Parse ``start --> end [settings]`` into milliseconds; None if it is not a timing line."""
+    left, sep, right = line.partition("-->")
+    if not sep:
+        return None
+    right = right.split()
+    if not right:
+        return None
+    try:
+        # 时间后可能跟有位置等设置，只取第一个字段
+        return parse_timestamp(left), parse_timestamp(right[0])
+    except ValueError:
+        return None
+
+
+def _parse_lines(lines: Iterable[str]) -> Iterator[Cue]:
+    """Parse SRT lines into cues, one at a time.
+
+    A cue starts at its timing line and runs to the next blank line; the
+    number line before it is optional. A timing line inside a cue body also
+    starts a new cue (files with the blank separator missing, or several files
+    concatenated), taking the number line before it along. BOMs anywhere and
+    whitespace-only lines are tolerated. Blocks without a valid timing line
+    are skipped.
+    """
+    timing: Optional[Tuple[int, int]] = None
+    body: List[str] = []
+    for line in lines:
+        line = line.replace("\ufeff", "").rstrip()
+        if timing is None:
+            timing = parse_timing_line(line)
+            body = []
+            continue
+        if not line:
+            yield Cue(timing[0], timing[1], "\n".join(body).strip())
+            timing = None
+            continue
+        nxt = parse_timing_line(line) if "-->" in line else None
+        if nxt is not None:
+            if body and body[-1].strip().isdigit():
+                body.pop()
+            yield Cue(timing[0], timing[1], "\n".join(body).strip())
+            timing = nxt
+            body = []
+            continue
+        body.append(line)
+    if timing is not None:
+        yield Cue(timing[0], timing[1], "\n".join(body).strip())
+
+
+def iter_cues(path: Path) -> Iterator[Cue]:
+    """Stream cues from an SRT file without loading it whole.
+
+    The file is read line by line with universal newlines, so CRLF and CR
+    line endings parse the same as LF.
+    """
+    with path.open("r", encoding="utf-8", errors="ignore") as f:
+        yield from _parse_lines(f)
+
+
+def parse_srt_text(text: str) -> CueList:
+    return CueList(_parse_lines(text.splitlines()))
+
+
+def parse_srt(path: Path) -> CueList:
+    """Parse an SRT file into a :class:`CueList`."""
+    return CueList(iter_cues(path))
+
+
+def format_cue(number: int, cue: Cue) -> str:
+    return f"{number}\n{format_timestamp(cue.start)} --> {format_timestamp(cue.end)}\n{cue.text}\n"
+
+
+def format_srt(cues: Iterable[Cue]) -> str:
+    """Render cues as SRT text, numbered from 1."""
+    return "\n".join(format_cue(n, cue) for n, cue in enumerate(cues, 1))
+
+
+class CueWriter:
+    """Write cues to an SRT file one at a time, numbering them as they go.
+
+    With ``flush=True`` every cue is flushed as soon as it is written, so a
+    crashed run leaves a valid partial file. ``first_number`` continues the
+    numbering when appending to an existing file.
+    """
+
+    def __init__(self, path: Path, append: bool = False, first_number: int = 1, flush: bool = False):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.number = first_number
+        self._first_number = first_number
+        self._flush = flush
+        self._f = path.open("a" if append else "w", encoding="utf-8")
+
+    def write(self, cue: Cue) -> None:
+        self._f.write(format_cue(self.number, cue) + "\n")
+        self.number += 1
+        if self._flush:
+            self._f.flush()
+
+    def write_all(self, cues: Iterable[Cue]) -> None:
+        for cue in cues:
+            self.write(cue)
+
+    @property
+    def count(self) -> int:
+        """Cues written by this writer."""
+        return self.number - self._first_number
+
+    def close(self) -> None:
+        self._f.close()
+
+    def __enter__(self) -> "CueWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def write_srt(path: Path, cues: Iterable[Cue]) -> None:
+    with CueWriter(path) as w:
+        w.write_all(cues)
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import re
+from itertools import chain
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from .srt import CueList
+
+# 适合断开的位置：句末或子句标点之后
+_BREAK_AFTER = re.compile(r"[.!?;,:。！？；，、：]$")
+
+
+def columns(cues: CueList) -> Tuple[np.ndarray, np.ndarray]:
+    """Read-only int64 views of the start/end columns (no copy)."""
+    if not len(cues):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.frombuffer(cues.starts, dtype=np.int64), np.frombuffer(cues.ends, dtype=np.int64)
+
+
+def from_columns(starts: np.ndarray, ends: np.ndarray, texts: Sequence[str]) -> CueList:
+    out = CueList()
+    out.starts.frombytes(np.ascontiguousarray(starts, dtype=np.int64).tobytes())
+    out.ends.frombytes(np.ascontiguousarray(ends, dtype=np.int64).tobytes())
+    out.texts = list(texts)
+    return out
+
+
+def merge_short(cues: CueList, min_duration_ms: int) -> CueList:
+    """Merge each run of consecutive cues shorter than ``min_duration_ms`` into one cue.
+
+    Cues that are long enough are kept as they are; a run of short cues
+    becomes one cue from the first start to the last end.
+    """
+    n = len(cues)
+    if n == 0:
+        return CueList()
+    starts, ends = columns(cues)
+    short = (ends - starts) < min_duration_ms
+    begin = np.ones(n, dtype=bool)
+    begin[1:] = ~(short[1:] & short[:-1])
+    first = np.flatnonzero(begin)
+    last = np.append(first[1:], n) - 1
+    texts = cues.texts
+    merged = [texts[a] if a == b else " ".join(texts[a:b + 1]) for a, b in zip(first.tolist(), last.tolist())]
+    return from_columns(starts[first], ends[last], merged)
+
+
+def _split_text(text: str, max_chars: int) -> List[str]:
+    """Greedy split at word boundaries, preferring a break after punctuation."""
+    if len(text) <= max_chars:
+        return [text]
+    # 无空格的文字（中日韩）按字符切分
+    tokens: List[str] = []
+    for word in text.split():
+        tokens.extend(word[i:i + max_chars] for i in range(0, len(word), max_chars))
+    joiner = " " if " " in text.strip() else ""
+    pieces: List[str] = []
+    cur = ""
+    for tok in tokens:
+        cand = cur + joiner + tok if cur else tok
+        if cur and len(cand) > max_chars:
+            pieces.append(cur)
+            cur = tok
+        else:
+            cur = cand
+        if len(cur) >= max_chars // 2 and _BREAK_AFTER.search(cur):
+            pieces.append(cur)
+            cur = ""
+    if cur:
+        pieces.append(cur)
+    return pieces
+
+
+def split_long(cues: CueList, max_chars: int) -> CueList:
+    """Split cues whose text is longer than ``max_chars``.
+
+    Each piece gets a share of the cue's time proportional to its length,
+    so the reading speed (characters per second) stays even across pieces.
+    """
+    n = len(cues)
+    if n == 0:
+        return CueList()
+    pieces = [_split_text(t, max_chars) for t in cues.texts]
+    counts = np.fromiter(map(len, pieces), dtype=np.int64, count=n)
+    if (counts == 1).all():
+        return cues[:]
+    flat = list(chain.from_iterable(pieces))
+    lens = np.fromiter((max(1, len(p)) for p in flat), dtype=np.int64, count=len(flat))
+    parent = np.repeat(np.arange(n), counts)
+    offsets = np.cumsum(counts) - counts
+    totals = np.add.reduceat(lens, offsets)
+    csum = np.cumsum(lens)
+    before = csum - lens - (csum[offsets] - lens[offsets])[parent]
+    starts, ends = columns(cues)
+    dur = (ends - starts)[parent]
+    base = starts[parent]
+    return from_columns(base + before * dur // totals[parent], base + (before + lens) * dur // totals[parent], flat)
+
+
+def enforce_cps(cues: CueList, max_cps: float, min_gap_ms: int = 0) -> CueList:
+    """Extend cues that read faster than ``max_cps`` into the gap before the next cue.
+
+    A cue is never shortened and never runs into the next cue (minus
+    ``min_gap_ms``). Assumes cues are in time order.
+    """
+    n = len(cues)
+    if n == 0:
+        return CueList()
+    starts, ends = columns(cues)
+    chars = np.fromiter(map(len, cues.texts), dtype=np.int64, count=n)
+    need = np.ceil(chars * 1000.0 / max_cps).astype(np.int64)
+    limit = np.append(starts[1:] - min_gap_ms, np.iinfo(np.int64).max)
+    new_ends = np.maximum(ends, np.minimum(starts + need, limit))
+    return from_columns(starts, new_ends, cues.texts)
+
+
+def shift(cues: CueList, offset_ms: int) -> CueList:
+    """Move every cue by ``offset_ms``; cues pushed entirely before 0 are dropped."""
+    starts, ends = columns(cues)
+    starts = starts + offset_ms
+    ends = ends + offset_ms
+    keep = ends > 0
+    texts = cues.texts if keep.all() else [t for t, k in zip(cues.texts, keep.tolist()) if k]
+    return from_columns(np.maximum(starts[keep], 0), ends[keep], texts)
+
+
+def rescale(cues: CueList, factor: float) -> CueList:
+    """Multiply all times by ``factor``.
+
+    For a frame-rate conversion pass ``from_fps / to_fps``, e.g. 25 / 23.976
+    for a PAL-speedup subtitle on the original film.
+    """
+    starts, ends = columns(cues)
+    return from_columns(np.rint(starts * factor), np.rint(ends * factor), cues.texts)
+
+
+def fix_overlaps(cues: CueList, min_gap_ms: int = 0, close_gaps_ms: int = 0) -> CueList:
+    """Sort cues and repair the timeline.
+
+    Overlapping cues are trimmed to end ``min_gap_ms`` before the next one
+    starts, and gaps shorter than ``close_gaps_ms`` are closed the same way
+    so subtitles do not flicker off for a few frames. Ends never move before
+    their start.
+    """
+    n = len(cues)
+    if n == 0:
+        return CueList()
+    starts, ends = columns(cues)
+    order = np.argsort(starts, kind="stable")
+    starts = starts[order]
+    ends = ends[order].copy()
+    texts = cues.texts if (order == np.arange(n)).all() else [cues.texts[i] for i in order.tolist()]
+    target = starts[1:] - min_gap_ms
+    gap = target - ends[:-1]
+    fix = gap < max(close_gaps_ms, 0)
+    ends[:-1][fix] = target[fix]
+    return from_columns(starts, np.maximum(ends, starts), texts)
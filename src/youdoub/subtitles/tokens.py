@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import math
+import re
+from typing import Iterable, Iterator, List, Optional, Protocol, Sequence
+
+from ..utils.logging import get_logger
+from .srt import Cue
+
+logger = get_logger(__name__)
+
+# 中日韩文字、假名、全角标点：大多数 BPE 分词器里约 1 字 1 token
+_CJK_RE = re.compile(r"[\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+# 每个条目在请求/响应里的额外开销（换行、编号等）
+PER_ENTRY_OVERHEAD = 3
+
+
+class Tokenizer(Protocol):
+    def count(self, text: str) -> int: ...
+
+
+class HeuristicTokenizer:
+    """Fast tokenizer-free estimate: ~1 token per CJK char, ~4 chars per token otherwise.
+
+    Deliberately errs on the high side so a batch never overruns its budget.
+    """
+
+    def count(self, text: str) -> int:
+        cjk = len(_CJK_RE.findall(text))
+        return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+class TiktokenTokenizer:
+    """Exact counts for a tiktoken encoding (optional dependency)."""
+
+    def __init__(self, encoding: str = "cl100k_base"):
+        import tiktoken
+
+        self._enc = tiktoken.get_encoding(encoding)
+
+    def count(self, text: str) -> int:
+        return len(self._enc.encode(text, disallowed_special=()))
+
+
+def get_tokenizer(name: Optional[str] = None) -> Tokenizer:
+    """Return a tokenizer by name: ``heuristic`` (default) or a tiktoken encoding name."""
+    if not name or name == "heuristic":
+        return HeuristicTokenizer()
+    try:
+        return TiktokenTokenizer(name)
+    except ImportError:
+        logger.warning(f"未安装 tiktoken，分词器 {name} 回退到启发式估算")
+    except (KeyError, ValueError):
+        logger.warning(f"未知的 tiktoken 编码 {name}，回退到启发式估算")
+    return HeuristicTokenizer()
+
+
+def iter_batches_by_tokens(
+    entries: Iterable[Cue],
+    max_input_tokens: int,
+    max_output_tokens: int,
+    tokenizer: Optional[Tokenizer] = None,
+    output_ratio: float = 1.5,
+    max_items: int = 500,
+    prompt_tokens: int = 0,
+) -> Iterator[List[Cue]]:
+    """Fill batches up to a token budget for both the request and the expected reply.
+
+    The reply is estimated as ``output_ratio`` times the input tokens, which keeps
+    each batch below the model's output limit so responses are never truncated.
+    A single entry larger than the budget still gets a batch of its own.
+    Each batch is yielded as soon as it is full, so ``entries`` may be a live
+    stream.
+    """
+    tokenizer = tokenizer or HeuristicTokenizer()
+    input_budget = max(1, max_input_tokens - prompt_tokens)
+
+    cur: List[Cue] = []
+    cur_in = 0
+    cur_out = 0
+    for e in entries:
+        n = tokenizer.count(e.text) + PER_ENTRY_OVERHEAD
+        n_out = math.ceil(n * output_ratio)
+        if cur and (cur_in + n > input_budget or cur_out + n_out > max_output_tokens):
+            yield cur
+            cur = []
+            cur_in = 0
+            cur_out = 0
+        cur.append(e)
+        cur_in += n
+        cur_out += n_out
+        # 条目数已满时立即交出，不必等下一条到来
+        if len(cur) >= max_items:
+            yield cur
+            cur = []
+            cur_in = 0
+            cur_out = 0
+    if cur:
+        yield cur
+
+
+def batch_entries_by_tokens(
+    entries: Sequence[Cue],
+    max_input_tokens: int,
+    max_output_tokens: int,
+    tokenizer: Optional[Tokenizer] = None,
+    output_ratio: float = 1.5,
+    max_items: int = 500,
+    prompt_tokens: int = 0,
+) -> List[List[Cue]]:
+    """List form of :func:`iter_batches_by_tokens`."""
+    return list(
+        iter_batches_by_tokens(
+            entries,
+            max_input_tokens,
+            max_output_tokens,
+            tokenizer=tokenizer,
+            output_ratio=output_ratio,
+            max_items=max_items,
+            prompt_tokens=prompt_tokens,
+        )
+    )
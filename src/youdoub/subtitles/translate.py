@@ -1,9 +1,15 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import List, Dict, Optional
-import re
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence
 from ..utils.llm_adapters import get_translator
+from .cache import TranslationCache, cache_key
+from .journal import TranslationJournal, run_fingerprint
+from .protocol import decode_items, encode_items, iter_items, with_format_rules
+from .srt import Cue, CueList, CueWriter, iter_cues, parse_srt, write_srt
+from .timeline import merge_short
+from .tokens import batch_entries_by_tokens, get_tokenizer, iter_batches_by_tokens
+from ..utils.hash import sha256_file
 from ..utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -26,55 +32,21 @@ SUBTITLE_PROMPT = """你是一个专业的字幕翻译专家。请将以下英
 
 请直接输出翻译后的字幕内容，保持相同的段落结构。"""
 
-# 专用的 SRT 模式提示词：明确告诉模型输入是完整的 SRT 文件并要求返回有效的 SRT
-SUBTITLE_PROMPT_SRT = """你将收到一个完整的 SRT 字幕文件内容（index, timestamp, text）。
-将字幕文本翻译为【目标语言】，并返回一个有效的 SRT 文件：
-- 保持所有索引和时间戳完全不变。
-- 只替换每个条目的文本行为通顺、自然的译文。
-- 不要添加、删除或重编号条目。
-- 保留原文中的专有名词或英文原词（当适当时）。
-只返回翻译后的 SRT 内容（不要添加解释或注释）。
-
-SRT_INPUT:
-【文本】
-"""
-
-
-def parse_srt(path: Path) -> List[Dict]:
-    text = path.read_text(encoding="utf-8", errors="ignore")
-    parts = [p.strip() for p in text.split("\n\n") if p.strip()]
-    out = []
-    for part in parts:
-        lines = part.splitlines()
-        if len(lines) < 2:
-            continue
-        idx = lines[0].strip()
-        times = lines[1].strip()
-        body = "\n".join(l.rstrip() for l in lines[2:]).strip()
-        if "-->" not in times:
-            continue
-        start, end = [t.strip() for t in times.split("-->")]
-        out.append({"index": idx, "start": start, "end": end, "text": body})
-    return out
-
-
-def write_srt(path: Path, entries: List[Dict]) -> None:
-    parts = []
-    for e in entries:
-        parts.append(str(e["index"]))
-        parts.append(f"{e['start']} --> {e['end']}")
-        parts.append(e["text"])
-        parts.append("")
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text("\n".join(parts), encoding="utf-8")
+def preload_translator(translator) -> None:
+    """Load the backend model once before the first batch; failures only warn."""
+    try:
+        translator.preload()
+    except Exception as e:
+        # 预加载失败不影响翻译，真正的错误会在第一批请求时报告
+        logger.warning(f"模型预加载失败: {e}")
 
 
-def batch_entries(entries: List[Dict], max_chars: int = 1000, max_items: int = 10) -> List[List[Dict]]:
-    batches: List[List[Dict]] = []
-    cur: List[Dict] = []
+def batch_entries(entries: Sequence[Cue], max_chars: int = 1000, max_items: int = 10) -> List[List[Cue]]:
+    batches: List[List[Cue]] = []
+    cur: List[Cue] = []
     cur_chars = 0
     for e in entries:
-        length = len(e.get("text", "")) + 1
+        length = len(e.text) + 1
         if cur and (cur_chars + length > max_chars or len(cur) >= max_items):
             batches.append(cur)
             cur = []
@@ -86,122 +58,276 @@ def batch_entries(entries: List[Dict], max_chars: int = 1000, max_items: int = 1
     return batches
 
 
-def timestamp_to_ms(timestamp: str) -> int:
-    """Convert SRT timestamp to milliseconds"""
-    # Format: "00:00:01,234 --> 00:00:02,567"
-    hours, minutes, seconds = timestamp.split(":")
-    seconds, milliseconds = seconds.split(",")
-    return (int(hours) * 3600 + int(minutes) * 60 + int(seconds)) * 1000 + int(milliseconds)
+def merge_short_entries(entries: CueList, min_duration_ms: int) -> CueList:
+    """Merge runs of cues that are shorter than min_duration_ms (see :func:`timeline.merge_short`)"""
+    return merge_short(entries, min_duration_ms)
 
 
-def ms_to_timestamp(ms: int) -> str:
-    """Convert milliseconds to SRT timestamp format"""
-    hours = ms // 3600000
-    ms %= 3600000
-    minutes = ms // 60000
-    ms %= 60000
-    seconds = ms // 1000
-    milliseconds = ms % 1000
-    return "02d"
-
+def translate_batch(
+    translator,
+    batch: Sequence[Cue],
+    target_lang: str,
+    prompt_template: str,
+    max_repairs: int = 2,
+) -> List[str]:
+    """Translate one batch with the ``id|text`` line protocol.
+
+    Every cue is sent with a batch-local id and the reply is matched back by id.
+    Ids missing from the reply are re-requested on their own (up to
+    ``max_repairs`` times) instead of redoing the whole batch; ids still
+    missing after that keep their source text.
+    """
+    texts = {i: e.text for i, e in enumerate(batch, 1)}
+    # 空条目无需翻译
+    result: Dict[int, str] = {i: "" for i, t in texts.items() if not t.strip()}
+    missing = [i for i in texts if i not in result]
+
+    for attempt in range(max_repairs + 1):
+        if not missing:
+            break
+        request = encode_items((i, texts[i]) for i in missing)
+        translated = translator.translate(request, target_lang, prompt_template)
+        result.update(decode_items(translated or "", missing))
+        missing = [i for i in missing if i not in result]
+        if not missing:
+            break
+        if attempt < max_repairs:
+            logger.warning(f"译文缺少 {len(missing)}/{len(batch)} 条，仅重新请求缺失条目: {missing[:10]}")
+
+    if missing:
+        # 模型对 "[Music]"、"♪" 这类条目可能一直不给译文；保留原文，不让整个任务失败
+        logger.warning(f"重试 {max_repairs} 次后仍缺少 {len(missing)} 条译文，保留原文: {missing[:10]}")
+        result.update((i, texts[i]) for i in missing)
+    return [result[i] for i in range(1, len(batch) + 1)]
+
+
+def run_batches(
+    translator,
+    batches: List[List[Cue]],
+    target_lang: str,
+    prompt_template: str,
+    concurrency: int = 1,
+    on_batch_done: Optional[Callable[[int, List[str]], None]] = None,
+) -> List[List[str]]:
+    """Translate batches through a bounded thread pool.
+
+    Translation time is dominated by waiting on the API, so up to ``concurrency``
+    requests are kept in flight. Results are returned in batch order regardless
+    of completion order; the first failing batch cancels the pending ones.
+    ``on_batch_done(i, parts)`` is called from the calling thread as each batch finishes.
+    """
+    import time
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    total_entries = sum(len(b) for b in batches)
+    results: List[Optional[List[str]]] = [None] * len(batches)
+    latencies: List[float] = []
+    processed = 0
+
+    def work(i: int, batch: List[Cue]):
+        t0 = time.time()
+        batch_chars = sum(len(e.text) for e in batch)
+        logger.info(f"🔄 批次 {i + 1}/{len(batches)} - {len(batch)} 条目 ({batch_chars} 字符)")
+        parts = translate_batch(translator, batch, target_lang, prompt_template)
+        return parts, time.time() - t0
+
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency))
+    try:
+        futures = {executor.submit(work, i, batch): i for i, batch in enumerate(batches)}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            parts, latency = fut.result()
+            results[i] = parts
+            if on_batch_done is not None:
+                on_batch_done(i, parts)
+            latencies.append(latency)
+            processed += len(batches[i])
+            logger.info(f"批次 {i + 1} 完成 - 处理了 {len(batches[i])} 条目 (用时: {latency:.1f}s)")
+            logger.info(f"总进度: {processed}/{total_entries} 条目 ({processed / total_entries * 100:.1f}%)")
+    finally:
+        # 出错时取消尚未开始的批次
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    if latencies:
+        logger.info(
+            f"批次延迟: 最短 {min(latencies):.1f}s, 平均 {sum(latencies) / len(latencies):.1f}s, "
+            f"最长 {max(latencies):.1f}s"
+        )
+    return results
+
+
+def stream_entries(
+    translator,
+    entries: CueList,
+    done: Dict[int, str],
+    part_path: Path,
+    target_lang: str,
+    prompt_template: str,
+    on_translated: Optional[Callable[[int, str], None]] = None,
+    max_repairs: int = 2,
+) -> int:
+    """Stream translations for the entries not in ``done`` and write cues in order.
+
+    Entries are sent as ``id|text`` lines with id = position + 1. Each reply line
+    is matched to its entry, and every cue that is complete in order is
+    appended to ``part_path`` with its original timing and flushed right away, so
+    a dropped connection leaves a valid partial file. Ids still missing once the
+    stream ends are re-requested on their own, and after ``max_repairs`` rounds
+    keep their source text. Returns the number of API calls.
+    """
+    import time
 
-def merge_short_entries(entries: List[Dict], min_duration_ms: int) -> List[Dict]:
-    """Merge entries that are shorter than min_duration_ms"""
-    if not entries:
-        return entries
-
-    merged = []
-    current_group = []
-
-    for entry in entries:
-        start_ms = timestamp_to_ms(entry["start"])
-        end_ms = timestamp_to_ms(entry["end"])
-        duration = end_ms - start_ms
-
-        if duration < min_duration_ms:
-            # 如果当前条目太短，加入到当前组
-            current_group.append(entry)
-        else:
-            # 如果当前条目够长，先处理之前累积的短条目组
-            if current_group:
-                merged.append(merge_entry_group(current_group))
-                current_group = []
-            # 添加当前条目
-            merged.append(entry)
-
-    # 处理最后的短条目组
-    if current_group:
-        merged.append(merge_entry_group(current_group))
-
-    return merged
-
-
-def merge_entry_group(group: List[Dict]) -> Dict:
-    """Merge a group of entries into one"""
-    if not group:
-        return None
-    if len(group) == 1:
-        return group[0]
-
-    # 合并文本
-    texts = [entry["text"] for entry in group]
-    merged_text = " ".join(texts)
-
-    # 使用第一个条目的开始时间和最后一个条目的结束时间
-    start_time = group[0]["start"]
-    end_time = group[-1]["end"]
-    index = group[0]["index"]
-
-    return {
-        "index": index,
-        "start": start_time,
-        "end": end_time,
-        "text": merged_text
-    }
-
-
-def split_translated_text(translated: str, n: int, originals: List[Dict]) -> List[str]:
-    # Try simple newline split first
-    lines = [ln.strip() for ln in translated.splitlines() if ln.strip()]
-    if len(lines) == n:
-        # 移除每行开头的序号
-        cleaned_lines = []
-        for line in lines:
-            cleaned = re.sub(r'^\s*\[?\d+\]\s*', '', line)
-            cleaned = re.sub(r'^\s*\d+\s*[.、)]\s*', '', cleaned)
-            cleaned_lines.append(cleaned.strip())
-        return cleaned_lines
-
-    # Fallback: split by sentence punctuation while preserving approximate lengths
-    # naive sentence split
-    sents = re.split(r'(?<=[。.!?！？])\s*', translated.strip())
-    sents = [s for s in sents if s.strip()]
-    if len(sents) >= n:
-        # group sentences into n buckets by length
-        buckets = [[] for _ in range(n)]
-        lens = [len(o.get("text","")) for o in originals]
-        total = sum(lens) or 1
-        # desired proportion per bucket
-        proportions = [l/total for l in lens]
-        # assign sentences greedily to match proportions
-        idx = 0
-        for sent in sents:
-            buckets[idx].append(sent)
-            # move idx forward sometimes
-            idx = (idx + 1) % n
-        return [" ".join(b) for b in buckets]
-
-    # As last resort, split translated string into n almost-equal chunks by characters
-    translated = translated.strip()
-    L = len(translated)
-    if L == 0:
-        return ["" for _ in range(n)]
-    chunk_size = max(1, L // n)
-    out = [translated[i*chunk_size:(i+1)*chunk_size].strip() for i in range(n)]
-    # append remainder to last
-    if n*chunk_size < L:
-        out[-1] += translated[n*chunk_size:].strip()
-    return out
+    # 空条目无需翻译
+    for pos, text in enumerate(entries.texts):
+        if not text.strip():
+            done.setdefault(pos, "")
+
+    # 重写 .part，只保留已按顺序完成的条目（丢掉中断时残留的半个条目）
+    writer = CueWriter(part_path, flush=True)
+
+    def flush_ready() -> None:
+        while writer.count < len(entries) and writer.count in done:
+            pos = writer.count
+            writer.write(entries[pos].with_text(done[pos]))
+
+    t0 = time.time()
+    api_calls = 0
+    missing = [pos for pos in range(len(entries)) if pos not in done]
+    with writer:
+        flush_ready()
+        for attempt in range(max_repairs + 1):
+            if not missing:
+                break
+            api_calls += 1
+            request = encode_items((pos + 1, entries.texts[pos]) for pos in missing)
+            first = True
+            for item_id, text in iter_items(translator.translate_stream(request, target_lang, prompt_template), [p + 1 for p in missing]):
+                if first:
+                    logger.info(f"首条译文已到达 (用时: {time.time() - t0:.1f}s)")
+                    first = False
+                done[item_id - 1] = text
+                if on_translated is not None:
+                    on_translated(item_id - 1, text)
+                flush_ready()
+            missing = [pos for pos in missing if pos not in done]
+            if missing and attempt < max_repairs:
+                logger.warning(f"译文缺少 {len(missing)} 条，仅重新请求缺失条目")
+        if missing:
+            # 与 translate_batch 相同：最后仍缺少的条目保留原文
+            logger.warning(f"重试 {max_repairs} 次后仍缺少 {len(missing)} 条译文，保留原文: {[p + 1 for p in missing[:10]]}")
+            for pos in missing:
+                done[pos] = entries.texts[pos]
+            flush_ready()
+
+    logger.info(f"流式写入完成: {writer.count} 条目")
+    return api_calls
+
+
+def translate_cue_stream(
+    translator,
+    cues: Iterable[Cue],
+    output_path: Path,
+    target_lang: str,
+    prompt_template: str = DEFAULT_PROMPT,
+    batch_tokens: int = 2000,
+    batch_output_tokens: int = 7000,
+    tokenizer: Optional[str] = None,
+    max_items_per_batch: int = 40,
+    concurrency: int = 1,
+    cache: Optional[TranslationCache] = None,
+) -> Dict[str, int]:
+    """Translate cues while they are still being produced and write them in order.
+
+    Cache hits and empty cues are settled on arrival; the rest are packed by
+    :func:`iter_batches_by_tokens` and every batch is sent as soon as it is
+    full, with at most ``concurrency`` requests in flight. While all slots
+    are busy ``cues`` is not advanced, which holds back a bounded producer.
+    Translated cues are appended to ``<output>.part`` as soon as everything
+    before them is done, and the file is renamed once the stream ends.
+    """
+    import time
+    from collections import deque
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    t0 = time.time()
+    prompt = with_format_rules(prompt_template)
+    tok = get_tokenizer(tokenizer)
+    model = translator.model
+    # 在识别产出第一批之前把模型加载好
+    preload_translator(translator)
+    source: List[Cue] = []
+    done: Dict[int, str] = {}
+    # 已送入分批器、尚未分到批次的条目位置
+    queued: Deque[int] = deque()
+    in_flight: Dict[Any, List[int]] = {}
+    stats = {"cues": 0, "api_calls": 0, "cache_hits": 0}
+
+    part_path = output_path.with_name(output_path.name + ".part")
+    writer = CueWriter(part_path, flush=True)
+
+    def collect(block: bool) -> None:
+        if in_flight:
+            finished, _ = wait(list(in_flight), timeout=None if block else 0, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                positions = in_flight.pop(fut)
+                for pos, tr in zip(positions, fut.result()):
+                    done[pos] = tr
+                    if cache is not None:
+                        cache.put(cache_key(model, target_lang, prompt, source[pos].text), source[pos].text, tr)
+        while writer.count < len(source) and writer.count in done:
+            pos = writer.count
+            writer.write(source[pos].with_text(done[pos]))
+
+    def misses() -> Iterator[Cue]:
+        for cue in cues:
+            pos = len(source)
+            source.append(cue)
+            if not cue.text.strip():
+                done[pos] = ""
+            elif cache is not None:
+                hit = cache.get(cache_key(model, target_lang, prompt, cue.text))
+                if hit is not None:
+                    done[pos] = hit
+                    stats["cache_hits"] += 1
+            if pos not in done:
+                queued.append(pos)
+                yield cue
+            collect(block=False)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency))
+    try:
+        with writer:
+            batches = iter_batches_by_tokens(
+                misses(),
+                max_input_tokens=batch_tokens,
+                max_output_tokens=batch_output_tokens,
+                tokenizer=tok,
+                max_items=max_items_per_batch,
+                prompt_tokens=tok.count(prompt),
+            )
+            for batch in batches:
+                positions = [queued.popleft() for _ in batch]
+                while len(in_flight) >= max(1, concurrency):
+                    collect(block=True)
+                stats["api_calls"] += 1
+                logger.info(f"🔄 批次 {stats['api_calls']} - {len(batch)} 条目 (已收到 {len(source)} 条)")
+                in_flight[executor.submit(translate_batch, translator, batch, target_lang, prompt)] = positions
+            while in_flight:
+                collect(block=True)
+            collect(block=False)
+    finally:
+        # 出错时取消尚未开始的批次
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    if writer.count != len(source):
+        raise RuntimeError(f"翻译条目数与原条目数不匹配: {writer.count} vs {len(source)}")
+    part_path.replace(output_path)
+    stats["cues"] = len(source)
+    logger.info(
+        f"流水线翻译完成: {len(source)} 条目，{stats['api_calls']} 次请求，"
+        f"缓存命中 {stats['cache_hits']}，用时 {time.time() - t0:.1f}s"
+    )
+    return stats
 
 
 def translate_srt_file(
@@ -210,7 +336,7 @@ def translate_srt_file(
     target_lang: str,
     backend: str = "deepseek",
     api_key: Optional[str] = None,
-    model: str = "deepseek-chat",  # DeepSeek 模型名称
+    model: Optional[str] = None,  # 模型名称；None 表示使用后端默认模型（deepseek-chat）
     prompt_template: str = DEFAULT_PROMPT,
     batch_size_chars: int = 30000,  # DeepSeek API limit: ~30K chars for stable processing
     max_items_per_batch: int = 200,  # Limit to 200 entries per batch for API stability
@@ -218,6 +344,20 @@ def translate_srt_file(
     whole_file: bool = False,  # 是否一次性提交整个字幕文件
     merge_timelines: bool = False,  # 是否合并时间轴
     min_duration_ms: int = 1000,  # 最短字幕持续时间（毫秒），用于合并
+    concurrency: int = 1,  # 同时进行的批次请求数
+    cache_path: Optional[Path] = None,  # 翻译缓存 (translation.jsonl)，None 表示不使用缓存
+    journal_dir: Optional[Path] = None,  # 断点日志目录（通常为 WorkPaths.cache_dir），None 表示不记录
+    resume: bool = True,  # 是否从上次未完成的断点继续
+    stream: bool = False,  # 整文件模式下流式接收译文并逐条写入
+    batch_tokens: Optional[int] = 16000,  # 每批输入 token 预算；None 表示按字符数分批
+    batch_output_tokens: int = 7000,  # 每批预计输出 token 上限，需低于模型最大输出长度
+    tokenizer: Optional[str] = None,  # heuristic（默认）或 tiktoken 编码名
+    dedupe_rolling: Optional[bool] = None,  # 去除 YouTube 自动字幕的滚动重复；None 表示自动检测
+    requests_per_sec: Optional[float] = None,  # 后端请求速率上限（次/秒）
+    tokens_per_min: Optional[int] = None,  # 后端 token 速率上限（tokens/分钟）
+    api_url: Optional[str] = None,  # 后端地址；None 表示使用环境变量或后端默认值
+    keep_alive: Optional[str] = None,  # Ollama 模型常驻时长，如 30m，-1 表示不卸载
+    num_ctx: Optional[int] = None,  # Ollama 上下文长度，需容纳一批的输入和输出
 ):
     import time
     start_time = time.time()
@@ -227,6 +367,17 @@ def translate_srt_file(
     if not entries:
         raise RuntimeError("No SRT entries parsed")
 
+    # YouTube 自动字幕是"滚动"的，每条都重复上一条的大部分文字
+    from .normalize import dedupe_rolling_captions, looks_like_rolling
+    if dedupe_rolling is None:
+        dedupe_rolling = looks_like_rolling(entries)
+        if dedupe_rolling:
+            logger.info("检测到滚动式自动字幕，启用去重")
+    if dedupe_rolling:
+        original_count = len(entries)
+        entries, saved_chars = dedupe_rolling_captions(entries)
+        logger.info(f"滚动字幕去重: {original_count} -> {len(entries)} 条目，节省 {saved_chars} 字符")
+
     # 如果需要合并时间轴，先进行合并
     if merge_timelines:
         logger.info("合并短时间轴...")
@@ -236,99 +387,147 @@ def translate_srt_file(
     logger.info(f"总字幕条目: {len(entries)}")
     logger.info(f"初始化翻译器: {backend}")
 
-    translator = get_translator(name=backend, api_key=api_key, verify_ssl=verify_ssl, model=model)
-
-    # 如果选择一次性提交整个文件
+    translator = get_translator(
+        name=backend,
+        api_key=api_key,
+        api_url=api_url,
+        verify_ssl=verify_ssl,
+        model=model,
+        requests_per_sec=requests_per_sec,
+        tokens_per_min=tokens_per_min,
+        max_concurrency=concurrency,
+        keep_alive=keep_alive,
+        num_ctx=num_ctx,
+    )
+    model = translator.model
+    cache = TranslationCache(cache_path) if cache_path is not None else None
+
+    # 两种模式都用紧凑的 `编号|文本` 线路格式，时间轴在本地按编号重新挂回
     if whole_file:
-        logger.info("一次性提交整个字幕文件进行翻译 (原始 SRT 上下文)")
-        # 使用 SRT 专用提示词，明确告诉模型输入是一个完整 SRT 文件并要求返回有效 SRT
-        subtitle_prompt = SUBTITLE_PROMPT_SRT if prompt_template == DEFAULT_PROMPT else prompt_template
-
-        # 读取原始 srt 文件文本（保持原样，不添加序号）
-        full_text = input_path.read_text(encoding="utf-8", errors="ignore")
-        logger.info(f"字幕总字符数: {len(full_text)}")
-
-        # 一次性翻译
-        logger.info("调用翻译 API...")
-        translated_full = translator.translate(full_text, target_lang, subtitle_prompt)
-
-        # 简单校验：检查是否像 SRT（包含时间轴标记和数字索引）
-        # looks_like_srt = ("-->" in translated_full) and (re.search(r'^\\s*\\d+\\s*$', translated_full, flags=re.M) is not None)
-        looks_like_srt = True
-        if looks_like_srt:
-            logger.info("AI 返回看起来像 SRT，直接写入输出文件")
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            output_path.write_text(translated_full.strip() + "\n", encoding="utf-8")
-            total_time = time.time() - start_time
-            logger.info(f"翻译完成！总用时: {total_time:.1f}s")
-            logger.info(f"平均速度: {len(entries)/total_time:.1f} 条目/秒")
-            logger.info(f"API 调用次数: 1")
-            return
-        else:
-            logger.warning("AI 返回不是标准 SRT，回退到分批解析/分割逻辑...")
-            # 如果校验失败，继续使用原有的分割/映射逻辑作为回退
-
+        logger.info("一次性提交整个字幕文件进行翻译 (紧凑格式，时间轴本地保留)")
+        batch_prompt = with_format_rules(SUBTITLE_PROMPT if prompt_template == DEFAULT_PROMPT else prompt_template)
     else:
-        # 原有的批次处理逻辑
-        logger.info(f"创建批次 (最大 {batch_size_chars} 字符, {max_items_per_batch} 条目/批)")
-        batches = batch_entries(entries, max_chars=batch_size_chars, max_items=max_items_per_batch)
-        logger.info(f"总批次数: {len(batches)}")
-
-        translated_texts: List[str] = []
-        total_processed = 0
-
-        for i, batch in enumerate(batches, 1):
-            batch_start_time = time.time()
-
-        # 显示当前批次信息
-        batch_chars = sum(len(e["text"]) for e in batch)
-        print(f"\n🔄 批次 {i}/{len(batches)} - {len(batch)} 条目 ({batch_chars} 字符)")
-
-        # build batch text
-        texts = [e["text"] for e in batch]
-        batch_text = "\n".join(texts)
-
-        # call translator
-        print(f"📡 调用 {backend} API...")
-        translated = translator.translate(batch_text, target_lang, prompt_template)
-
-        # map translated back to items
-        parts = split_translated_text(translated, len(batch), batch)
-        if len(parts) != len(batch):
-            print(f"⚠️  翻译结果数量不匹配，重试分割...")
-            parts = split_translated_text(translated, len(batch), batch)
-
-        for p in parts:
-            translated_texts.append(p.strip())
+        batch_prompt = with_format_rules(prompt_template)
 
-        total_processed += len(batch)
-        batch_time = time.time() - batch_start_time
+    done: Dict[int, str] = {}
+    keys = [cache_key(model, target_lang, batch_prompt, text) for text in entries.texts]
 
-        logger.info(f"批次 {i} 完成 - 处理了 {len(batch)} 条目 (用时: {batch_time:.1f}s)")
-        logger.info(f"总进度: {total_processed}/{len(entries)} 条目 ({total_processed/len(entries)*100:.1f}%)")
+    def lookup_cache() -> None:
+        # 逐条查询缓存，只把未命中的条目送去翻译
+        if cache is None:
+            return
+        hits = 0
+        for pos, key in enumerate(keys):
+            if pos in done:
+                continue
+            hit = cache.get(key)
+            if hit is not None:
+                done[pos] = hit
+                hits += 1
+        logger.info(f"缓存命中: {hits}/{len(entries)} 条目")
+
+    if whole_file and stream:
+        # 流式模式：译文按顺序逐条追加到 .part 文件，完成后再改名为输出文件
+        part_path = output_path.with_name(output_path.name + ".part")
+        if resume and part_path.exists():
+            # 只复用时间轴与当前条目一致的前缀，来自其他输入或设置的 .part 不会被误用
+            for pos, cue in zip(range(len(entries)), iter_cues(part_path)):
+                if cue.start != entries.starts[pos] or cue.end != entries.ends[pos]:
+                    logger.warning(f"部分输出与当前条目不一致，从第 {pos + 1} 条起重新翻译 ({part_path})")
+                    break
+                done[pos] = cue.text
+            if done:
+                logger.info(f"从部分输出恢复: 已完成 {len(done)}/{len(entries)} 条目 ({part_path})")
+        lookup_cache()
+        if len(done) < len(entries):
+            preload_translator(translator)
+        api_calls = stream_entries(
+            translator, entries, done, part_path, target_lang, batch_prompt,
+            on_translated=lambda pos, tr: cache.put(keys[pos], entries.texts[pos], tr) if cache is not None else None,
+        )
+        part_path.replace(output_path)
+        total_time = time.time() - start_time
+        logger.info(f"翻译完成！总用时: {total_time:.1f}s")
+        logger.info(f"平均速度: {len(entries)/total_time:.1f} 条目/秒")
+        logger.info(f"API 调用次数: {api_calls}")
+        return
+
+    # 断点日志：记录已完成批次，失败后重跑从第一个未完成批次继续
+    journal = None
+    if journal_dir is not None:
+        fingerprint = run_fingerprint(
+            sha256_file(input_path),
+            target_lang, model, batch_prompt, str(merge_timelines), str(min_duration_ms),
+            # 去重与否决定条目位置，必须计入
+            str(bool(dedupe_rolling)),
+        )
+        journal = TranslationJournal(journal_dir, fingerprint)
+        if not resume:
+            journal.clear()
+        elif journal.done:
+            done.update(journal.done)
+            logger.info(f"从断点恢复: 已完成 {len(done)}/{len(entries)} 条目 ({journal.path})")
+    lookup_cache()
+
+    pending = [pos for pos in range(len(entries)) if pos not in done]
+    pending_entries = [entries[pos] for pos in pending]
+    if whole_file:
+        batches = [pending_entries] if pending_entries else []
+        logger.info(f"字幕总字符数: {sum(len(e.text) for e in pending_entries)}")
+    elif batch_tokens:
+        tok = get_tokenizer(tokenizer)
+        logger.info(
+            f"创建批次 (输入 {batch_tokens} tokens, 预计输出 {batch_output_tokens} tokens, "
+            f"{max_items_per_batch} 条目/批)"
+        )
+        batches = batch_entries_by_tokens(
+            pending_entries,
+            max_input_tokens=batch_tokens,
+            max_output_tokens=batch_output_tokens,
+            tokenizer=tok,
+            max_items=max_items_per_batch,
+            prompt_tokens=tok.count(batch_prompt),
+        )
+    else:
+        logger.info(f"创建批次 (最大 {batch_size_chars} 字符, {max_items_per_batch} 条目/批)")
+        batches = batch_entries(pending_entries, max_chars=batch_size_chars, max_items=max_items_per_batch)
+    logger.info(f"总批次数: {len(batches)}, 并发数: {concurrency}")
+
+    # 每个批次对应的条目位置
+    batch_positions: List[List[int]] = []
+    offset = 0
+    for batch in batches:
+        batch_positions.append(pending[offset:offset + len(batch)])
+        offset += len(batch)
+
+    def on_batch_done(i: int, parts: List[str]) -> None:
+        for pos, tr in zip(batch_positions[i], parts):
+            done[pos] = tr
+            if cache is not None:
+                cache.put(keys[pos], entries.texts[pos], tr)
+        if journal is not None:
+            journal.record(batch_positions[i], parts)
+
+    if batches:
+        preload_translator(translator)
+    run_batches(
+        translator, batches, target_lang, batch_prompt,
+        concurrency=concurrency, on_batch_done=on_batch_done,
+    )
+    translated_texts = [done[pos] for pos in range(len(entries)) if pos in done]
 
-    # 关闭批次处理的 else 块
     if len(translated_texts) != len(entries):
         # safety: if mismatch, pad with empty strings
         # but better to raise so user notices
         raise RuntimeError(f"翻译条目数与原条目数不匹配: {len(translated_texts)} vs {len(entries)}")
 
-    logger.info(f"构建翻译后的字幕文件...")
-    # build new entries
-    new_entries = []
-    for e, tr in zip(entries, translated_texts):
-        new_entries.append({"index": e["index"], "start": e["start"], "end": e["end"], "text": tr})
-
     logger.info(f"写入文件: {output_path}")
-    write_srt(output_path, new_entries)
+    write_srt(output_path, entries.with_texts(translated_texts))
+    if journal is not None:
+        # 输出已完整写入，断点日志不再需要
+        journal.clear()
 
     total_time = time.time() - start_time
     logger.info(f"翻译完成！总用时: {total_time:.1f}s")
     logger.info(f"平均速度: {len(entries)/total_time:.1f} 条目/秒")
-
-    # Calculate API call count based on mode
-    if whole_file:
-        api_calls = 1
-    else:
-        api_calls = len(batches)
-    logger.info(f"API 调用次数: {api_calls}")
+    logger.info(f"API 调用次数: {len(batches)}")
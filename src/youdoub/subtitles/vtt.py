@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import html
+import re
+from itertools import chain
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from .srt import Cue, CueWriter, parse_timing_line
+
+# 任意标签：<c.colorE5E5E5>、<v Speaker>、<00:00:01.234> 时间标签、<ruby>/<rt> 等
+_TAG_RE = re.compile(r"<(/?)([^\s.>]*)[^>]*>")
+
+# SRT 播放器也认识的样式标签，保留（去掉类名）
+_KEPT_TAGS = {"i", "b", "u"}
+
+
+def clean_payload(text: str) -> str:
+    """Turn a WebVTT cue payload into plain SRT text.
+
+    Inline timing tags, voice/class/ruby/lang spans are dropped; ``<i>``,
+    ``<b>`` and ``<u>`` are kept without their classes. Entities are decoded,
+    runs of whitespace collapsed and empty lines removed.
+    """
+
+    def repl(m: re.Match) -> str:
+        name = m.group(2).lower()
+        return f"<{m.group(1)}{name}>" if name in _KEPT_TAGS else ""
+
+    text = html.unescape(_TAG_RE.sub(repl, text))
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def _parse_block(block: List[str]) -> Optional[Cue]:
+    head = block[0]
+    # 文件头、注释、样式和区域定义块
+    if head.startswith(("WEBVTT", "NOTE", "STYLE", "REGION")):
+        return None
+    # 计时行之前最多有一行 cue 标识
+    for i, line in enumerate(block[:2]):
+        if "-->" in line:
+            timing = parse_timing_line(line)
+            break
+    else:
+        return None
+    if timing is None:
+        return None
+    return Cue(timing[0], timing[1], clean_payload("\n".join(block[i + 1:])))
+
+
+def _parse_lines(lines: Iterable[str]) -> Iterator[Cue]:
+    block: List[str] = []
+    for line in chain(lines, [""]):
+        # 只去掉换行符：自动字幕在计时行后有一行 " "，它属于 cue 内容，不是块分隔
+        line = line.replace("\ufeff", "").rstrip("\r\n")
+        if line:
+            block.append(line)
+            continue
+        if block:
+            cue = _parse_block(block)
+            if cue is not None:
+                yield cue
+            block = []
+
+
+def iter_vtt_cues(path: Path) -> Iterator[Cue]:
+    """Stream cues from a WebVTT file, block by block.
+
+    Cue settings after the end time (``align:start position:0%``) are ignored
+    and payload markup is stripped with :func:`clean_payload`. Cues left with
+    no text (e.g. styling-only cues) are kept, so timings stay aligned.
+    """
+    with path.open("r", encoding="utf-8", errors="ignore") as f:
+        yield from _parse_lines(f)
+
+
+def parse_vtt_text(text: str) -> List[Cue]:
+    return list(_parse_lines(text.splitlines()))
+
+
+def vtt_to_srt(src: Path, dst: Path) -> int:
+    """Convert a WebVTT file to SRT without loading it whole; returns the cue count."""
+    with CueWriter(dst) as writer:
+        writer.write_all(iter_vtt_cues(src))
+    return writer.count
@@ -1,8 +1,23 @@
+import json
 import os
+import random
+import threading
 import time
-from typing import Optional
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-from openai import OpenAI
+import httpx
+from openai import APIConnectionError, APIStatusError, OpenAI, RateLimitError
+
+from ..paths import cache_root
+from .hash import sha256_hex
+
+try:
+    import fcntl
+except ImportError:  # Windows：限流状态只在进程内共享
+    fcntl = None
 
 
 class Translator:
@@ -11,20 +26,315 @@ class Translator:
     def translate(self, text: str, target_lang: str, prompt_template: str) -> str:
         raise NotImplementedError()
 
+    def translate_stream(self, text: str, target_lang: str, prompt_template: str) -> Iterator[str]:
+        """Yield the translation in chunks as it is produced.
 
-class DeepseekTranslator(Translator):
-    def __init__(self, api_key: Optional[str] = None, api_url: Optional[str] = None, timeout: int = 120, verify_ssl: bool = True, model: str = "deepseek-chat"):
-        self.api_key = api_key or os.environ.get("DEEPSEEK_API_KEY")
-        self.api_url = api_url or os.environ.get("DEEPSEEK_API_URL", "https://api.deepseek.com")
-        self.timeout = timeout
-        self.verify_ssl = verify_ssl
-        self.model = model
-        if not self.api_key:
-            raise RuntimeError("DEEPSEEK_API_KEY not provided (env DEEPSEEK_API_KEY or pass api_key)")
+        Backends without streaming support yield the whole result at once.
+        """
+        yield self.translate(text, target_lang, prompt_template)
 
-        self.client = OpenAI(
-            api_key=self.api_key,
-            base_url=self.api_url
+    def preload(self) -> None:
+        """Get the backend ready before the first request; a no-op for hosted APIs."""
+
+
+class _SharedState:
+    """JSON state of one endpoint that every process reads and writes under an exclusive ``flock``."""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    @contextmanager
+    def locked(self) -> Iterator[Dict[str, Any]]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a+", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or "{}")
+                except ValueError:
+                    state = {}
+                yield state
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class RateController:
+    """Adaptive limiter shared by every request to one backend endpoint.
+
+    Combines token buckets for requests/sec and tokens/min with an AIMD window
+    on in-flight requests: each success widens the window by ~1 per window's
+    worth of requests, a 429 halves it (once per congestion event: further
+    429s during the pause only extend it) and pauses all callers until the
+    server's Retry-After has passed. Concurrent batches and jobs in the same
+    process therefore back off together instead of retrying into a storm.
+
+    With ``shared`` (a state file, see :func:`get_rate_controller`) the
+    buckets, the pause and a congestion counter are also shared with other
+    processes using the same endpoint: they draw from one budget, a 429 seen
+    by one run pauses the others, and each halves its own window once per
+    congestion event. The window itself stays per process.
+    """
+
+    def __init__(
+        self,
+        requests_per_sec: Optional[float] = None,
+        tokens_per_min: Optional[int] = None,
+        max_concurrency: int = 16,
+        shared: Optional[Path] = None,
+    ):
+        self._cond = threading.Condition()
+        self.requests_per_sec = requests_per_sec
+        self.tokens_per_min = tokens_per_min
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+        self._req_bucket = float(max(1.0, requests_per_sec or 1.0))
+        self._tok_bucket = float(tokens_per_min or 0)
+        self._last_refill = time.monotonic()
+        self._shared = _SharedState(shared) if shared is not None and fcntl is not None else None
+        # 已经处理过的跨进程限流事件编号
+        self._seen_seq = 0
+        if self._shared is not None:
+            try:
+                with self._shared.locked() as state:
+                    self._seen_seq = state.get("seq", 0)
+            except OSError as e:
+                print(f"⚠️  无法共享限流状态 ({shared}): {e}")
+                self._shared = None
+
+    @contextmanager
+    def _synced(self):
+        """Load the shared buckets, pause and congestion counter, and store them back afterwards."""
+        if self._shared is None:
+            yield
+            return
+        with self._shared.locked() as state:
+            now = time.monotonic()
+            # 共享文件中使用墙钟时间，进程间的 monotonic 时钟不可比
+            offset = time.time() - now
+            wall = now + offset
+            if self.requests_per_sec and "req" in state:
+                level, at = state["req"]
+                self._req_bucket = min(max(1.0, self.requests_per_sec), level + (wall - at) * self.requests_per_sec)
+            if self.tokens_per_min and "tok" in state:
+                level, at = state["tok"]
+                self._tok_bucket = min(float(self.tokens_per_min), level + (wall - at) * self.tokens_per_min / 60.0)
+            self._last_refill = now
+            self.cooldown_until = max(self.cooldown_until, state.get("cooldown_until", 0.0) - offset)
+            if state.get("seq", 0) > self._seen_seq:
+                # 其他进程遇到的限流：本进程的窗口同样减半一次
+                self._seen_seq = state["seq"]
+                self._decrease()
+            yield
+            if self.requests_per_sec:
+                state["req"] = [self._req_bucket, self._last_refill + offset]
+            if self.tokens_per_min:
+                state["tok"] = [self._tok_bucket, self._last_refill + offset]
+            state["cooldown_until"] = max(state.get("cooldown_until", 0.0), self.cooldown_until + offset)
+            state["seq"] = self._seen_seq
+
+    def configure(self, requests_per_sec: Optional[float] = None, tokens_per_min: Optional[int] = None, max_concurrency: Optional[int] = None) -> None:
+        with self._cond:
+            if requests_per_sec is not None:
+                self.requests_per_sec = requests_per_sec
+            if tokens_per_min is not None:
+                if not self.tokens_per_min:
+                    self._tok_bucket = float(tokens_per_min)
+                self.tokens_per_min = tokens_per_min
+            if max_concurrency is not None:
+                self.max_concurrency = max(1, max_concurrency)
+                self.limit = min(self.limit, float(self.max_concurrency))
+            self._cond.notify_all()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        if self.requests_per_sec:
+            self._req_bucket = min(max(1.0, self.requests_per_sec), self._req_bucket + elapsed * self.requests_per_sec)
+        if self.tokens_per_min:
+            self._tok_bucket = min(float(self.tokens_per_min), self._tok_bucket + elapsed * self.tokens_per_min / 60.0)
+
+    def _wait_time(self, now: float, est_tokens: int) -> Optional[float]:
+        """Seconds until a request may start, 0 if it may start now, None to wait for a slot."""
+        if self.in_flight >= int(self.limit):
+            return None
+        if now < self.cooldown_until:
+            return self.cooldown_until - now
+        if self.requests_per_sec and self._req_bucket < 1.0:
+            return (1.0 - self._req_bucket) / self.requests_per_sec
+        if self.tokens_per_min:
+            need = min(est_tokens, self.tokens_per_min)
+            if self._tok_bucket < need:
+                return (need - self._tok_bucket) * 60.0 / self.tokens_per_min
+        return 0.0
+
+    @contextmanager
+    def slot(self, est_tokens: int = 0):
+        """Hold one in-flight request slot, waiting for the window and buckets first."""
+        with self._cond:
+            while True:
+                with self._synced():
+                    now = time.monotonic()
+                    self._refill(now)
+                    wait = self._wait_time(now, est_tokens)
+                    if wait == 0.0:
+                        self.in_flight += 1
+                        if self.requests_per_sec:
+                            self._req_bucket -= 1.0
+                        if self.tokens_per_min:
+                            self._tok_bucket -= est_tokens
+                        break
+                self._cond.wait(timeout=wait)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify_all()
+
+    def record_usage(self, est_tokens: int, actual_tokens: int) -> None:
+        """Correct the token bucket once the real usage is known."""
+        if self.tokens_per_min:
+            with self._cond, self._synced():
+                self._tok_bucket -= actual_tokens - est_tokens
+
+    def on_success(self) -> None:
+        with self._cond:
+            if self.limit < self.max_concurrency:
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+                self._cond.notify_all()
+
+    def _decrease(self) -> None:
+        old = int(self.limit)
+        self.limit = max(1.0, self.limit / 2.0)
+        if int(self.limit) != old:
+            pause = max(0.0, self.cooldown_until - time.monotonic())
+            print(f"🚦 触发限流，并发窗口 {old} -> {int(self.limit)}，暂停 {pause:.1f} 秒")
+
+    def on_throttled(self, retry_after: float) -> None:
+        with self._cond, self._synced():
+            now = time.monotonic()
+            in_cooldown = now < self.cooldown_until
+            self.cooldown_until = max(self.cooldown_until, now + retry_after)
+            # 同一轮限流中其他在途请求（包括其他进程）陆续返回的 429 不再重复减半
+            if in_cooldown:
+                return
+            self._seen_seq += 1
+            self._decrease()
+
+
+_controllers: Dict[str, RateController] = {}
+_controllers_lock = threading.Lock()
+
+
+def rate_state_path(key: str) -> Path:
+    return cache_root() / "rate" / f"{sha256_hex(key)[:16]}.json"
+
+
+def get_rate_controller(key: str, requests_per_sec: Optional[float] = None, tokens_per_min: Optional[int] = None, max_concurrency: Optional[int] = None) -> RateController:
+    """Return the process-wide controller for an endpoint, creating it on first use.
+
+    Its buckets and pauses are shared with other processes through
+    :func:`rate_state_path`.
+    """
+    with _controllers_lock:
+        ctrl = _controllers.get(key)
+        if ctrl is None:
+            ctrl = RateController(requests_per_sec, tokens_per_min, max_concurrency or 16, shared=rate_state_path(key))
+            _controllers[key] = ctrl
+            return ctrl
+    ctrl.configure(requests_per_sec, tokens_per_min, max_concurrency)
+    return ctrl
+
+
+def _retry_after(e: Exception) -> Optional[float]:
+    """Server hint from Retry-After / retry-after-ms headers, in seconds."""
+    response = getattr(e, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _estimate_tokens(text: str) -> int:
+    # 粗略估算：UTF-8 下中文 3 字节约 1 token，英文约 3-4 字符 1 token
+    return len(text.encode("utf-8")) // 3 + 1
+
+
+# 模型最大输出长度；API 默认值偏小（deepseek-chat 为 4K），分批预算按这里的上限计算
+DEFAULT_MAX_TOKENS = {"deepseek-chat": 8192}
+
+
+def _http_client(verify_ssl: bool, timeout: float, max_connections: int) -> httpx.Client:
+    """Pooled client that keeps connections open between batches."""
+    return httpx.Client(
+        verify=verify_ssl,
+        timeout=timeout,
+        limits=httpx.Limits(
+            max_connections=max(max_connections, 1),
+            max_keepalive_connections=max(max_connections, 1),
+            keepalive_expiry=60.0,
+        ),
+    )
+
+
+def _status_code(e: Exception) -> Optional[int]:
+    if isinstance(e, APIStatusError):
+        return e.status_code
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code
+    return None
+
+
+class ChatTranslator(Translator):
+    """Prompt building, rate control and retries shared by chat backends.
+
+    Subclasses only implement a single request in ``_complete`` and
+    ``_complete_stream``; every request goes through the shared
+    :class:`RateController` for its endpoint.
+    """
+
+    max_attempts = 4
+    temperature = 0.3
+
+    def __init__(
+        self,
+        model: str,
+        rate_key: str,
+        timeout: int = 120,
+        requests_per_sec: Optional[float] = None,
+        tokens_per_min: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+    ):
+        self.model = model
+        self.timeout = timeout
+        self.rate = get_rate_controller(
+            rate_key,
+            requests_per_sec=requests_per_sec,
+            tokens_per_min=tokens_per_min,
+            max_concurrency=max_concurrency,
         )
 
     def _build_prompt(self, text: str, target_lang: str, prompt_template: str) -> str:
@@ -34,28 +344,61 @@ class DeepseekTranslator(Translator):
         p = p.replace("{target_lang}", target_lang).replace("{text}", text)
         return p
 
+    def _messages(self, prompt: str) -> List[dict]:
+        return [
+            {"role": "system", "content": "You are a helpful assistant"},
+            {"role": "user", "content": prompt},
+        ]
+
+    def _complete(self, messages: List[dict]) -> Tuple[Optional[str], Optional[str], Optional[int]]:
+        """Send one request; returns ``(content, finish_reason, total_tokens)``."""
+        raise NotImplementedError()
+
+    def _complete_stream(self, messages: List[dict]) -> Iterator[str]:
+        """Send one streaming request and yield content deltas."""
+        raise NotImplementedError()
+
+    def _retry_delay(self, e: Exception, attempt: int) -> Optional[float]:
+        """Seconds to sleep before retrying ``e``, or None if it should not be retried.
+
+        429s (and 503s, which Ollama and most inference servers use for a full
+        queue) are reported to the shared controller, which pauses every
+        caller, so no extra sleep is needed here. Other 5xx and connection
+        errors back off exponentially with jitter unless the server says
+        otherwise; other 4xx errors (bad request, auth) are not retried.
+        """
+        hint = _retry_after(e)
+        status = _status_code(e)
+        if isinstance(e, RateLimitError) or status in (429, 503):
+            self.rate.on_throttled(hint if hint is not None else min(60.0, 2.0 ** attempt))
+            return 0.0
+        if status is not None and status < 500:
+            return None
+        if status is not None or isinstance(e, (APIConnectionError, httpx.TransportError)):
+            if hint is not None:
+                return hint
+            return min(30.0, 2.0 ** attempt) * random.uniform(0.5, 1.0)
+        return None
+
     def translate(self, text: str, target_lang: str, prompt_template: str) -> str:
         prompt = self._build_prompt(text, target_lang, prompt_template)
+        messages = self._messages(prompt)
+        # 输入 + 与之相当的输出
+        est_tokens = 2 * _estimate_tokens(prompt)
 
-        # simple retry
-        backoff = 1.0
-        for attempt in range(4):
+        for attempt in range(self.max_attempts):
             try:
                 if attempt > 0:
-                    print(f"🔄 重试 API 调用 (尝试 {attempt + 1}/4)...")
-
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": "You are a helpful assistant"},
-                        {"role": "user", "content": prompt},
-                    ],
-                    stream=False,
-                    timeout=self.timeout,
-                    temperature=1.3
-                )
-
-                content = response.choices[0].message.content
+                    print(f"🔄 重试 API 调用 (尝试 {attempt + 1}/{self.max_attempts})...")
+
+                with self.rate.slot(est_tokens):
+                    content, finish_reason, total_tokens = self._complete(messages)
+                self.rate.on_success()
+                if total_tokens is not None:
+                    self.rate.record_usage(est_tokens, total_tokens)
+
+                if finish_reason == "length":
+                    print("⚠️  API 响应达到输出长度上限，结果可能被截断")
                 if content:
                     print(f"📨 API 响应: {len(content)} 字符")
                 else:
@@ -64,18 +407,269 @@ class DeepseekTranslator(Translator):
                 return content
             except Exception as e:
                 print(f"❌ API 调用失败: {str(e)}")
-                if attempt == 3:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                if attempt == self.max_attempts - 1:
+                    print("💥 所有重试都失败了")
+                    raise
+                if delay > 0:
+                    print(f"⏳ 等待 {delay:.1f} 秒后重试...")
+                    time.sleep(delay)
+
+    def translate_stream(self, text: str, target_lang: str, prompt_template: str) -> Iterator[str]:
+        prompt = self._build_prompt(text, target_lang, prompt_template)
+        messages = self._messages(prompt)
+        est_tokens = 2 * _estimate_tokens(prompt)
+
+        # 只在尚未收到任何内容时重试；流中途断开时直接抛出，由调用方保留已写入的部分
+        for attempt in range(self.max_attempts):
+            received = 0
+            try:
+                if attempt > 0:
+                    print(f"🔄 重试 API 调用 (尝试 {attempt + 1}/{self.max_attempts})...")
+
+                with self.rate.slot(est_tokens):
+                    for delta in self._complete_stream(messages):
+                        if delta:
+                            received += len(delta)
+                            yield delta
+                self.rate.on_success()
+
+                print(f"📨 API 流式响应: {received} 字符")
+                return
+            except Exception as e:
+                print(f"❌ API 调用失败: {str(e)}")
+                if received:
+                    print("💥 流式响应中断")
+                    raise
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                if attempt == self.max_attempts - 1:
                     print("💥 所有重试都失败了")
                     raise
-                print(f"⏳ 等待 {backoff:.1f} 秒后重试...")
-                time.sleep(backoff)
-                backoff *= 2.0
+                if delay > 0:
+                    print(f"⏳ 等待 {delay:.1f} 秒后重试...")
+                    time.sleep(delay)
+
+
+class OpenAICompatibleTranslator(ChatTranslator):
+    """Any server speaking the OpenAI chat-completions API (OpenAI, vLLM, llama.cpp, LM Studio...)."""
 
+    api_key_env = "OPENAI_API_KEY"
+    api_url_env = "OPENAI_BASE_URL"
+    default_api_url = "https://api.openai.com/v1"
+    default_model: Optional[str] = None
+    require_api_key = False
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        api_url: Optional[str] = None,
+        timeout: int = 120,
+        verify_ssl: bool = True,
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        requests_per_sec: Optional[float] = None,
+        tokens_per_min: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+    ):
+        self.api_key = api_key or os.environ.get(self.api_key_env)
+        self.api_url = api_url or os.environ.get(self.api_url_env, self.default_api_url)
+        self.verify_ssl = verify_ssl
+        model = model or self.default_model
+        if not model:
+            raise RuntimeError(f"Model not specified for {self.api_url} (pass --model)")
+        if self.require_api_key and not self.api_key:
+            raise RuntimeError(f"{self.api_key_env} not provided (env {self.api_key_env} or pass api_key)")
+        super().__init__(
+            model,
+            f"{self.api_url}|{model}",
+            timeout=timeout,
+            requests_per_sec=requests_per_sec,
+            tokens_per_min=tokens_per_min,
+            max_concurrency=max_concurrency,
+        )
+        self.max_tokens = max_tokens or DEFAULT_MAX_TOKENS.get(model)
 
-def get_translator(name: str = "deepseek", api_key: Optional[str] = None, api_url: Optional[str] = None, verify_ssl: bool = True, model: str = "deepseek-chat") -> Translator:
+        # 重试由本类统一处理（需要看到 429 才能调整并发），关闭 SDK 自带的重试；
+        # 本地推理服务通常不校验 key，但 SDK 要求非空
+        self.client = OpenAI(
+            api_key=self.api_key or "EMPTY",
+            base_url=self.api_url,
+            max_retries=0,
+            http_client=_http_client(verify_ssl, timeout, self.rate.max_concurrency),
+        )
+
+    def _extra_params(self) -> dict:
+        return {"max_tokens": self.max_tokens} if self.max_tokens else {}
+
+    def _complete(self, messages: List[dict]) -> Tuple[Optional[str], Optional[str], Optional[int]]:
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=False,
+            timeout=self.timeout,
+            temperature=self.temperature,
+            **self._extra_params(),
+        )
+        choice = response.choices[0]
+        total_tokens = response.usage.total_tokens if response.usage is not None else None
+        return choice.message.content, choice.finish_reason, total_tokens
+
+    def _complete_stream(self, messages: List[dict]) -> Iterator[str]:
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=True,
+            timeout=self.timeout,
+            temperature=self.temperature,
+            **self._extra_params(),
+        )
+        for chunk in stream:
+            if chunk.choices:
+                yield chunk.choices[0].delta.content or ""
+
+
+class DeepseekTranslator(OpenAICompatibleTranslator):
+    api_key_env = "DEEPSEEK_API_KEY"
+    api_url_env = "DEEPSEEK_API_URL"
+    default_api_url = "https://api.deepseek.com"
+    default_model = "deepseek-chat"
+    require_api_key = True
+    # DeepSeek 官方推荐的翻译温度
+    temperature = 1.3
+
+
+class OllamaTranslator(ChatTranslator):
+    """Local Ollama server through its native ``/api/chat`` endpoint.
+
+    The native API (unlike Ollama's OpenAI shim) accepts ``keep_alive``, which
+    keeps the model loaded between batches instead of unloading it after the
+    default five idle minutes, and ``num_ctx``, without which long batches are
+    silently truncated to the server's default context. ``max_concurrency``
+    (the caller's ``--concurrency``) should match the server's
+    ``OLLAMA_NUM_PARALLEL`` slots; extra requests would only wait in the
+    server queue. Callers run ``preload`` once before the first batch so the
+    model is loaded and pinned for ``keep_alive`` before concurrent requests
+    start queueing on the load.
+    """
+
+    def __init__(
+        self,
+        api_url: Optional[str] = None,
+        timeout: int = 600,
+        verify_ssl: bool = True,
+        model: Optional[str] = None,
+        keep_alive: Optional[str] = None,
+        num_ctx: Optional[int] = None,
+        requests_per_sec: Optional[float] = None,
+        tokens_per_min: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+    ):
+        host = api_url or os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+        if "://" not in host:
+            host = "http://" + host
+        self.api_url = host.rstrip("/")
+        model = model or os.environ.get("OLLAMA_MODEL")
+        if not model:
+            raise RuntimeError("Ollama model not specified (pass --model or env OLLAMA_MODEL)")
+        self.keep_alive = keep_alive or os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+        env_ctx = os.environ.get("OLLAMA_NUM_CTX")
+        self.num_ctx = num_ctx or (int(env_ctx) if env_ctx else None)
+        super().__init__(
+            model,
+            f"{self.api_url}|{model}",
+            timeout=timeout,
+            requests_per_sec=requests_per_sec,
+            tokens_per_min=tokens_per_min,
+            max_concurrency=max_concurrency,
+        )
+        self.client = _http_client(verify_ssl, timeout, self.rate.max_concurrency)
+
+    def _payload(self, messages: List[dict], stream: bool) -> dict:
+        options = {"temperature": self.temperature}
+        if self.num_ctx:
+            options["num_ctx"] = self.num_ctx
+        return {
+            "model": self.model,
+            "messages": messages,
+            "stream": stream,
+            "keep_alive": _keep_alive_value(self.keep_alive),
+            "options": options,
+        }
+
+    def _complete(self, messages: List[dict]) -> Tuple[Optional[str], Optional[str], Optional[int]]:
+        r = self.client.post(f"{self.api_url}/api/chat", json=self._payload(messages, stream=False))
+        r.raise_for_status()
+        data = r.json()
+        total_tokens = None
+        if "eval_count" in data:
+            total_tokens = data.get("prompt_eval_count", 0) + data["eval_count"]
+        return data.get("message", {}).get("content"), data.get("done_reason"), total_tokens
+
+    def _complete_stream(self, messages: List[dict]) -> Iterator[str]:
+        with self.client.stream("POST", f"{self.api_url}/api/chat", json=self._payload(messages, stream=True)) as r:
+            r.raise_for_status()
+            for line in r.iter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get("error"):
+                    raise RuntimeError(f"Ollama error: {data['error']}")
+                yield data.get("message", {}).get("content", "")
+                if data.get("done"):
+                    if data.get("done_reason") == "length":
+                        print("⚠️  API 响应达到输出长度上限，结果可能被截断")
+                    return
+
+    def preload(self) -> None:
+        """Load the model and pin it in memory for ``keep_alive`` without generating anything."""
+        r = self.client.post(
+            f"{self.api_url}/api/chat",
+            json={"model": self.model, "messages": [], "keep_alive": _keep_alive_value(self.keep_alive)},
+        )
+        r.raise_for_status()
+
+
+def _keep_alive_value(value: str):
+    # Ollama 接受时长字符串（"30m"）或秒数；-1 表示常驻，0 表示立即卸载
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def get_translator(
+    name: str = "deepseek",
+    api_key: Optional[str] = None,
+    api_url: Optional[str] = None,
+    verify_ssl: bool = True,
+    model: Optional[str] = None,
+    requests_per_sec: Optional[float] = None,
+    tokens_per_min: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+    keep_alive: Optional[str] = None,
+    num_ctx: Optional[int] = None,
+) -> Translator:
     name_l = (name or "deepseek").lower()
+    rate_opts = dict(
+        requests_per_sec=requests_per_sec,
+        tokens_per_min=tokens_per_min,
+        max_concurrency=max_concurrency,
+    )
     if name_l == "deepseek":
-        return DeepseekTranslator(api_key=api_key, api_url=api_url, verify_ssl=verify_ssl, model=model)
-    # Placeholder for other backends; raise if not implemented
+        return DeepseekTranslator(api_key=api_key, api_url=api_url, verify_ssl=verify_ssl, model=model, **rate_opts)
+    if name_l == "openai":
+        return OpenAICompatibleTranslator(api_key=api_key, api_url=api_url, verify_ssl=verify_ssl, model=model, **rate_opts)
+    if name_l == "ollama":
+        return OllamaTranslator(
+            api_url=api_url,
+            verify_ssl=verify_ssl,
+            model=model,
+            keep_alive=keep_alive,
+            num_ctx=num_ctx,
+            **rate_opts,
+        )
     raise RuntimeError(f"Translator backend not implemented: {name}")
-
@@ -3,16 +3,27 @@ from __future__ import annotations
 import json
 import os
 from pathlib import Path
-from typing import List
-
 import typer
 import yt_dlp
-from faster_whisper import WhisperModel
 from rich.console import Console
 
-from ..paths import ensure_workdir
-from ..subtitles.translate import translate_srt_file
+from ..asr.audio import SAMPLE_RATE, ensure_pcm, find_media, pcm_fingerprint, pcm_is_current
+from ..asr.cache import ASRCache, asr_cache_key, asr_params, read_provenance, write_provenance
+from ..asr.client import server_status, server_url, transcribe_remote
+from ..asr.parallel import transcribe_parallel
+from ..asr.pipeline import run_pipeline
+from ..asr.resegment import Segmentation
+from ..asr.transcribe import DEFAULT_MODEL_DIR, load_model, transcribe_to_srt
+from ..asr.tune import CPU_COMPUTE_TYPES, autotune, candidate_settings, profile_path, save_profile, tuned_settings
+from ..config import YouDoubConfig
+from ..paths import WorkPaths, ensure_workdir
+from ..subtitles.cache import TranslationCache
+from ..subtitles.srt import iter_cues
+from ..subtitles.translate import translate_cue_stream, translate_srt_file
+from ..utils.llm_adapters import get_translator
 from .downloader import download_youtube_video
+from .info import DEFAULT_INFO_TTL, InfoCache, fetch_info
+from .subtitles import download_youtube_subtitles
 
 app = typer.Typer(no_args_is_help=True)
 console = Console()
@@ -26,22 +37,28 @@ def dl(
     download_subs: bool = typer.Option(True, "--subs/--no-subs", help="同时下载字幕"),
     sub_lang: str = typer.Option("en", "--sub-lang", help="字幕语言（默认：en）"),
     keep_streams: bool = typer.Option(False, "--keep-streams", help="保留单独的音频和视频流文件"),
+    info_ttl: int = typer.Option(DEFAULT_INFO_TTL, "--info-ttl", help="视频信息缓存有效期（秒，0 为不缓存；默认读取 YOUDOUB_INFO_TTL 或 3600）"),
 ):
     """下载视频、元数据以及可选的字幕到工作目录。"""
     # Clean URL to handle escaped characters from browser copy-paste
     cleaned_url = url.replace('\\', '')
+    info_cache = InfoCache(ttl=info_ttl)
+    info = None
 
-    # Extract video_id if not provided
+    # 优先从 URL 解析视频 ID，无需请求
+    if video_id is None:
+        video_id = _video_id_from_url(cleaned_url)
     if video_id is None:
         console.print("正在提取视频 ID...")
         try:
             with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}) as ydl:
-                info = ydl.extract_info(cleaned_url, download=False)
+                # 提取到的信息直接交给下载复用
+                info = fetch_info(ydl, cleaned_url, cache=info_cache)
                 video_id = info.get('id')
                 if not video_id:
                     console.print("[red]错误[/red] 无法从 URL 提取视频 ID，请手动指定 --video-id")
                     raise typer.Exit(1)
-        except Exception as e:
+        except yt_dlp.utils.DownloadError as e:
             console.print(f"[red]错误[/red] 提取视频 ID 失败: {e}")
             console.print("请手动指定 --video-id 参数")
             raise typer.Exit(1)
@@ -60,7 +77,10 @@ def dl(
         force=force,
         download_subs=download_subs,
         sub_lang=sub_lang,
-        keep_separate_streams=keep_streams
+        keep_separate_streams=keep_streams,
+        video_id=video_id,
+        info=info,
+        info_cache=info_cache,
     )
     console.print(f"[green]完成[/green] 视频: {wp.video}")
     console.print(f"[green]完成[/green] 元数据:  {wp.meta_json}")
@@ -70,6 +90,124 @@ def dl(
         console.print(f"[green]完成[/green] 保留了音频和视频流文件")
 
 
+def _video_id_from_url(url: str) -> str | None:
+    """Extract the video ID from the URL pattern alone, without a network request."""
+    for ie in yt_dlp.extractor.gen_extractor_classes():
+        if ie.ie_key() != "Generic" and ie.suitable(url):
+            return ie.get_temp_id(url)
+    return None
+
+
+@app.command("sub")
+def sub(
+    url: str = typer.Argument(..., help="YouTube 视频 URL"),
+    workdir: Path = typer.Option(Path(os.getenv("YOUDOUB_WORKDIR", "./work")), "--workdir", "-w", help="工作目录"),
+    video_id: str = typer.Option(None, "--video-id", "-v", help="视频 ID（默认从 URL 解析）"),
+    lang: str = typer.Option("en", "--lang", "-l", help="字幕语言（默认：en）"),
+    fallback_auto: bool = typer.Option(True, "--auto/--no-auto", help="没有人工字幕时使用自动字幕"),
+    force: bool = typer.Option(False, "--force", help="强制重新下载，即使文件已存在"),
+):
+    """只下载字幕并转换为 work/<VIDEO_ID>/subs/source.<lang>.srt（不下载视频）。"""
+    cleaned_url = url.replace('\\', '')
+    if video_id is None:
+        video_id = _video_id_from_url(cleaned_url)
+        if not video_id:
+            console.print("[red]错误[/red] 无法从 URL 解析视频 ID，请手动指定 --video-id")
+            raise typer.Exit(1)
+
+    wp = ensure_workdir(workdir / video_id)
+    console.print(f"视频 ID: {video_id}")
+    console.print(f"工作目录: {wp.root}")
+
+    try:
+        out = download_youtube_subtitles(url=cleaned_url, workdir=wp.root, lang=lang, fallback_auto=fallback_auto, force=force)
+    except FileNotFoundError:
+        console.print(f"[red]错误[/red] 没有 {lang} 字幕，可使用 youdoub yt asr 识别生成")
+        raise typer.Exit(1)
+    except yt_dlp.utils.DownloadError as e:
+        console.print(f"[red]错误[/red] 字幕下载失败: {e}")
+        raise typer.Exit(1)
+    console.print(f"[green]完成[/green] 字幕: {out}")
+
+
+def _resolve_media(wp: WorkPaths, input_file: str | None) -> Path:
+    """Pick the media file to take audio from, exiting when there is none."""
+    # 优先使用音频流文件（如果存在），其次使用视频文件
+    media = Path(input_file) if input_file else find_media(wp)
+    if media is None:
+        console.print("[red]错误[/red] 未找到输入文件（音频流文件或 video.mp4）")
+        raise typer.Exit(1)
+    if not media.exists():
+        console.print(f"[red]错误[/red] 输入文件不存在: {media}")
+        raise typer.Exit(1)
+    return media
+
+
+def _prepare_audio(wp: WorkPaths, media: Path, force: bool = False) -> Path:
+    # 提取与复用的判断都在 ensure_pcm 中，这里只负责提示与错误退出
+    current = not force and pcm_is_current(wp.audio_pcm, wp.audio_meta, media)
+    if current:
+        console.print(f"使用已提取的音频: {wp.audio_pcm}")
+    else:
+        console.print(f"正在提取音频: {media} -> {wp.audio_pcm}")
+    try:
+        pcm = ensure_pcm(wp, media, force=force)
+    except Exception as e:
+        console.print(f"[red]错误[/red] 音频提取失败: {e}")
+        raise typer.Exit(1)
+    if not current:
+        samples = pcm.stat().st_size // 4
+        console.print(f"[green]完成[/green] 音频: {pcm} ({samples / SAMPLE_RATE:.1f}s)")
+    return pcm
+
+
+@app.command("audio")
+def audio(
+    video_id: str = typer.Option(..., "--video-id", "-v", help="视频 ID"),
+    workdir: Path = typer.Option(Path(os.getenv("YOUDOUB_WORKDIR", "./work")), "--workdir", "-w", help="工作目录"),
+    input_file: str = typer.Option(None, "--input", "-i", help="输入音频/视频文件路径（默认为音频流文件或 work/video.mp4）"),
+    force: bool = typer.Option(False, "--force", help="强制重新提取，即使文件已是最新"),
+):
+    """提取 16 kHz 单声道 float32 音频到 work/<VIDEO_ID>/audio.f32，供 ASR 直接 memmap 读取。"""
+    wp = ensure_workdir(workdir / video_id)
+    _prepare_audio(wp, _resolve_media(wp, input_file), force=force)
+
+
+def _asr_settings(
+    model: str,
+    compute_type: str | None,
+    cpu_threads: int | None,
+    workers: int | None,
+    use_profile: bool,
+    profile_workers: bool = False,
+):
+    """Resolve the ASR options, taking them from the asr-bench profile when none is given.
+
+    The profile entry was measured as one combination, so it is applied only
+    when the user set none of the three options. Its ``workers`` (which
+    switches to the chunked multi-process path and changes ``asr_params``)
+    is only used with ``profile_workers``; without it, a multi-process
+    entry contributes its compute type alone, since its per-process thread
+    count does not fit a single process.
+    """
+    tuned = None
+    if use_profile and compute_type is None and cpu_threads is None and workers is None:
+        tuned = tuned_settings(model)
+    applied = {}
+    if tuned:
+        applied["compute_type"] = tuned["compute_type"]
+        if profile_workers or tuned["workers"] == 1:
+            applied["cpu_threads"] = tuned["cpu_threads"]
+        if profile_workers:
+            applied["workers"] = tuned["workers"]
+        console.print("使用 asr-bench 测得的设置: " + " ".join(f"{k}={v}" for k, v in applied.items()))
+    return (
+        compute_type if compute_type is not None else applied.get("compute_type", "default"),
+        cpu_threads if cpu_threads is not None else applied.get("cpu_threads", 0),
+        workers if workers is not None else applied.get("workers", 1),
+    )
+
+
 @app.command("asr")
 def asr(
     video_id: str = typer.Option(..., "--video-id", "-v", help="视频 ID"),
@@ -79,6 +217,20 @@ def asr(
     model: str = typer.Option("medium", "--model", "-m", help="Whisper 模型: tiny/base/small/medium/large-v1/large-v2/large-v3/large/distil-*系列/turbo (默认: medium)"),
     model_dir: str = typer.Option(None, "--model-dir", help="模型下载目录（默认为 ./models）"),
     force: bool = typer.Option(False, "--force", help="强制重新生成，即使文件已存在"),
+    use_server: bool = typer.Option(True, "--server/--no-server", help="ASR 服务（youdoub asr serve）在运行时交给它处理"),
+    batched: bool = typer.Option(False, "--batched", help="批量推理：按 VAD 静音切块后成批解码，CPU 上吞吐量高数倍"),
+    batch_size: int = typer.Option(8, "--batch-size", min=1, help="批量推理每批的音频块数（配合 --batched）"),
+    compute_type: str = typer.Option(None, "--compute-type", help="计算精度: default/int8/int8_float32/float16/float32（默认取 asr-bench 测得的设置，否则 default）"),
+    cpu_threads: int = typer.Option(None, "--cpu-threads", min=0, help="CPU 线程数（0 为自动；多进程时为每个进程的线程数；默认取 asr-bench 测得的设置）"),
+    workers: int = typer.Option(None, "--workers", min=1, help="多进程并行识别：按 VAD 静音切块，每个进程加载一份模型（默认取 asr-bench 测得的设置，否则 1）"),
+    resume: bool = typer.Option(False, "--resume", help="从上次中断处继续（利用 asr.<lang>.srt.part 及其检查点）"),
+    use_cache: bool = typer.Option(True, "--cache/--no-cache", help="使用共享 ASR 缓存（按音频指纹与识别参数，跨工作目录复用）"),
+    words: bool = typer.Option(False, "--words", help="请求逐词时间戳，并按标点、停顿、时长和字数重新分句（替代 Whisper 的原始分段）"),
+    max_cue_duration: int = typer.Option(7000, "--max-cue-duration", min=1000, help="重新分句时每条字幕的最长时长（毫秒，配合 --words）"),
+    max_cue_chars: int = typer.Option(84, "--max-cue-chars", min=10, help="重新分句时每条字幕的最多字符数（配合 --words）"),
+    split_pause: int = typer.Option(600, "--split-pause", min=0, help="词间停顿达到该值（毫秒）时断句（配合 --words）"),
+    use_profile: bool = typer.Option(True, "--profile/--no-profile", help="--compute-type/--cpu-threads/--workers 均未指定时使用 yt asr-bench 测得的最快设置"),
+    profile_workers: bool = typer.Option(False, "--profile-workers", help="同时采用 profile 中的多进程设置（--workers），会改变识别参数与缓存键"),
 ):
     """ASR 语音识别（使用 faster-whisper）。"""
     # Compute target workspace path
@@ -88,121 +240,344 @@ def asr(
     console.print(f"视频 ID: {video_id}")
     console.print(f"工作目录: {target_root}")
 
-    # 确定输入文件
-    if input_file is None:
-        # 优先使用音频流文件（如果存在），其次使用视频文件
-        audio_files = list(wp.root.glob("*.webm")) + list(wp.root.glob("*.m4a"))
-        if audio_files:
-            input_file = str(audio_files[0])  # 使用第一个音频文件
-        elif wp.video.exists():
-            input_file = str(wp.video)
-        else:
-            console.print("[red]错误[/red] 未找到输入文件（音频流文件或 video.mp4）")
-            raise typer.Exit(1)
-
-    # 检查输入文件是否存在
-    input_path = Path(input_file)
-    if not input_path.exists():
-        console.print(f"[red]错误[/red] 输入文件不存在: {input_file}")
-        raise typer.Exit(1)
+    media = _resolve_media(wp, input_file)
 
     # 设置默认模型目录
     if model_dir is None:
-        model_dir = str(Path("./models"))
+        model_dir = DEFAULT_MODEL_DIR
         console.print(f"使用默认模型目录: {model_dir}")
 
-    # 确保模型目录存在
-    Path(model_dir).mkdir(parents=True, exist_ok=True)
+    compute_type, cpu_threads, workers = _asr_settings(model, compute_type, cpu_threads, workers, use_profile, profile_workers)
+    effective_batch = batch_size if batched else 0
+    segmentation = Segmentation(max_cue_duration, max_cue_chars, split_pause) if words else None
+    params = asr_params(
+        model=model,
+        lang=lang,
+        compute_type=compute_type,
+        batch_size=effective_batch,
+        workers=workers,
+        segmentation=segmentation,
+    )
 
     # 确定输出文件路径
     output_file = wp.subs_dir / f"asr.{lang}.srt"
     if output_file.exists() and not force:
-        console.print(f"[green]完成[/green] ASR 字幕已存在: {output_file}")
+        provenance = read_provenance(output_file)
+        # 没有来源记录的旧字幕照旧视为完成；记录的参数与本次不同时重新生成
+        if provenance is None or provenance.get("params") == params:
+            console.print(f"[green]完成[/green] ASR 字幕已存在: {output_file}")
+            return
+        console.print(f"[yellow]提示[/yellow]: 已有 ASR 字幕的识别参数与本次不同，重新生成: {output_file}")
+
+    # 解码一次得到 16 kHz PCM，之后换模型或参数重跑都直接 memmap
+    input_path = _prepare_audio(wp, media)
+    fingerprint = pcm_fingerprint(wp.audio_pcm, wp.audio_meta)
+    key = asr_cache_key(fingerprint, params)
+    cache = ASRCache() if use_cache else None
+    if cache is not None and not resume and cache.restore(key, output_file):
+        write_provenance(output_file, key, fingerprint, params)
+        console.print(f"[green]完成[/green] ASR 缓存命中: {output_file}")
         return
 
+    def finish() -> None:
+        write_provenance(output_file, key, fingerprint, params)
+        if cache is not None:
+            cache.put(key, output_file, params)
+
     console.print(f"开始 ASR 处理...")
-    console.print(f"输入文件: {input_file}")
+    console.print(f"输入文件: {media}")
     console.print(f"输出文件: {output_file}")
     console.print(f"语言: {lang}")
-    console.print(f"模型: {model}")
+    console.print(f"模型: {model} (compute_type={compute_type})")
     if model_dir:
         console.print(f"模型目录: {model_dir}")
+    if batched:
+        console.print(f"批量推理: batch_size={batch_size}")
+    if segmentation:
+        console.print(f"逐词时间戳重新分句: ≤{max_cue_duration}ms，≤{max_cue_chars} 字符，停顿 ≥{split_pause}ms 断句")
+    if resume:
+        console.print("续跑: 如有检查点，从上次中断处继续")
+
+    if workers > 1:
+        console.print(f"多进程并行识别: {workers} 个进程")
+        try:
+            result = transcribe_parallel(
+                input_path,
+                output_file,
+                lang,
+                model=model,
+                workers=workers,
+                model_dir=model_dir,
+                compute_type=compute_type,
+                cpu_threads=cpu_threads,
+                batch_size=effective_batch,
+                resume=resume,
+                segmentation=segmentation,
+                params=params,
+                progress=lambda done, total: console.print(f"  已完成 {done}/{total} 块"),
+            )
+        except Exception as e:
+            console.print(f"[red]错误[/red] ASR 处理失败: {e}")
+            console.print("已识别的部分保留在 .part 文件中，可加 --resume 继续")
+            raise typer.Exit(1)
+        finish()
+        console.print(f"[green]完成[/green] ASR 字幕已生成: {output_file} ({result['chunks']} 块，{result['segments']} 条)")
+        console.print(f"[info]检测到语言: {result['language']} (概率: {result['language_probability']:.2f})")
+        return
 
-    # 设置模型缓存目录
-    if model_dir:
-        os.environ["HF_HOME"] = model_dir
-        os.environ["HUGGINGFACE_HUB_CACHE"] = model_dir
-
-    # 确保显示下载进度条
-    os.environ["HF_HUB_DISABLE_PROGRESS_BARS"] = "False"
-    # 使用标准下载器以确保进度条显示
-    os.environ["HF_HUB_ENABLE_HF_TRANSFER"] = "False"
+    # ASR 服务在运行时交给它处理，省去每次加载模型的时间
+    if use_server and server_status() is not None:
+        console.print(f"使用 ASR 服务: {server_url()}")
+        console.print("正在进行语音识别，请稍候...")
+        try:
+            result = transcribe_remote(
+                input_path=input_path,
+                output_file=output_file,
+                lang=lang,
+                model=model,
+                model_dir=model_dir,
+                batch_size=effective_batch,
+                compute_type=compute_type,
+                cpu_threads=cpu_threads,
+                resume=resume,
+                segmentation=segmentation,
+                params=params,
+            )
+        except Exception as e:
+            console.print(f"[red]错误[/red] ASR 处理失败: {e}")
+            console.print("已识别的部分保留在 .part 文件中，可加 --resume 继续")
+            raise typer.Exit(1)
+        finish()
+        console.print(f"[green]完成[/green] ASR 字幕已生成: {output_file} (耗时 {result['elapsed']:.1f}s)")
+        console.print(f"[info]检测到语言: {result['language']} (概率: {result['language_probability']:.2f})")
+        return
 
     console.print(f"正在加载模型: {model}")
     if not force:
         console.print("如果模型不存在，将显示下载进度...")
 
     try:
-        # 初始化 Whisper 模型
-        # 尝试 float16，如果不支持则回退到 float32
-        model_instance = WhisperModel(
-            model,
-            device="auto",
-            download_root=model_dir,
-            local_files_only=False
-        )
+        model_instance = load_model(model, model_dir, compute_type=compute_type, cpu_threads=cpu_threads)
 
         # 进行语音识别
         console.print("正在进行语音识别，请稍候...")
-        segments, info = model_instance.transcribe(
-            str(input_path),
-            language=lang if lang != "auto" else None,
-            beam_size=5,
-            patience=1,
-            length_penalty=1,
-            repetition_penalty=1,
-            no_repeat_ngram_size=0,
-            compression_ratio_threshold=2.4,
-            log_prob_threshold=-1.0,
-            no_speech_threshold=0.6,
-            condition_on_previous_text=True,
-            prompt_reset_on_temperature=0.5,
-            initial_prompt=None,
-            prefix=None,
-            suppress_blank=True,
-            suppress_tokens=[-1],
-            without_timestamps=False,
-            max_initial_timestamp=1.0,
-            hallucination_silence_threshold=None,
-            # 启用进度显示
-            log_progress=True,
+        result = transcribe_to_srt(
+            model_instance,
+            input_path,
+            output_file,
+            lang,
+            batch_size=effective_batch,
+            resume=resume,
+            segmentation=segmentation,
+            params=params,
         )
+        finish()
 
-        # 生成 SRT 格式字幕
-        srt_content = ""
-        segment_count = 1
+        console.print(f"[green]完成[/green] ASR 字幕已生成: {output_file}")
+        console.print(f"[info]检测到语言: {result['language']} (概率: {result['language_probability']:.2f})")
+
+    except Exception as e:
+        console.print(f"[red]错误[/red] ASR 处理失败: {e}")
+        console.print("已识别的部分保留在 .part 文件中，可加 --resume 继续")
+        raise typer.Exit(1)
 
-        for segment in segments:
-            start_time = format_timestamp(segment.start)
-            end_time = format_timestamp(segment.end)
-            text = segment.text.strip()
 
-            srt_content += f"{segment_count}\n"
-            srt_content += f"{start_time} --> {end_time}\n"
-            srt_content += f"{text}\n\n"
-            segment_count += 1
+@app.command("asr-translate")
+def asr_translate(
+    video_id: str = typer.Option(..., "--video-id", "-v", help="视频 ID"),
+    workdir: Path = typer.Option(Path(os.getenv("YOUDOUB_WORKDIR", "./work")), "--workdir", "-w", help="工作目录"),
+    lang: str = typer.Option(..., "--lang", "-l", help="目标语言代码，例如 zh-CN"),
+    asr_lang: str = typer.Option("en", "--asr-lang", help="ASR 语言"),
+    input_file: str = typer.Option(None, "--input", "-i", help="输入音频/视频文件路径（默认为音频流文件或 work/video.mp4）"),
+    model: str = typer.Option("medium", "--model", "-m", help="Whisper 模型（默认: medium）"),
+    model_dir: str = typer.Option(None, "--model-dir", help="模型下载目录（默认为 ./models）"),
+    batched: bool = typer.Option(False, "--batched", help="批量推理：按 VAD 静音切块后成批解码"),
+    asr_batch_size: int = typer.Option(8, "--asr-batch-size", min=1, help="批量推理每批的音频块数（配合 --batched）"),
+    compute_type: str = typer.Option(None, "--compute-type", help="计算精度: default/int8/int8_float32/float16/float32（默认取 asr-bench 测得的设置）"),
+    cpu_threads: int = typer.Option(None, "--cpu-threads", min=0, help="CPU 线程数（0 为自动；默认取 asr-bench 测得的设置）"),
+    backend: str = typer.Option("deepseek", "--backend", help="翻译后端: deepseek|ollama|openai"),
+    llm_model: str = typer.Option(None, "--llm-model", help="翻译模型名称（deepseek 默认 deepseek-chat；ollama/openai 必填）"),
+    api_key: str = typer.Option(None, "--api-key", help="后端 API key（可用环境变量代替）"),
+    api_url: str = typer.Option(None, "--api-url", help="后端地址"),
+    keep_alive: str = typer.Option(None, "--keep-alive", envvar="OLLAMA_KEEP_ALIVE", help="Ollama 模型常驻时长（默认 30m）"),
+    num_ctx: int = typer.Option(None, "--num-ctx", envvar="OLLAMA_NUM_CTX", help="Ollama 上下文长度"),
+    batch_tokens: int = typer.Option(2000, "--batch-tokens", help="每批输入 token 预算（较小的批次能更早发出请求）"),
+    batch_output_tokens: int = typer.Option(7000, "--batch-output-tokens", help="每批预计输出 token 上限"),
+    batch_items: int = typer.Option(40, "--batch-items", min=1, help="每批最多条目数，凑满即发送"),
+    tokenizer: str = typer.Option("heuristic", "--tokenizer", help="token 估算方式: heuristic 或 tiktoken 编码名"),
+    concurrency: int = typer.Option(2, "--concurrency", "-j", min=1, help="同时进行的批次翻译请求数上限"),
+    rps: float = typer.Option(None, "--rps", envvar="YOUDOUB_LLM_RPS", help="后端请求速率上限（次/秒，仅在本进程内生效；多个 youdoub 进程共用一个 key 时需按进程数分摊）"),
+    tpm: int = typer.Option(None, "--tpm", envvar="YOUDOUB_LLM_TPM", help="后端 token 速率上限（tokens/分钟，仅在本进程内生效；多个进程时需分摊）"),
+    use_cache: bool = typer.Option(None, "--cache/--no-cache", help="使用翻译缓存 work/cache/translation.jsonl（默认读取 YOUDOUB_ENABLE_TRANSLATION_CACHE）"),
+    queue_size: int = typer.Option(256, "--queue-size", min=1, help="ASR 与翻译之间的队列长度，翻译跟不上时 ASR 会暂停"),
+    use_asr_cache: bool = typer.Option(True, "--asr-cache/--no-asr-cache", help="使用共享 ASR 缓存，命中时跳过识别直接翻译"),
+    words: bool = typer.Option(False, "--words", help="请求逐词时间戳，并按标点、停顿、时长和字数重新分句（替代 Whisper 的原始分段）"),
+    max_cue_duration: int = typer.Option(7000, "--max-cue-duration", min=1000, help="重新分句时每条字幕的最长时长（毫秒，配合 --words）"),
+    max_cue_chars: int = typer.Option(84, "--max-cue-chars", min=10, help="重新分句时每条字幕的最多字符数（配合 --words）"),
+    split_pause: int = typer.Option(600, "--split-pause", min=0, help="词间停顿达到该值（毫秒）时断句（配合 --words）"),
+    no_verify_ssl: bool = typer.Option(False, "--no-verify-ssl", help="禁用SSL证书验证"),
+    force: bool = typer.Option(False, "--force", help="强制重新生成，即使文件已存在"),
+):
+    """边识别边翻译：ASR 产出的字幕经有界队列送入翻译，批次凑满即发送，译文按顺序写出。
 
-        # 保存 SRT 文件
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(srt_content)
+    输出与分步执行相同：work/subs/asr.<asr-lang>.srt 与 work/subs/asr.<lang>.srt。
+    """
+    wp = ensure_workdir(workdir / video_id)
+    console.print(f"视频 ID: {video_id}")
+    media = _resolve_media(wp, input_file)
 
-        console.print(f"[green]完成[/green] ASR 字幕已生成: {output_file}")
-        console.print(f"[info]检测到语言: {info.language} (概率: {info.language_probability:.2f})")
+    asr_out = wp.subs_dir / f"asr.{asr_lang}.srt"
+    tr_out = wp.subs_dir / f"asr.{lang}.srt"
+    if tr_out.exists() and not force:
+        console.print(f"[green]完成[/green] 翻译字幕已存在: {tr_out}")
+        return
+    if asr_out.exists() and not force:
+        console.print(f"[yellow]提示[/yellow]: ASR 字幕已存在，直接使用 translate-subs 即可: {asr_out}")
+        raise typer.Exit(1)
 
+    input_path = _prepare_audio(wp, media)
+    # 流水线里只有一个识别进程，profile 中的 workers 不适用
+    compute_type, cpu_threads, _ = _asr_settings(model, compute_type, cpu_threads, None, True)
+    asr_batch = asr_batch_size if batched else 0
+    segmentation = Segmentation(max_cue_duration, max_cue_chars, split_pause) if words else None
+    params = asr_params(model=model, lang=asr_lang, compute_type=compute_type, batch_size=asr_batch, segmentation=segmentation)
+    fingerprint = pcm_fingerprint(wp.audio_pcm, wp.audio_meta)
+    key = asr_cache_key(fingerprint, params)
+    asr_cache = ASRCache() if use_asr_cache else None
+    cached = asr_cache.get(key) if asr_cache is not None else None
+
+    console.print(f"ASR: {model} ({asr_lang}) -> {asr_out}")
+    if cached is not None:
+        console.print(f"ASR 缓存命中，跳过识别: {cached}")
+    console.print(f"翻译: {backend}/{llm_model or '默认'} ({lang}) -> {tr_out}")
+    console.print(f"批次: {batch_tokens} tokens / {batch_items} 条，并发 {concurrency}，队列 {queue_size}")
+
+    if use_cache is None:
+        use_cache = YouDoubConfig().enable_translation_cache
+    try:
+        translator = get_translator(
+            name=backend,
+            api_key=api_key,
+            api_url=api_url,
+            verify_ssl=not no_verify_ssl,
+            model=llm_model,
+            requests_per_sec=rps,
+            tokens_per_min=tpm,
+            max_concurrency=concurrency,
+            keep_alive=keep_alive,
+            num_ctx=num_ctx,
+        )
+        cache = TranslationCache(wp.translation_cache) if use_cache else None
+        if cached is not None:
+            asr_cache.restore(key, asr_out)
+
+            def produce(emit):
+                count = 0
+                for cue in iter_cues(asr_out):
+                    emit(cue)
+                    count += 1
+                return {"segments": count}
+        else:
+            console.print(f"正在加载模型: {model}")
+            model_instance = load_model(model, model_dir, compute_type=compute_type, cpu_threads=cpu_threads)
+
+            def produce(emit):
+                return transcribe_to_srt(
+                    model_instance,
+                    input_path,
+                    asr_out,
+                    asr_lang,
+                    batch_size=asr_batch,
+                    on_cue=emit,
+                    segmentation=segmentation,
+                )
+
+        asr_result, stats = run_pipeline(
+            produce,
+            lambda cues: translate_cue_stream(
+                translator,
+                cues,
+                tr_out,
+                lang,
+                batch_tokens=batch_tokens,
+                batch_output_tokens=batch_output_tokens,
+                tokenizer=tokenizer,
+                max_items_per_batch=batch_items,
+                concurrency=concurrency,
+                cache=cache,
+            ),
+            maxsize=queue_size,
+        )
     except Exception as e:
-        console.print(f"[red]错误[/red] ASR 处理失败: {e}")
+        console.print(f"[red]错误[/red] 识别或翻译失败: {e}")
         raise typer.Exit(1)
 
+    write_provenance(asr_out, key, fingerprint, params)
+    if asr_cache is not None and cached is None:
+        asr_cache.put(key, asr_out, params)
+    console.print(f"[green]完成[/green] ASR 字幕: {asr_out} ({asr_result['segments']} 条)")
+    console.print(f"[green]完成[/green] 翻译字幕: {tr_out} ({stats['api_calls']} 次请求，缓存命中 {stats['cache_hits']})")
+
+
+@app.command("asr-bench")
+def asr_bench(
+    video_id: str = typer.Option(..., "--video-id", "-v", help="取校准片段的视频 ID"),
+    workdir: Path = typer.Option(Path(os.getenv("YOUDOUB_WORKDIR", "./work")), "--workdir", "-w", help="工作目录"),
+    input_file: str = typer.Option(None, "--input", "-i", help="输入音频/视频文件路径（默认为音频流文件或 work/video.mp4）"),
+    lang: str = typer.Option("en", "--lang", help="ASR 语言"),
+    model: str = typer.Option("medium", "--model", "-m", help="Whisper 模型（每个模型分别测试、分别记录）"),
+    model_dir: str = typer.Option(None, "--model-dir", help="模型下载目录（默认为 ./models）"),
+    clip_seconds: int = typer.Option(60, "--clip", min=5, help="校准片段长度（秒）"),
+    offset_seconds: int = typer.Option(0, "--offset", min=0, help="校准片段起点（秒），宜选在有人声的位置"),
+    compute_types: str = typer.Option(",".join(CPU_COMPUTE_TYPES), "--compute-types", help="参与比较的计算精度，逗号分隔"),
+    max_workers: int = typer.Option(4, "--max-workers", min=1, help="参与比较的最大进程数"),
+    batched: bool = typer.Option(False, "--batched", help="以批量推理测试（与之后 yt asr --batched 一致时才有参考意义）"),
+    batch_size: int = typer.Option(8, "--batch-size", min=1, help="批量推理每批的音频块数（配合 --batched）"),
+    save: bool = typer.Option(True, "--save/--no-save", help="把最快设置写入本机 profile，yt asr 自动使用"),
+):
+    """在一段校准音频上比较 compute_type / 线程数 / 进程数的组合，记录每个模型最快的设置。"""
+    wp = ensure_workdir(workdir / video_id)
+    pcm = _prepare_audio(wp, _resolve_media(wp, input_file))
+    candidates = candidate_settings(
+        os.cpu_count() or 1,
+        [ct.strip() for ct in compute_types.split(",") if ct.strip()],
+        max_workers=max_workers,
+    )
+    console.print(f"模型: {model}，校准片段 {clip_seconds}s（起点 {offset_seconds}s），共 {len(candidates)} 种组合")
+
+    def report(row) -> None:
+        setting = f"compute_type={row['compute_type']:<13} cpu_threads={row['cpu_threads']:<3} workers={row['workers']}"
+        if "error" in row:
+            console.print(f"  {setting}  [red]失败[/red] {row['error']}")
+        else:
+            console.print(f"  {setting}  {row['speed']:.2f}x 实时")
+
+    try:
+        tuned = autotune(
+            pcm,
+            model=model,
+            lang=lang,
+            clip_seconds=clip_seconds,
+            offset_seconds=offset_seconds,
+            model_dir=model_dir,
+            batch_size=batch_size if batched else 0,
+            candidates=candidates,
+            progress=report,
+        )
+    except Exception as e:
+        console.print(f"[red]错误[/red] 测试失败: {e}")
+        raise typer.Exit(1)
+
+    best = tuned["best"]
+    console.print(
+        f"[green]最快[/green] compute_type={best['compute_type']} cpu_threads={best['cpu_threads']} "
+        f"workers={best['workers']} ({best['speed']:.2f}x 实时)"
+    )
+    if save:
+        console.print(f"[green]完成[/green] 已写入 profile: {save_profile(model, tuned)}")
+    else:
+        console.print(f"未写入 profile（{profile_path()}）")
+
 
 @app.command("monitor-models")
 def monitor_models(
@@ -274,47 +649,6 @@ def monitor_models(
     console.print(f"最终目录大小: {format_size(final_size)}")
 
 
-def format_timestamp(seconds: float) -> str:
-    """将秒数格式化为 SRT 时间戳格式 (HH:MM:SS,mmm)"""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    milliseconds = int((seconds % 1) * 1000)
-
-    return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
-
-
-def _parse_srt(path: Path) -> List[dict]:
-    """Very small SRT parser returning list of {index,start,end,text} preserving order."""
-    text = path.read_text(encoding="utf-8", errors="ignore")
-    parts = [p.strip() for p in text.split("\n\n") if p.strip()]
-    out: List[dict] = []
-    for part in parts:
-        lines = part.splitlines()
-        if len(lines) < 2:
-            continue
-        idx = lines[0].strip()
-        times = lines[1].strip()
-        body = "\n".join(l.strip() for l in lines[2:]).strip()
-        if "-->" not in times:
-            # malformed; skip
-            continue
-        start, end = [t.strip() for t in times.split("-->")]
-        out.append({"index": idx, "start": start, "end": end, "text": body})
-    return out
-
-
-def _write_srt_entries(path: Path, entries: List[dict]) -> None:
-    parts: List[str] = []
-    for e in entries:
-        parts.append(str(e["index"]))
-        parts.append(f"{e['start']} --> {e['end']}")
-        parts.append(e["text"])
-        parts.append("")  # blank line
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text("\n".join(parts), encoding="utf-8")
-
-
 # 翻译字幕命令：使用新的翻译子模块
 @app.command("translate-subs")
 def translate_subs(
@@ -323,15 +657,27 @@ def translate_subs(
     source: str = typer.Option(None, "--source", "-i", help="输入 SRT 文件（默认 work/subs/asr.en.srt）"),
     lang: str = typer.Option(..., "--lang", "-l", help="目标语言代码，例如 zh-CN"),
     backend: str = typer.Option("deepseek", "--backend", help="翻译后端: deepseek|ollama|openai"),
-    model: str = typer.Option("deepseek-chat", "--model", help="DeepSeek 模型名称: deepseek-chat|deepseek-reasoner"),
+    model: str = typer.Option(None, "--model", help="模型名称（deepseek 默认 deepseek-chat；ollama/openai 必填）"),
     api_key: str = typer.Option(None, "--api-key", help="后端 API key（可用环境变量代替）"),
-    batch_size: int = typer.Option(30000, "--batch-size", help="每批最大字符数（DeepSeek API 推荐 30000）"),
-    force: bool = typer.Option(False, "--force", help="强制覆盖已存在的输出文件"),
+    api_url: str = typer.Option(None, "--api-url", help="后端地址（ollama 默认 http://localhost:11434，openai 默认读取 OPENAI_BASE_URL）"),
+    keep_alive: str = typer.Option(None, "--keep-alive", envvar="OLLAMA_KEEP_ALIVE", help="Ollama 模型常驻时长（默认 30m，-1 表示不卸载）"),
+    num_ctx: int = typer.Option(None, "--num-ctx", envvar="OLLAMA_NUM_CTX", help="Ollama 上下文长度（需大于 batch-tokens 与 batch-output-tokens 之和）"),
+    batch_size: int = typer.Option(30000, "--batch-size", help="每批最大字符数（仅在 --batch-tokens 0 时使用）"),
+    batch_tokens: int = typer.Option(16000, "--batch-tokens", help="每批输入 token 预算，0 表示改用按字符数分批"),
+    batch_output_tokens: int = typer.Option(7000, "--batch-output-tokens", help="每批预计输出 token 上限（需低于模型最大输出长度）"),
+    tokenizer: str = typer.Option("heuristic", "--tokenizer", help="token 估算方式: heuristic 或 tiktoken 编码名（如 cl100k_base）"),
+    force: bool = typer.Option(False, "--force", help="强制覆盖已存在的输出文件，并丢弃未完成的断点"),
     out: str = typer.Option(None, "--out", help="输出 SRT 路径，默认 work/subs/asr.<lang>.srt"),
     no_verify_ssl: bool = typer.Option(False, "--no-verify-ssl", help="禁用SSL证书验证（用于解决SSL连接问题）"),
     whole_file: bool = typer.Option(False, "--whole-file", help="一次性提交整个字幕文件进行翻译（获得更好上下文理解）"),
+    stream: bool = typer.Option(False, "--stream", help="整文件模式下流式接收译文，逐条写入输出文件（中断后可续跑）"),
     merge_timelines: bool = typer.Option(False, "--merge-timelines", help="合并过短的时间轴片段"),
     min_duration: int = typer.Option(1000, "--min-duration", help="最短字幕持续时间（毫秒），用于时间轴合并，默认 1000ms"),
+    dedupe_rolling: bool = typer.Option(None, "--dedupe-rolling/--no-dedupe-rolling", help="去除 YouTube 自动字幕的滚动重复（默认自动检测）"),
+    concurrency: int = typer.Option(1, "--concurrency", "-j", min=1, help="同时进行的批次翻译请求数上限（分批模式，遇到限流时自动收缩）"),
+    rps: float = typer.Option(None, "--rps", envvar="YOUDOUB_LLM_RPS", help="后端请求速率上限（次/秒，仅在本进程内生效；多个 youdoub 进程共用一个 key 时需按进程数分摊）"),
+    tpm: int = typer.Option(None, "--tpm", envvar="YOUDOUB_LLM_TPM", help="后端 token 速率上限（tokens/分钟，仅在本进程内生效；多个进程时需分摊）"),
+    use_cache: bool = typer.Option(None, "--cache/--no-cache", help="使用翻译缓存 work/cache/translation.jsonl（默认读取 YOUDOUB_ENABLE_TRANSLATION_CACHE）"),
 ):
     # Translate SRT subtitles in batches and write translated SRT.
     # Compute target workspace path
@@ -360,11 +706,24 @@ def translate_subs(
         return
 
     console.print(f"开始翻译字幕: {input_path} -> {out_path}")
-    console.print(f"目标语言: {lang}, 后端: {backend}, 模型: {model}, batch_size_chars: {batch_size}")
+    if batch_tokens:
+        console.print(f"目标语言: {lang}, 后端: {backend}, 模型: {model or '默认'}, batch_tokens: {batch_tokens}/{batch_output_tokens}")
+    else:
+        console.print(f"目标语言: {lang}, 后端: {backend}, 模型: {model or '默认'}, batch_size_chars: {batch_size}")
     if whole_file:
-        console.print("[blue]使用模式[/blue]: 一次性提交整个字幕文件")
+        console.print("[blue]使用模式[/blue]: 一次性提交整个字幕文件" + ("（流式写入）" if stream else ""))
+    elif stream:
+        console.print("[yellow]提示[/yellow]: --stream 仅在 --whole-file 模式下生效")
     if merge_timelines:
         console.print(f"[blue]时间轴合并[/blue]: 启用，最短持续时间 {min_duration}ms")
+    if use_cache is None:
+        use_cache = YouDoubConfig().enable_translation_cache
+    if use_cache:
+        console.print(f"[blue]翻译缓存[/blue]: {wp.translation_cache}")
+    if concurrency > 1 and not whole_file:
+        console.print(f"[blue]并发翻译[/blue]: {concurrency} 个批次同时请求")
+    if backend == "ollama" and concurrency > 1:
+        console.print("[yellow]提示[/yellow]: 请确保 Ollama 服务端 OLLAMA_NUM_PARALLEL 不小于 --concurrency")
     try:
         translate_srt_file(
             input_path=input_path,
@@ -372,12 +731,26 @@ def translate_subs(
             target_lang=lang,
             backend=backend,
             api_key=api_key,
+            api_url=api_url,
             model=model,
+            keep_alive=keep_alive,
+            num_ctx=num_ctx,
             batch_size_chars=batch_size,
             verify_ssl=not no_verify_ssl,
             whole_file=whole_file,
             merge_timelines=merge_timelines,
-            min_duration_ms=min_duration
+            min_duration_ms=min_duration,
+            concurrency=concurrency,
+            cache_path=wp.translation_cache if use_cache else None,
+            journal_dir=wp.cache_dir,
+            resume=not force,
+            stream=stream,
+            batch_tokens=batch_tokens or None,
+            batch_output_tokens=batch_output_tokens,
+            tokenizer=tokenizer,
+            dedupe_rolling=dedupe_rolling,
+            requests_per_sec=rps,
+            tokens_per_min=tpm,
         )
     except Exception as e:
         console.print(f"[red]错误[/red] 翻译失败: {e}")
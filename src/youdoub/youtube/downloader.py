@@ -4,6 +4,9 @@ import json
 from pathlib import Path
 import yt_dlp
 
+from .info import InfoCache, fetch_info
+from .subtitles import downloaded_subtitle, normalize_subtitle
+
 
 class MetadataJSONEncoder(json.JSONEncoder):
     """自定义 JSON 编码器，用于处理 yt-dlp 元数据对象。"""
@@ -23,10 +26,11 @@ class MetadataJSONEncoder(json.JSONEncoder):
 
 
 
-def download_youtube_video(*, url: str, video_out: Path, meta_out: Path, force: bool = False, download_subs: bool = True, sub_lang: str = "en", keep_separate_streams: bool = False) -> None:
+def download_youtube_video(*, url: str, video_out: Path, meta_out: Path, force: bool = False, download_subs: bool = True, sub_lang: str = "en", keep_separate_streams: bool = False, video_id: str | None = None, info: dict | None = None, info_cache: InfoCache | None = None) -> None:
     """下载 YouTube 视频（合并的）、元数据和字幕。
 
-    使用 yt-dlp Python API。
+    使用 yt-dlp Python API。视频信息只提取一次（或取自 info_cache），
+    下载、字幕和 meta.json 都复用这一份；下载失败时也不再重新提取。
 
     参数:
         url: YouTube 视频 URL
@@ -36,6 +40,9 @@ def download_youtube_video(*, url: str, video_out: Path, meta_out: Path, force:
         download_subs: 是否下载字幕
         sub_lang: 字幕语言（默认：'en'）
         keep_separate_streams: 是否保留单独的音频和视频流文件
+        video_id: 视频 ID，用于查找 info_cache
+        info: 调用方已提取的视频信息（sanitize 后），直接复用
+        info_cache: 视频信息缓存
     """
     video_out.parent.mkdir(parents=True, exist_ok=True)
 
@@ -47,11 +54,7 @@ def download_youtube_video(*, url: str, video_out: Path, meta_out: Path, force:
     if download_subs:
         subs_dir = video_out.parent / "subs"
         subs_dir.mkdir(parents=True, exist_ok=True)
-        sub_files = [
-            subs_dir / f"source.{sub_lang}.srt",
-            subs_dir / f"source.{sub_lang}.vtt"
-        ]
-        need_subs = not any(sub_file.exists() for sub_file in sub_files) or force
+        need_subs = not (subs_dir / f"source.{sub_lang}.srt").exists() or force
 
     # 如果不需要下载任何内容，跳过
     if not need_video and not need_meta and not need_subs:
@@ -93,14 +96,14 @@ def download_youtube_video(*, url: str, video_out: Path, meta_out: Path, force:
             'writesubtitles': True,           # 下载人工字幕
             'writeautomaticsub': True,        # 下载自动生成的字幕
             'subtitleslangs': [sub_lang],     # 字幕语言
-            'subtitlesformat': 'srt',         # 字幕格式
+            'subtitlesformat': 'vtt/srt',    # YouTube 不提供 srt，下载 vtt 后在本地转换
         })
 
     # 设置输出模板（必须在字幕选项之后）
     if download_subs:
         ydl_opts['outtmpl'] = {
             'default': str(video_out),    # 视频输出
-            'subtitle': str(subs_dir / f'source.{sub_lang}.%(ext)s'),  # 字幕输出
+            'subtitle': str(subs_dir / 'source.%(ext)s'),  # 字幕输出（yt-dlp 追加 .<lang>.<ext>）
         }
     else:
         ydl_opts['outtmpl'] = str(video_out)  # 仅视频输出
@@ -108,39 +111,56 @@ def download_youtube_video(*, url: str, video_out: Path, meta_out: Path, force:
     print(f"使用 yt-dlp Python API 下载: {url}")
     print(f"输出: {video_out}")
 
-    try:
-        # 下载视频（以及需要的字幕和流文件）
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-            # 保存元数据
-            meta_out.write_text(json.dumps(info, ensure_ascii=False, indent=2, cls=MetadataJSONEncoder), encoding="utf-8")
-            print(f"成功下载视频和元数据")
-            if download_subs and need_subs:
-                print(f"成功下载字幕")
-            if keep_separate_streams:
-                print(f"保留了单独的音频和视频流文件")
-
-    except yt_dlp.DownloadError as e:
-        print(f"下载失败: {e}")
-        # 回退：尝试在不下载的情况下获取元数据
-        try:
-            with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}) as ydl:
-                info = ydl.extract_info(url, download=False)
-                fallback_meta = {
-                    "webpage_url": url,
-                    "_warning": f"视频下载失败: {e}",
-                    "_fallback_metadata": True,
-                    **info
-                }
-                meta_out.write_text(json.dumps(fallback_meta, ensure_ascii=False, indent=2, cls=MetadataJSONEncoder), encoding="utf-8")
-                print("保存了回退元数据（未下载视频）")
-        except Exception as meta_e:
-            print(f"元数据提取也失败了: {meta_e}")
-            fallback_meta = {
-                "webpage_url": url,
-                "_warning": f"下载和元数据提取都失败了。下载错误: {e}，元数据错误: {meta_e}",
-                "_yt_dlp_python_api": True,
-            }
-            meta_out.write_text(json.dumps(fallback_meta, ensure_ascii=False, indent=2, cls=MetadataJSONEncoder), encoding="utf-8")
-            print("保存了最小回退元数据")
-
+    # 缓存或调用方传入的信息中媒体直链可能已失效，失败时重新提取一次
+    reused = info is not None or (info_cache is not None and info_cache.get(video_id) is not None)
+    error = None
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        for attempt in range(2 if reused else 1):
+            try:
+                if info is None:
+                    info = fetch_info(ydl, url, video_id, info_cache)
+                # 下载视频（以及需要的字幕和流文件），不再访问视频页面
+                result = ydl.process_ie_result(dict(info), download=True)
+            except (yt_dlp.DownloadError, yt_dlp.utils.ReExtractInfo) as e:
+                error = e
+                print(f"下载失败: {e}")
+                if attempt == 0 and reused:
+                    print("重新提取视频信息后重试")
+                    if info_cache is not None and video_id:
+                        info_cache.evict(video_id)
+                    info = None
+                continue
+            error = None
+            break
+
+    if error is None:
+        # 保存元数据
+        meta_out.write_text(json.dumps(result, ensure_ascii=False, indent=2, cls=MetadataJSONEncoder), encoding="utf-8")
+        print(f"成功下载视频和元数据")
+        if download_subs and need_subs:
+            sub_file = downloaded_subtitle(result, subs_dir, sub_lang)
+            if sub_file is not None:
+                count = normalize_subtitle(sub_file, subs_dir / f"source.{sub_lang}.srt")
+                print(f"成功下载字幕: source.{sub_lang}.srt ({count} 条)")
+            else:
+                print(f"未找到 {sub_lang} 字幕")
+        if keep_separate_streams:
+            print(f"保留了单独的音频和视频流文件")
+    elif info is not None:
+        # 回退：用已提取的信息保存元数据，无需再次请求
+        fallback_meta = {
+            "webpage_url": url,
+            "_warning": f"视频下载失败: {error}",
+            "_fallback_metadata": True,
+            **info
+        }
+        meta_out.write_text(json.dumps(fallback_meta, ensure_ascii=False, indent=2, cls=MetadataJSONEncoder), encoding="utf-8")
+        print("保存了回退元数据（未下载视频）")
+    else:
+        fallback_meta = {
+            "webpage_url": url,
+            "_warning": f"下载和元数据提取都失败了: {error}",
+            "_yt_dlp_python_api": True,
+        }
+        meta_out.write_text(json.dumps(fallback_meta, ensure_ascii=False, indent=2, cls=MetadataJSONEncoder), encoding="utf-8")
+        print("保存了最小回退元数据")
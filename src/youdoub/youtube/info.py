@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ..paths import cache_root
+
+# 信息中的媒体直链约 6 小时后失效，缓存时长需远小于此
+DEFAULT_INFO_TTL = int(os.getenv("YOUDOUB_INFO_TTL", "3600"))
+
+
+class InfoCache:
+    """yt-dlp info dicts on disk, one ``<video id>.json`` per video, valid for ``ttl`` seconds.
+
+    Entries are stored sanitized (``YoutubeDL.sanitize_info``), the same form
+    as ``--write-info-json``, so they can be fed back to
+    ``YoutubeDL.process_ie_result`` to download without extracting again.
+    ``ttl <= 0`` disables the cache.
+    """
+
+    def __init__(self, root: Optional[Path] = None, ttl: int = DEFAULT_INFO_TTL):
+        self.root = root or cache_root() / "yt-info"
+        self.ttl = ttl
+
+    def _path(self, video_id: str) -> Path:
+        return self.root / f"{video_id}.json"
+
+    def get(self, video_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not video_id or self.ttl <= 0:
+            return None
+        path = self._path(video_id)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl:
+                return None
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def put(self, info: Dict[str, Any]) -> None:
+        if self.ttl <= 0 or not info.get("id"):
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(info["id"])
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(info, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(path)
+
+    def evict(self, video_id: str) -> None:
+        self._path(video_id).unlink(missing_ok=True)
+
+
+def fetch_info(ydl, url: str, video_id: Optional[str] = None, cache: Optional[InfoCache] = None) -> Dict[str, Any]:
+    """Info for ``url`` from ``cache`` when fresh, else one ``extract_info(download=False)`` call (then cached)."""
+    info = cache.get(video_id) if cache is not None else None
+    if info is not None:
+        print(f"使用缓存的视频信息: {video_id}")
+        return info
+    info = ydl.sanitize_info(ydl.extract_info(url, download=False))
+    if cache is not None:
+        cache.put(info)
+    return info
@@ -1,27 +1,56 @@
 from __future__ import annotations
 
-import shutil
 from pathlib import Path
 
-from ..utils.run import run_cmd
+import yt_dlp
+
+from ..subtitles.srt import CueWriter, iter_cues
+from ..subtitles.vtt import vtt_to_srt
 
 
 def _pick_downloaded_sub(workdir: Path, lang: str) -> Path | None:
     """Pick a downloaded subtitle file from yt-dlp output.
 
-    We download into workdir/subs with a fixed template; yt-dlp still appends
-    extensions (.vtt/.srt) depending on availability.
+    Only used when yt-dlp did not report the file it wrote; the normalized
+    ``source.<lang>.srt`` itself is never picked.
     """
     subs_dir = workdir / "subs"
+    normalized = subs_dir / f"source.{lang}.srt"
     candidates = sorted(
-        [
-            *subs_dir.glob(f"source.{lang}*.vtt"),
-            *subs_dir.glob(f"source.{lang}*.srt"),
-        ]
+        p
+        for p in [*subs_dir.glob(f"source.{lang}*.vtt"), *subs_dir.glob(f"source.{lang}*.srt")]
+        if p != normalized
     )
     return candidates[0] if candidates else None
 
 
+def downloaded_subtitle(info: dict, subs_dir: Path, lang: str) -> Path | None:
+    """Locate the subtitle file yt-dlp wrote for ``lang`` with the ``source.%(ext)s`` template.
+
+    The ``filepath`` yt-dlp records may still point at the temporary location
+    before its files were moved, so the final name is rebuilt from the format.
+    """
+    sub = (info.get("requested_subtitles") or {}).get(lang)
+    if not sub:
+        return None
+    path = subs_dir / f"source.{lang}.{sub.get('ext', 'vtt')}"
+    return path if path.exists() else None
+
+
+def normalize_subtitle(src: Path, dst: Path) -> int:
+    """Convert a downloaded VTT/SRT file to a clean SRT in-process; returns the cue count."""
+    suffix = src.suffix.lower()
+    if suffix == ".vtt":
+        return vtt_to_srt(src, dst)
+    if suffix != ".srt":
+        raise RuntimeError(f"Unsupported subtitle format: {src.name}")
+    tmp = dst.with_name(dst.name + ".part")
+    with CueWriter(tmp) as writer:
+        writer.write_all(iter_cues(src))
+    tmp.replace(dst)
+    return writer.count
+
+
 def download_youtube_subtitles(
     *,
     url: str,
@@ -30,10 +59,12 @@ def download_youtube_subtitles(
     fallback_auto: bool = True,
     force: bool = False,
 ) -> Path:
-    """Download subtitles via yt-dlp.
+    """Download subtitles with one in-process yt-dlp call and normalize them to SRT.
 
-    Tries human subtitles first, then optionally falls back to auto subtitles.
-    Returns path to the downloaded subtitle file.
+    Human and auto subtitles are requested together: yt-dlp only falls back to
+    automatic captions for a language that has no human track, so a single
+    round trip covers both. VTT is converted locally.
+    Returns path to ``subs/source.<lang>.srt``.
     """
     subs_dir = workdir / "subs"
     subs_dir.mkdir(parents=True, exist_ok=True)
@@ -43,63 +74,26 @@ def download_youtube_subtitles(
     if normalized_srt.exists() and not force:
         return normalized_srt
 
-    # 1) human subtitles
-    base_args = [
-        "yt-dlp",
-        "--skip-download",
-        "--no-part",
-        "--sub-lang",
-        lang,
-        "--sub-format",
-        "vtt/srt",
-        "-o",
-        str(subs_dir / f"source.{lang}.%(ext)s"),
-        url,
-    ]
-
-    run_cmd([*base_args, "--write-subs"], check=False)
-    picked = _pick_downloaded_sub(workdir, lang)
-
-    # 2) fallback to auto
-    if picked is None and fallback_auto:
-        run_cmd([*base_args, "--write-auto-subs"], check=False)
-        picked = _pick_downloaded_sub(workdir, lang)
-
+    # yt-dlp 会在模板基础上追加 .<lang>.<ext>，得到 source.<lang>.vtt
+    ydl_opts = {
+        "skip_download": True,
+        "nopart": True,
+        "quiet": True,
+        "no_warnings": True,
+        "writesubtitles": True,
+        "writeautomaticsub": fallback_auto,
+        "subtitleslangs": [lang],
+        "subtitlesformat": "vtt/srt",
+        "outtmpl": {"default": str(subs_dir / "source.%(ext)s")},
+    }
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(url, download=True) or {}
+
+    picked = downloaded_subtitle(info, subs_dir, lang) or _pick_downloaded_sub(workdir, lang)
     if picked is None:
         raise FileNotFoundError(f"No subtitles found for lang={lang}.")
 
-    # Normalize to source.<lang>.srt
-    if picked.suffix.lower() == ".srt":
-        if picked != normalized_srt:
-            shutil.copyfile(picked, normalized_srt)
-    else:
-        # Convert vtt -> srt using yt-dlp's convert-subs if possible
-        # We'll call yt-dlp --convert-subs srt to regenerate as srt.
-        # NOTE: yt-dlp outputs alongside the original in the same dir.
-        run_cmd(
-            [
-                "yt-dlp",
-                "--skip-download",
-                "--no-part",
-                "--sub-lang",
-                lang,
-                "--sub-format",
-                "vtt",
-                "--convert-subs",
-                "srt",
-                "--write-subs",
-                "-o",
-                str(subs_dir / f"source.{lang}.%(ext)s"),
-                url,
-            ],
-            check=False,
-        )
-
-        # After conversion, try to find srt
-        srt_candidates = sorted(subs_dir.glob(f"source.{lang}*.srt"))
-        if not srt_candidates:
-            raise FileNotFoundError("Subtitle conversion to srt failed.")
-        shutil.copyfile(srt_candidates[0], normalized_srt)
-
+    kind = "人工字幕" if lang in (info.get("subtitles") or {}) else "自动字幕"
+    count = normalize_subtitle(picked, normalized_srt)
+    print(f"成功获取{kind}: {picked.name} -> {normalized_srt.name} ({count} 条)")
     return normalized_srt
-
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Tests for the cached PCM audio stage"""
+
+import os
+import wave
+
+import numpy as np
+
+from youdoub.asr.audio import ensure_pcm, load_audio, pcm_is_current
+from youdoub.paths import ensure_workdir
+
+
+def _write_wav(path, rate=44100, seconds=2):
+    t = np.arange(rate * seconds) / rate
+    stereo = np.stack([np.sin(2 * np.pi * 440 * t), np.sin(2 * np.pi * 220 * t)], axis=1) * 0.5
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes((stereo * 32767).astype("<i2").tobytes())
+
+
+def test_extract_once_and_memmap(tmp_path):
+    wp = ensure_workdir(tmp_path / "vid")
+    src = wp.root / "source.wav"
+    _write_wav(src)
+    pcm = ensure_pcm(wp, src)
+    audio = load_audio(pcm)
+    assert isinstance(audio, np.memmap) and audio.dtype == np.float32
+    assert len(audio) == 32000
+    assert pcm_is_current(wp.audio_pcm, wp.audio_meta, src)
+
+    # 已是最新时不重新解码
+    mtime = pcm.stat().st_mtime_ns
+    ensure_pcm(wp, src)
+    assert pcm.stat().st_mtime_ns == mtime
+
+    # 源文件变化后失效
+    _write_wav(src, seconds=3)
+    os.utime(src, ns=(mtime + 10**9, mtime + 10**9))
+    assert not pcm_is_current(wp.audio_pcm, wp.audio_meta, src)
+    assert len(load_audio(ensure_pcm(wp, src))) == 48000
+
+
+def test_cli_prepare_audio_goes_through_ensure_pcm(tmp_path, monkeypatch):
+    from youdoub.youtube import cli
+
+    wp = ensure_workdir(tmp_path / "vid")
+    src = wp.root / "source.wav"
+    _write_wav(src)
+    calls = []
+    monkeypatch.setattr(cli, "ensure_pcm", lambda wp, src, force=False: calls.append(force) or ensure_pcm(wp, src, force))
+    pcm = cli._prepare_audio(wp, src)
+    mtime = pcm.stat().st_mtime_ns
+    assert cli._prepare_audio(wp, src) == pcm and pcm.stat().st_mtime_ns == mtime
+    cli._prepare_audio(wp, src, force=True)
+    assert calls == [False, False, True]
+    assert pcm.stat().st_mtime_ns != mtime
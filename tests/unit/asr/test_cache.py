@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Tests for the shared ASR result cache"""
+
+import json
+
+import numpy as np
+
+from youdoub.asr.audio import pcm_fingerprint
+from youdoub.asr.cache import ASRCache, asr_cache_key, asr_params, read_provenance, write_provenance
+from youdoub.paths import cache_root
+
+
+def test_cache_root_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("YOUDOUB_CACHE_DIR", str(tmp_path / "c"))
+    assert cache_root() == tmp_path / "c"
+    monkeypatch.delenv("YOUDOUB_CACHE_DIR")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+    assert cache_root() == tmp_path / "xdg" / "youdoub"
+
+
+def test_key_depends_on_audio_and_decoding_params():
+    base = asr_params(model="small", lang="en")
+    key = asr_cache_key("a" * 64, base)
+    assert key == asr_cache_key("a" * 64, asr_params(model="small", lang="en"))
+    assert key != asr_cache_key("b" * 64, base)
+    assert key != asr_cache_key("a" * 64, asr_params(model="medium", lang="en"))
+    assert key != asr_cache_key("a" * 64, asr_params(model="small", lang="en", compute_type="int8"))
+    assert key != asr_cache_key("a" * 64, asr_params(model="small", lang="en", batch_size=8))
+    assert "log_progress" not in base["options"]
+
+
+def test_fingerprint_hashes_legacy_sidecar(tmp_path):
+    pcm = tmp_path / "audio.f32"
+    meta = tmp_path / "audio.f32.json"
+    np.arange(100, dtype=np.float32).tofile(pcm)
+    meta.write_text(json.dumps({"samples": 100}), encoding="utf-8")
+    fp = pcm_fingerprint(pcm, meta)
+    assert len(fp) == 64
+    assert json.loads(meta.read_text(encoding="utf-8"))["sha256"] == fp
+
+
+def test_put_restore_across_workspaces(tmp_path):
+    cache = ASRCache(tmp_path / "cache")
+    params = asr_params(model="small", lang="en")
+    key = asr_cache_key("f" * 64, params)
+
+    first = tmp_path / "w1" / "asr.en.srt"
+    first.parent.mkdir()
+    first.write_text("1\n00:00:00,000 --> 00:00:01,000\nhello\n\n", encoding="utf-8")
+    second = tmp_path / "w2" / "asr.en.srt"
+    second.parent.mkdir()
+
+    assert not cache.restore(key, second)
+    cache.put(key, first, params)
+    assert cache.restore(key, second)
+    assert second.read_text(encoding="utf-8") == first.read_text(encoding="utf-8")
+
+    write_provenance(second, key, "f" * 64, params)
+    assert read_provenance(second)["params"] == params
+    assert read_provenance(first) is None
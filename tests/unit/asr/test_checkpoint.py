@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Tests for checkpointed ASR output and --resume"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from youdoub.asr.cache import asr_params
+from youdoub.asr.transcribe import transcribe_to_srt
+from youdoub.subtitles.srt import parse_srt
+
+
+class CrashingModel:
+    """Yields one segment per second of audio; optionally dies after ``crash_after`` segments."""
+
+    def __init__(self, crash_after=None):
+        self.crash_after = crash_after
+        self.calls = []
+
+    def transcribe(self, audio, language=None, initial_prompt=None, **kwargs):
+        self.calls.append((len(audio), initial_prompt))
+
+        def segments():
+            for i in range(len(audio) // 16000):
+                if i == self.crash_after:
+                    raise RuntimeError("boom")
+                yield SimpleNamespace(start=i + 0.0, end=i + 0.5, text=f" s{i}")
+
+        return segments(), SimpleNamespace(language=language, language_probability=1.0)
+
+
+def test_resume_continues_after_last_segment(tmp_path):
+    pcm = tmp_path / "audio.f32"
+    np.zeros(16000 * 5, dtype=np.float32).tofile(pcm)
+    out = tmp_path / "asr.en.srt"
+
+    with pytest.raises(RuntimeError):
+        transcribe_to_srt(CrashingModel(crash_after=3), pcm, out, "en")
+    assert not out.exists()
+    assert [c.text for c in parse_srt(out.with_name("asr.en.srt.part"))] == ["s0", "s1", "s2"]
+
+    model = CrashingModel()
+    result = transcribe_to_srt(model, pcm, out, "en", resume=True)
+    # 从第 3 段结束（2.5s）处继续，提示词为最后两句
+    assert model.calls == [(16000 * 5 - 40000, "s1 s2")]
+    assert result["resumed"] == 3 and result["segments"] == 5
+    cues = parse_srt(out)
+    assert cues.texts == ["s0", "s1", "s2", "s0", "s1"]
+    assert list(cues.starts) == [0, 1000, 2000, 2500, 3500]
+    assert not out.with_name("asr.en.srt.part.json").exists()
+
+
+def test_resume_ignores_checkpoint_of_other_audio(tmp_path):
+    pcm = tmp_path / "audio.f32"
+    np.zeros(16000 * 3, dtype=np.float32).tofile(pcm)
+    out = tmp_path / "asr.en.srt"
+    with pytest.raises(RuntimeError):
+        transcribe_to_srt(CrashingModel(crash_after=2), pcm, out, "en")
+    np.zeros(16000 * 4, dtype=np.float32).tofile(pcm)
+    model = CrashingModel()
+    transcribe_to_srt(model, pcm, out, "en", resume=True)
+    assert model.calls == [(16000 * 4, None)]
+    assert len(parse_srt(out)) == 4
+
+
+def test_resume_ignores_checkpoint_of_other_params(tmp_path):
+    pcm = tmp_path / "audio.f32"
+    np.zeros(16000 * 4, dtype=np.float32).tofile(pcm)
+    out = tmp_path / "asr.en.srt"
+    small = asr_params(model="small", lang="en")
+    with pytest.raises(RuntimeError):
+        transcribe_to_srt(CrashingModel(crash_after=2), pcm, out, "en", params=small)
+
+    # 换模型后续跑从头开始，不拼接另一组参数的结果
+    model = CrashingModel()
+    transcribe_to_srt(model, pcm, out, "en", resume=True, params=asr_params(model="medium", lang="en"))
+    assert model.calls == [(16000 * 4, None)]
+
+    # 参数相同时照常续跑
+    with pytest.raises(RuntimeError):
+        transcribe_to_srt(CrashingModel(crash_after=2), pcm, out, "en", params=small)
+    model = CrashingModel()
+    transcribe_to_srt(model, pcm, out, "en", resume=True, params=asr_params(model="small", lang="en"))
+    assert model.calls[0][0] < 16000 * 4
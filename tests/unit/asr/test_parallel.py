@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""Tests for chunk planning and stitching in parallel ASR"""
+
+from youdoub.asr.parallel import plan_chunks, stitch_segments
+from youdoub.subtitles.srt import Cue
+
+
+def test_plan_chunks_cuts_inside_silences():
+    speech = [{"start": 0, "end": 40}, {"start": 60, "end": 90}, {"start": 100, "end": 250}, {"start": 270, "end": 300}]
+    assert plan_chunks(speech, 320, target=50) == [(0, 95), (95, 260), (260, 320)]
+    # 没有可切的静音时只有一块
+    assert plan_chunks([], 320, target=50) == [(0, 320)]
+    assert plan_chunks(speech[:1], 320, target=10) == [(0, 320)]
+
+
+def test_stitch_offsets_and_drops_boundary_echo():
+    chunks = [
+        (0, 5000, [Cue(0, 2000, "Hello there."), Cue(2000, 4900, "How are you?")]),
+        # 第二块开头重复了上一块最后一句，且时间略有重叠
+        (5000, 9000, [Cue(0, 300, "how are you"), Cue(200, 2500, "Fine."), Cue(3500, 4500, "Bye")]),
+    ]
+    out = list(stitch_segments(chunks))
+    assert [c.text for c in out] == ["Hello there.", "How are you?", "Fine.", "Bye"]
+    assert [(c.start, c.end) for c in out] == [(0, 2000), (2000, 4900), (5200, 7500), (8500, 9000)]
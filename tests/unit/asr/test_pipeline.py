@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Tests for the streaming ASR -> translation pipeline"""
+
+import threading
+import time
+
+import pytest
+
+from youdoub.asr.pipeline import PipelineStopped, run_pipeline
+from youdoub.subtitles.cache import TranslationCache
+from youdoub.subtitles.srt import Cue, parse_srt
+from youdoub.subtitles.translate import translate_cue_stream
+
+
+class UpperTranslator:
+    model = "fake"
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.requests = []
+
+    def translate(self, text, target_lang, prompt_template):
+        self.requests.append(text)
+        time.sleep(self.delay)
+        return "\n".join(f"{line.split('|', 1)[0]}|{line.split('|', 1)[1].upper()}" for line in text.splitlines())
+
+
+def produce_cues(n, seen):
+    def produce(emit):
+        for i in range(n):
+            emit(Cue(i * 1000, i * 1000 + 900, f"line {i}" if i % 7 else ""))
+            seen.append(i)
+        return n
+
+    return produce
+
+
+def test_batches_start_before_asr_finishes_and_keep_order(tmp_path):
+    seen, translator = [], UpperTranslator(delay=0.01)
+    out = tmp_path / "asr.zh-CN.srt"
+    first_request_at = []
+    orig = translator.translate
+
+    def spy(*args):
+        first_request_at.append(len(seen))
+        return orig(*args)
+
+    translator.translate = spy
+    produced, stats = run_pipeline(
+        produce_cues(50, seen),
+        lambda cues: translate_cue_stream(translator, cues, out, "zh-CN", max_items_per_batch=5, concurrency=3),
+        maxsize=4,
+    )
+    assert produced == 50
+    assert min(first_request_at) < 50
+    cues = parse_srt(out)
+    assert cues.texts == [f"LINE {i}" if i % 7 else "" for i in range(50)]
+    assert stats["api_calls"] == 9 and stats["cues"] == 50
+
+
+def test_cache_hits_skip_requests(tmp_path):
+    cache = TranslationCache(tmp_path / "translation.jsonl")
+    out = tmp_path / "out.srt"
+    run_pipeline(produce_cues(10, []), lambda cues: translate_cue_stream(UpperTranslator(), cues, out, "zh-CN", cache=cache))
+    translator = UpperTranslator()
+    _, stats = run_pipeline(produce_cues(12, []), lambda cues: translate_cue_stream(translator, cues, out, "zh-CN", cache=cache))
+    assert stats["cache_hits"] == 8 and len(translator.requests) == 1
+    assert translator.requests[0].splitlines() == ["1|line 10", "2|line 11"]
+
+
+def test_errors_propagate_both_ways(tmp_path):
+    def failing_producer(emit):
+        emit(Cue(0, 1000, "a"))
+        raise RuntimeError("asr crashed")
+
+    with pytest.raises(RuntimeError, match="asr crashed"):
+        run_pipeline(failing_producer, lambda items: list(items))
+
+    stopped = threading.Event()
+
+    def endless(emit):
+        try:
+            while True:
+                emit(Cue(0, 1000, "x"))
+        except PipelineStopped:
+            stopped.set()
+            raise
+
+    def failing_consumer(items):
+        next(items)
+        raise ValueError("translation failed")
+
+    with pytest.raises(ValueError):
+        run_pipeline(endless, failing_consumer, maxsize=2)
+    assert stopped.is_set()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Tests for rebuilding ASR cues from word timestamps"""
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from youdoub.asr.resegment import Segmentation, resegment, words_from_segments
+from youdoub.asr.transcribe import transcribe_to_srt
+from youdoub.subtitles.srt import Cue, parse_srt
+
+
+def timed(text, start=0, step=300, gap=0):
+    """One word every ``step`` ms (each lasting step - 50), starting at ``start``."""
+    out = []
+    for i, word in enumerate(text.split(" ")):
+        t = start + i * (step + gap)
+        out.append(Cue(t, t + step - 50, " " + word))
+    return out
+
+
+def test_breaks_on_sentence_end_and_pause():
+    words = timed("Hello there. How are you") + timed("Fine", start=5000)
+    cues = list(resegment(words))
+    assert [c.text for c in cues] == ["Hello there.", "How are you", "Fine"]
+    assert (cues[0].start, cues[0].end) == (0, 550)
+    assert (cues[1].start, cues[1].end) == (600, 1450)
+
+
+def test_overflow_cuts_back_to_clause_punctuation():
+    seg = Segmentation(max_duration_ms=60000, max_chars=30, pause_ms=1000)
+    words = timed("we went to the store, and then we bought some apples")
+    cues = list(resegment(words, seg))
+    assert [c.text for c in cues] == ["we went to the store,", "and then we bought some", "apples"]
+    assert all(len(c.text) <= 30 for c in cues)
+
+
+def test_duration_limit_without_punctuation():
+    seg = Segmentation(max_duration_ms=1000, max_chars=1000, pause_ms=1000)
+    cues = list(resegment(timed("a b c d e f g"), seg))
+    assert [c.text for c in cues] == ["a b c", "d e f", "g"]
+    assert all(c.duration <= 1000 for c in cues)
+
+
+def test_cjk_words_join_without_spaces():
+    words = [Cue(0, 200, "你好"), Cue(200, 400, "，"), Cue(400, 600, "世界"), Cue(600, 800, "。"), Cue(800, 1000, "再见")]
+    assert [c.text for c in resegment(words)] == ["你好，世界。", "再见"]
+
+
+class WordModel:
+    def transcribe(self, audio, language=None, word_timestamps=False, **kwargs):
+        assert word_timestamps
+        w = lambda s, e, t: SimpleNamespace(start=s, end=e, word=t)
+        segments = [
+            # Whisper 的分段在句中断开
+            SimpleNamespace(start=0.0, end=1.0, text=" One two", words=[w(0.0, 0.4, " One"), w(0.5, 1.0, " two")]),
+            SimpleNamespace(start=1.0, end=2.5, text=" three. Four", words=[w(1.1, 1.5, " three."), w(2.0, 2.5, " Four")]),
+        ]
+        return iter(segments), SimpleNamespace(language=language, language_probability=1.0)
+
+
+def test_transcribe_with_segmentation(tmp_path):
+    pcm = tmp_path / "audio.f32"
+    np.zeros(16000 * 3, dtype=np.float32).tofile(pcm)
+    out = tmp_path / "asr.en.srt"
+    result = transcribe_to_srt(WordModel(), pcm, out, "en", segmentation=Segmentation())
+    cues = parse_srt(out)
+    assert cues.texts == ["One two three.", "Four"]
+    assert list(cues.starts) == [0, 2000] and list(cues.ends) == [1500, 2500]
+    assert result["segments"] == 2
+
+    # 没有逐词时间的分段整体保留
+    plain = [SimpleNamespace(start=1.0, end=2.0, text=" Hi there", words=None)]
+    assert [(c.start, c.text) for c in words_from_segments(plain, 500)] == [(1500, " Hi there")]
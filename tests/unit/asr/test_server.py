@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Tests for the resident ASR server"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from youdoub.asr import client, server
+
+
+class FakeModel:
+    def transcribe(self, path, language=None, **kwargs):
+        segments = [SimpleNamespace(start=0.0, end=1.25, text=" hello"), SimpleNamespace(start=1.25, end=2.0, text=" world")]
+        return iter(segments), SimpleNamespace(language=language, language_probability=0.9)
+
+
+def test_pool_loads_once_and_evicts_lru(monkeypatch, tmp_path):
+    loads = []
+    monkeypatch.setattr(server, "load_model", lambda model, model_dir=None, **kwargs: loads.append(model) or FakeModel())
+    pool = server.ModelPool(max_models=2, model_dir=str(tmp_path))
+    pool.get("small")
+    pool.get("medium")
+    pool.get("small")
+    pool.get("large-v3")
+    assert loads == ["small", "medium", "large-v3"]
+    assert pool.loaded() == ["small", "large-v3"]
+    # 计算精度不同视为另一个模型实例
+    pool.get("small", compute_type="int8")
+    assert loads[-1] == "small" and pool.loaded() == ["large-v3", "small"]
+
+
+def test_loading_one_model_does_not_block_a_loaded_one(monkeypatch, tmp_path):
+    release = threading.Event()
+
+    def load(model, model_dir=None, **kwargs):
+        if model == "large-v3":
+            release.wait(5)
+        return FakeModel()
+
+    monkeypatch.setattr(server, "load_model", load)
+    pool = server.ModelPool(max_models=2, model_dir=str(tmp_path))
+    pool.get("small")
+    loader = threading.Thread(target=pool.get, args=("large-v3",))
+    loader.start()
+    time.sleep(0.1)
+    started = time.monotonic()
+    pool.get("small")
+    assert time.monotonic() - started < 1
+    release.set()
+    loader.join()
+    assert pool.loaded() == ["small", "large-v3"]
+
+
+@pytest.fixture
+def running(monkeypatch, tmp_path):
+    monkeypatch.setattr(server, "load_model", lambda model, model_dir=None, **kwargs: FakeModel())
+    monkeypatch.setenv("YOUDOUB_ASR_TOKEN", "secret")
+    srv = server.ASRServer("127.0.0.1", 0, server.ModelPool(model_dir=str(tmp_path)), "secret", tmp_path)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv, f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_requests_need_the_token_and_outputs_stay_under_root(running, tmp_path, monkeypatch):
+    srv, url = running
+    media = tmp_path / "video.mp4"
+    media.write_bytes(b"")
+    job = {"input": str(media), "output": str(tmp_path / "asr.en.srt"), "model": "tiny"}
+    assert httpx.post(f"{url}/transcribe", json=job).status_code == 401
+    assert httpx.post(f"{url}/shutdown", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.server_status(url) is not None
+
+    with pytest.raises(RuntimeError, match="工作目录"):
+        client.transcribe_remote(input_path=media, output_file=tmp_path / ".." / "escaped.srt", lang="en", model="tiny", url=url)
+    assert not (tmp_path.parent / "escaped.srt").exists()
+
+    # 未设置环境变量时从 serve 写入的令牌文件读取
+    monkeypatch.delenv("YOUDOUB_ASR_TOKEN")
+    monkeypatch.setenv("YOUDOUB_CACHE_DIR", str(tmp_path / "cache"))
+    assert server.read_token() is None
+    server._write_token("secret")
+    assert server.read_token() == "secret"
+    assert client.stop_server(url)
+
+
+def test_transcribe_over_http(running, tmp_path):
+    srv, url = running
+    try:
+        media = tmp_path / "video.mp4"
+        media.write_bytes(b"")
+        out = tmp_path / "asr.en.srt"
+        result = client.transcribe_remote(input_path=media, output_file=out, lang="en", model="tiny", url=url)
+        assert result["segments"] == 2 and result["language"] == "en"
+        assert out.read_text(encoding="utf-8").startswith("1\n00:00:00,000 --> 00:00:01,250\nhello\n")
+        assert client.server_status(url)["models"] == ["tiny"]
+    finally:
+        srv.shutdown()
+        srv.server_close()
+    assert client.server_status(url) is None
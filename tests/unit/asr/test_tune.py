@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Tests for the CPU ASR autotuner and its profile"""
+
+import os
+
+import numpy as np
+
+from youdoub.asr import tune
+from youdoub.asr.tune import candidate_settings, pick_best, save_profile, tuned_settings
+
+
+def test_candidates_split_cores_between_processes():
+    layouts = {(c["workers"], c["cpu_threads"]) for c in candidate_settings(8, ["int8"])}
+    assert layouts == {(1, 8), (2, 4), (4, 2), (1, 4)}
+    assert {c["workers"] for c in candidate_settings(2, ["int8"], max_workers=4)} == {1, 2}
+    assert len(candidate_settings(8, ["int8", "float32"])) == 8
+
+
+def test_pick_best_skips_failures_and_prefers_fewer_workers():
+    results = [
+        {"compute_type": "float16", "cpu_threads": 8, "workers": 1, "error": "unsupported"},
+        {"compute_type": "int8", "cpu_threads": 4, "workers": 2, "speed": 3.0},
+        {"compute_type": "int8", "cpu_threads": 8, "workers": 1, "speed": 3.0},
+        {"compute_type": "float32", "cpu_threads": 8, "workers": 1, "speed": 1.2},
+    ]
+    assert pick_best(results) == {"compute_type": "int8", "cpu_threads": 8, "workers": 1, "speed": 3.0}
+    assert pick_best(results[:1]) is None
+
+
+def test_autotune_times_clip_and_saves_profile(tmp_path, monkeypatch):
+    pcm = tmp_path / "audio.f32"
+    np.zeros(16000 * 100, dtype=np.float32).tofile(pcm)
+    calls = []
+
+    def fake_measure(pcm, start, end, **kw):
+        calls.append((start, end))
+        return {"int8": 4.0, "float32": 1.5}[kw["compute_type"]] * kw["workers"] / 2
+
+    monkeypatch.setattr(tune, "measure", fake_measure)
+    monkeypatch.setattr("faster_whisper.utils.download_model", lambda *a, **k: None)
+    tuned = tune.autotune(
+        pcm,
+        model=str(tmp_path),
+        lang="en",
+        clip_seconds=30,
+        offset_seconds=90,
+        model_dir=str(tmp_path / "models"),
+        candidates=candidate_settings(4, ["int8", "float32"], max_workers=2),
+    )
+    # 起点超出时回退，片段仍取满 30 秒
+    assert set(calls) == {(16000 * 70, 16000 * 100)}
+    assert tuned["best"] == {"compute_type": "int8", "cpu_threads": 2, "workers": 2, "speed": 4.0}
+
+    profile = tmp_path / "asr_profile.json"
+    save_profile("small", tuned, profile)
+    save_profile("medium", dict(tuned, best=dict(tuned["best"], workers=1)), profile)
+    assert tuned_settings("small", profile)["workers"] == 2
+    assert tuned_settings("medium", profile)["workers"] == 1
+    assert tuned_settings("large-v3", profile) is None
+
+    monkeypatch.setattr(os, "cpu_count", lambda: 999)
+    assert tuned_settings("small", profile) is None
+
+
+def test_asr_settings_apply_the_profile_only_as_a_whole(monkeypatch):
+    from youdoub.youtube import cli
+
+    entry = {"compute_type": "int8", "cpu_threads": 2, "workers": 4}
+    monkeypatch.setattr(cli, "tuned_settings", lambda model: entry)
+    # 多进程设置需显式选择；单进程时不采用按进程划分的线程数
+    assert cli._asr_settings("small", None, None, None, True) == ("int8", 0, 1)
+    assert cli._asr_settings("small", None, None, None, True, profile_workers=True) == ("int8", 2, 4)
+    # 指定了任一设置时不混入 profile
+    assert cli._asr_settings("small", None, 8, None, True) == ("default", 8, 1)
+    assert cli._asr_settings("small", None, None, 2, True, profile_workers=True) == ("default", 0, 2)
+    assert cli._asr_settings("small", None, None, None, False) == ("default", 0, 1)
+
+    monkeypatch.setattr(cli, "tuned_settings", lambda model: dict(entry, cpu_threads=8, workers=1))
+    assert cli._asr_settings("small", None, None, None, True) == ("int8", 8, 1)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Tests for time-overlap bilingual alignment"""
+
+from youdoub.subtitles.bilingual import align_cues, build_bilingual
+from youdoub.subtitles.srt import Cue, CueList
+
+
+def test_merged_translation_does_not_shift_later_cues():
+    en = CueList([Cue(0, 400, "a"), Cue(400, 1000, "b"), Cue(1000, 2000, "c"), Cue(2000, 3000, "d")])
+    zh = CueList([Cue(0, 1000, "甲乙"), Cue(1000, 2000, "丙"), Cue(2000, 3000, "丁")])
+    assert align_cues(en, zh) == [([0, 1], [0]), ([2], [1]), ([3], [2])]
+    out = build_bilingual(en, zh)
+    assert out.texts == ["甲乙\na b", "丙\nc", "丁\nd"]
+    assert list(out.starts) == [0, 1000, 2000]
+
+
+def test_split_translation_and_boundary_jitter():
+    en = CueList([Cue(0, 3000, "long"), Cue(3000, 4000, "next")])
+    # 第二条译文比原文早 50ms 开始，不应把两组连在一起
+    zh = CueList([Cue(0, 1500, "一"), Cue(1500, 2950, "二"), Cue(2950, 4000, "下")])
+    assert align_cues(en, zh) == [([0], [0, 1]), ([1], [2])]
+
+
+def test_unmatched_cues_keep_their_own_group():
+    en = CueList([Cue(0, 1000, "a"), Cue(5000, 6000, "b")])
+    zh = CueList([Cue(0, 1000, "甲"), Cue(8000, 9000, "多")])
+    out = build_bilingual(en, zh, translation_first=False)
+    assert out.texts == ["a\n甲", "b", "多"]
+
+
+def test_large_input_is_linear_enough():
+    n = 20000
+    en = CueList.from_columns(range(0, n * 1000, 1000), range(1000, n * 1000 + 1000, 1000), ["x"] * n)
+    zh = CueList.from_columns(range(0, n * 1000, 2000), range(2000, n * 1000 + 2000, 2000), ["y"] * (n // 2))
+    groups = align_cues(en, zh)
+    assert len(groups) == n // 2
+
+
+def test_rolling_source_does_not_chain_into_one_group():
+    # 滚动自动字幕：每条与下一条重叠；去重后的译文每条 1.5s
+    n = 40
+    en = CueList([Cue(k * 1500, k * 1500 + 3000, f"w{k}") for k in range(n)])
+    zh = CueList([Cue(k * 1500, k * 1500 + 1500, f"z{k}") for k in range(n)])
+    groups = align_cues(en, zh)
+    assert groups == [([k], [k]) for k in range(n)]
+    out = build_bilingual(en, zh)
+    assert len(out) == n and out.texts[3] == "z3\nw3"
+    assert all(out.ends[k] <= out.starts[k + 1] for k in range(n - 1))
+
+
+def test_translation_shifted_by_half_a_cue_pairs_one_to_one():
+    en = CueList([Cue(k * 1000, k * 1000 + 1000, f"w{k}") for k in range(10)])
+    zh = CueList([Cue(k * 1000 + 500, k * 1000 + 1500, f"z{k}") for k in range(10)])
+    groups = align_cues(en, zh)
+    assert len(groups) == 10
+    assert all(len(ga) == 1 and len(gb) == 1 for ga, gb in groups)
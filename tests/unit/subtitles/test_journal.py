@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Tests for resuming batch translation from the journal"""
+
+import re
+
+import pytest
+
+from youdoub.subtitles import translate as translate_mod
+from youdoub.subtitles.srt import Cue, CueList, parse_srt, write_srt
+from youdoub.utils.llm_adapters import Translator
+
+
+class CountingTranslator(Translator):
+    """``id|ZH:text`` replies; raises on call number ``fail_at`` (1-based)."""
+
+    model = "fake"
+
+    def __init__(self, fail_at=None):
+        self.fail_at = fail_at
+        self.calls = 0
+
+    def translate(self, text, target_lang, prompt_template):
+        self.calls += 1
+        if self.calls == self.fail_at:
+            raise RuntimeError("connection reset")
+        return "\n".join(f"{i}|ZH:{body}" for i, body in re.findall(r"^(\d+)\|(.*)$", text, flags=re.M))
+
+
+def run(tmp_path, monkeypatch, tr, resume=True):
+    monkeypatch.setattr(translate_mod, "get_translator", lambda **kw: tr)
+    translate_mod.translate_srt_file(
+        tmp_path / "in.srt", tmp_path / "out.srt", "zh",
+        batch_tokens=None, max_items_per_batch=1, journal_dir=tmp_path / "cache",
+        resume=resume, dedupe_rolling=False,
+    )
+
+
+def journals(tmp_path):
+    return list((tmp_path / "cache").glob("translate.*.journal.jsonl"))
+
+
+@pytest.fixture
+def source(tmp_path):
+    write_srt(tmp_path / "in.srt", CueList([Cue(i * 1000, i * 1000 + 900, f"w{i}") for i in range(6)]))
+
+
+def test_resume_after_failure_and_clear_on_success(tmp_path, monkeypatch, source):
+    with pytest.raises(RuntimeError):
+        run(tmp_path, monkeypatch, CountingTranslator(fail_at=4))
+    assert len(journals(tmp_path)) == 1
+
+    tr = CountingTranslator()
+    run(tmp_path, monkeypatch, tr)
+    # 前三批来自断点日志
+    assert tr.calls == 3
+    assert parse_srt(tmp_path / "out.srt").texts == [f"ZH:w{i}" for i in range(6)]
+    assert journals(tmp_path) == []
+
+
+def test_force_discards_journal(tmp_path, monkeypatch, source):
+    with pytest.raises(RuntimeError):
+        run(tmp_path, monkeypatch, CountingTranslator(fail_at=4))
+    tr = CountingTranslator()
+    run(tmp_path, monkeypatch, tr, resume=False)
+    assert tr.calls == 6
+    assert journals(tmp_path) == []
+
+
+def test_journal_ignored_when_dedupe_changes(tmp_path, monkeypatch):
+    rolling = CueList([
+        Cue(0, 2000, "the quick brown"),
+        Cue(1000, 3000, "the quick brown fox jumps"),
+        Cue(2000, 4000, "fox jumps over the lazy"),
+        Cue(3000, 5000, "over the lazy dog"),
+    ])
+    write_srt(tmp_path / "in.srt", rolling)
+    monkeypatch.setattr(translate_mod, "get_translator", lambda **kw: CountingTranslator(fail_at=3))
+    with pytest.raises(RuntimeError):
+        translate_mod.translate_srt_file(
+            tmp_path / "in.srt", tmp_path / "out.srt", "zh", batch_tokens=None, max_items_per_batch=1,
+            journal_dir=tmp_path / "cache", dedupe_rolling=True,
+        )
+    monkeypatch.setattr(translate_mod, "get_translator", lambda **kw: CountingTranslator())
+    translate_mod.translate_srt_file(
+        tmp_path / "in.srt", tmp_path / "out.srt", "zh", batch_tokens=None, max_items_per_batch=1,
+        journal_dir=tmp_path / "cache", dedupe_rolling=False,
+    )
+    assert parse_srt(tmp_path / "out.srt").texts == ["ZH:" + t for t in rolling.texts]
+
+
+class PreloadingTranslator(CountingTranslator):
+    def __init__(self):
+        super().__init__()
+        self.preloads = 0
+
+    def preload(self):
+        self.preloads += 1
+        raise RuntimeError("model not pulled")
+
+
+def test_preload_runs_once_and_failure_only_warns(tmp_path, monkeypatch, source):
+    tr = PreloadingTranslator()
+    run(tmp_path, monkeypatch, tr)
+    assert tr.preloads == 1
+    assert tr.calls == 6
+    assert parse_srt(tmp_path / "out.srt").texts == [f"ZH:w{i}" for i in range(6)]
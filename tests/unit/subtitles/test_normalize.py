@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""Tests for rolling auto-caption detection and dedupe"""
+
+from youdoub.subtitles.normalize import dedupe_rolling_captions, looks_like_rolling
+from youdoub.subtitles.srt import Cue, CueList
+
+ROLLING = CueList([
+    Cue(0, 3000, "the quick brown"),
+    Cue(1500, 4500, "the quick brown fox jumps"),
+    Cue(3000, 6000, "fox jumps over the lazy"),
+    Cue(4500, 7500, "over the lazy dog"),
+    Cue(6000, 7000, "over the lazy dog"),
+])
+
+
+def test_looks_like_rolling():
+    assert looks_like_rolling(ROLLING)
+    plain = CueList([Cue(i * 1000, i * 1000 + 900, t) for i, t in enumerate(["one two three", "four five", "six seven", "eight nine"])])
+    assert not looks_like_rolling(plain)
+    # 太短的文件不判断
+    assert not looks_like_rolling(CueList(list(ROLLING)[:3]))
+
+
+def test_dedupe_rolling_captions_merges_timings_and_counts_saved_chars():
+    out, saved = dedupe_rolling_captions(ROLLING)
+    assert out.texts == ["the quick brown", "fox jumps", "over the lazy", "dog"]
+    # 重叠的时间被裁剪为首尾相接；纯重复的最后一条并入上一条
+    assert list(out.starts) == [0, 1500, 3000, 4500]
+    assert list(out.ends) == [1500, 3000, 4500, 7500]
+    assert saved == sum(len(t) for t in ROLLING.texts) - sum(len(t) for t in out.texts)
+    assert saved == 97 - 40
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""Tests for the id|text batch translation protocol"""
+
+from youdoub.subtitles.protocol import decode_items, encode_items
+
+
+def test_encode_keeps_ids_and_line_breaks():
+    text = encode_items([(1, "Hello"), (2, "two\nlines")])
+    assert text == "1|Hello\n2|two<br>lines"
+
+
+def test_decode_round_trip():
+    reply = "```\n1|你好\n2|两<br>行\n```"
+    assert decode_items(reply, [1, 2]) == {1: "你好", 2: "两\n行"}
+
+
+def test_decode_reports_missing_and_ignores_unknown_ids():
+    reply = "1|一\n[3] | 三\n9|不该出现\n1|重复"
+    assert decode_items(reply, [1, 2, 3]) == {1: "一", 3: "三"}
+
+
+def test_decode_joins_wrapped_lines():
+    reply = "1|这是一句\n被模型折行的译文\n2|二"
+    assert decode_items(reply, [1, 2]) == {1: "这是一句 被模型折行的译文", 2: "二"}
+
+
+def test_decode_treats_empty_translation_as_missing():
+    assert decode_items("1|\n2|二", [1, 2]) == {2: "二"}
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Tests for the shared SRT cue model"""
+
+from youdoub.subtitles.srt import (
+    Cue,
+    CueList,
+    CueWriter,
+    format_srt,
+    format_timestamp,
+    iter_cues,
+    parse_srt_text,
+    parse_timestamp,
+)
+
+
+def test_timestamp_round_trip():
+    assert parse_timestamp("01:02:03,045") == 3723045
+    assert format_timestamp(3723045) == "01:02:03,045"
+    # 小数点分隔、省略小时、不足三位毫秒
+    assert parse_timestamp("02:03.5") == 123500
+
+
+def test_parse_keeps_multiline_text_and_skips_malformed_blocks():
+    cues = parse_srt_text(
+        "1\n00:00:01,000 --> 00:00:02,500\nHello\nworld\n\n"
+        "garbage block\n\n"
+        "3\n00:00:03,000 --> 00:00:04,000 X1:10 X2:20\nBye\n"
+    )
+    assert list(cues) == [Cue(1000, 2500, "Hello\nworld"), Cue(3000, 4000, "Bye")]
+
+
+def test_format_renumbers_from_one():
+    cues = CueList([Cue(0, 1000, "a"), Cue(1000, 2000, "b")])
+    text = format_srt(cues[1:])
+    assert text == "1\n00:00:01,000 --> 00:00:02,000\nb\n"
+    assert parse_srt_text(format_srt(cues)) == cues
+
+
+def test_with_texts_shares_timing():
+    cues = CueList([Cue(0, 1000, "a"), Cue(1000, 2000, "b")])
+    translated = cues.with_texts(["甲", "乙"])
+    assert list(translated.starts) == [0, 1000]
+    assert translated.texts == ["甲", "乙"]
+    assert cues.texts == ["a", "b"]
+
+
+def test_parse_tolerates_crlf_bom_and_missing_blank_lines(tmp_path):
+    path = tmp_path / "messy.srt"
+    path.write_bytes(
+        "\ufeff1\r\n00:00:01,000 --> 00:00:02,000\r\nOne\r\n"
+        "2\r\n00:00:02,000 --> 00:00:03,000\r\nTwo\r\n \r\n\r\n\r\n"
+        "\ufeff1\r\n00:00:04,000 --> 00:00:05,000\r\nThree\r\n".encode("utf-8")
+    )
+    assert [c.text for c in iter_cues(path)] == ["One", "Two", "Three"]
+
+
+def test_cue_writer_streams_and_appends(tmp_path):
+    path = tmp_path / "out.srt"
+    with CueWriter(path) as w:
+        w.write(Cue(0, 1000, "a"))
+    with CueWriter(path, append=True, first_number=2) as w:
+        w.write(Cue(1000, 2000, "b"))
+    assert w.count == 1
+    assert path.read_text(encoding="utf-8").startswith("1\n00:00:00,000 --> 00:00:01,000\na\n\n2\n")
+    assert [c.text for c in iter_cues(path)] == ["a", "b"]
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Tests for streamed whole-file translation and its resume"""
+
+import re
+
+from youdoub.subtitles import translate as translate_mod
+from youdoub.subtitles.srt import Cue, CueList, parse_srt, write_srt
+from youdoub.subtitles.translate import stream_entries
+from youdoub.utils.llm_adapters import Translator
+
+
+class StreamTranslator(Translator):
+    """Answers ``id|text`` requests with ``id|ZH:text``; ids in ``drop`` are left out once."""
+
+    model = "fake"
+
+    def __init__(self, order=None, drop=(), on_chunk=None):
+        self.order = order
+        self.drop = set(drop)
+        self.on_chunk = on_chunk
+        self.requests = []
+
+    def translate_stream(self, text, target_lang, prompt_template):
+        items = re.findall(r"^(\d+)\|(.*)$", text, flags=re.M)
+        self.requests.append([int(i) for i, _ in items])
+        if self.order:
+            items.sort(key=lambda it: self.order.index(int(it[0])))
+        for item_id, body in items:
+            if int(item_id) in self.drop:
+                self.drop.discard(int(item_id))
+                continue
+            yield f"{item_id}|ZH:{body}\n"
+            if self.on_chunk:
+                self.on_chunk(int(item_id))
+
+
+def entries(n):
+    return CueList([Cue(i * 1000, i * 1000 + 900, f"w{i}") for i in range(n)])
+
+
+def test_out_of_order_replies_are_flushed_in_order(tmp_path):
+    part = tmp_path / "out.srt.part"
+    seen = []
+    # 回复顺序 3,1,2：收到 1 之前一条也不能写出
+    tr = StreamTranslator(order=[3, 1, 2], on_chunk=lambda i: seen.append((i, len(parse_srt(part)) if part.exists() else 0)))
+    calls = stream_entries(tr, entries(3), {}, part, "zh", "p")
+    assert calls == 1
+    # 条目在下一行到达时才确定，所以写出落后一行
+    assert seen == [(3, 0), (1, 0), (2, 1)]
+    assert parse_srt(part).texts == ["ZH:w0", "ZH:w1", "ZH:w2"]
+
+
+def test_missing_ids_are_re_requested_alone(tmp_path):
+    part = tmp_path / "out.srt.part"
+    tr = StreamTranslator(drop=[2])
+    assert stream_entries(tr, entries(4), {}, part, "zh", "p") == 2
+    assert tr.requests == [[1, 2, 3, 4], [2]]
+    assert parse_srt(part).texts == ["ZH:w0", "ZH:w1", "ZH:w2", "ZH:w3"]
+
+
+def test_resume_only_reuses_matching_part(tmp_path, monkeypatch):
+    src = tmp_path / "in.srt"
+    out = tmp_path / "out.srt"
+    part = tmp_path / "out.srt.part"
+    write_srt(src, entries(4))
+    tr = StreamTranslator()
+    monkeypatch.setattr(translate_mod, "get_translator", lambda **kw: tr)
+
+    # 与当前条目一致的部分输出：只翻译剩下的
+    write_srt(part, CueList([Cue(0, 900, "旧0"), Cue(1000, 1900, "旧1")]))
+    translate_mod.translate_srt_file(src, out, "zh", whole_file=True, stream=True, dedupe_rolling=False)
+    assert tr.requests == [[3, 4]]
+    assert parse_srt(out).texts == ["旧0", "旧1", "ZH:w2", "ZH:w3"]
+
+    # 来自其他设置的 .part（时间轴不同）不能套到合并后的条目上
+    tr.requests.clear()
+    write_srt(part, CueList([Cue(0, 900, "ZH:w0")]))
+    translate_mod.translate_srt_file(
+        src, out, "zh", whole_file=True, stream=True, dedupe_rolling=False, merge_timelines=True, min_duration_ms=5000
+    )
+    assert tr.requests == [[1]]
+    assert parse_srt(out).texts == ["ZH:w0 w1 w2 w3"]
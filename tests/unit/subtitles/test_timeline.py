@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Tests for the vectorized timeline operations"""
+
+from youdoub.subtitles import timeline
+from youdoub.subtitles.srt import Cue, CueList
+
+
+def test_merge_short_runs():
+    cues = CueList([Cue(0, 300, "a"), Cue(300, 600, "b"), Cue(600, 2000, "long"), Cue(2000, 2100, "c")])
+    out = timeline.merge_short(cues, 500)
+    assert list(out) == [Cue(0, 600, "a b"), Cue(600, 2000, "long"), Cue(2000, 2100, "c")]
+    assert len(timeline.merge_short(CueList(), 500)) == 0
+
+
+def test_split_long_shares_time_by_length():
+    cues = CueList([Cue(0, 4000, "one two three, four five six"), Cue(4000, 5000, "short")])
+    out = timeline.split_long(cues, 16)
+    assert out.texts == ["one two three,", "four five six", "short"]
+    assert list(out.starts) == [0, 2074, 4000]
+    assert list(out.ends) == [2074, 4000, 5000]
+
+
+def test_shift_rescale_and_cps():
+    cues = CueList([Cue(100, 500, "gone"), Cue(900, 1500, "kept"), Cue(3000, 3200, "twenty characters!!!")])
+    shifted = timeline.shift(cues, -600)
+    assert shifted.texts == ["kept", "twenty characters!!!"]
+    assert list(shifted.starts) == [300, 2400]
+    assert list(timeline.rescale(shifted, 2.0).ends) == [1800, 5200]
+    # 20 字符、上限 10 字符/秒 → 需要 2000ms，最后一条后面没有条目
+    assert list(timeline.enforce_cps(shifted, 10, min_gap_ms=100).ends) == [900, 4400]
+
+
+def test_fix_overlaps_sorts_trims_and_closes_gaps():
+    cues = CueList([Cue(2000, 3000, "c"), Cue(0, 1500, "a"), Cue(1000, 1900, "b"), Cue(1000, 1850, "dup")])
+    out = timeline.fix_overlaps(cues, min_gap_ms=0, close_gaps_ms=200)
+    assert out.texts == ["a", "b", "dup", "c"]
+    assert list(out.starts) == [0, 1000, 1000, 2000]
+    # "b" 与 "dup" 同时开始，只能压成零时长；1850→2000 的小间隔被闭合
+    assert list(out.ends) == [1000, 1000, 2000, 3000]
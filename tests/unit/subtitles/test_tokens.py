@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Tests for token-budget batching"""
+
+from youdoub.subtitles.srt import Cue
+from youdoub.subtitles.tokens import HeuristicTokenizer, batch_entries_by_tokens, get_tokenizer, iter_batches_by_tokens
+
+# 16 个拉丁字符 = 4 tokens，加上每条 3 的开销：输入 7，预计输出 ceil(7 * 1.5) = 11
+TEXT = "abcdefghijklmnop"
+
+
+def entries(n, text=TEXT):
+    return [Cue(i * 1000, i * 1000 + 900, text) for i in range(n)]
+
+
+def sizes(batches):
+    return [len(b) for b in batches]
+
+
+def test_heuristic_counts_cjk_and_latin():
+    tok = HeuristicTokenizer()
+    assert tok.count("") == 0
+    assert tok.count("hello world!") == 3
+    assert tok.count("你好，世界") == 5
+    # 混合文本：CJK 逐字计数，其余 4 字符一个 token（向上取整）
+    assert tok.count("你好 abc") == 2 + 1
+    assert isinstance(get_tokenizer(None), HeuristicTokenizer)
+
+
+def test_input_budget():
+    assert sizes(batch_entries_by_tokens(entries(7), max_input_tokens=21, max_output_tokens=10_000)) == [3, 3, 1]
+
+
+def test_output_budget():
+    assert sizes(batch_entries_by_tokens(entries(5), max_input_tokens=10_000, max_output_tokens=22)) == [2, 2, 1]
+
+
+def test_prompt_tokens_reduce_the_input_budget():
+    batches = batch_entries_by_tokens(entries(5), max_input_tokens=21, max_output_tokens=10_000, prompt_tokens=7)
+    assert sizes(batches) == [2, 2, 1]
+
+
+def test_max_items_yields_without_waiting_for_next_entry():
+    pulled = []
+
+    def stream():
+        for e in entries(5):
+            pulled.append(e)
+            yield e
+
+    batches = iter_batches_by_tokens(stream(), max_input_tokens=10_000, max_output_tokens=10_000, max_items=2)
+    assert len(next(batches)) == 2
+    # 凑满两条即交出，第三条尚未被取走
+    assert len(pulled) == 2
+    assert sizes(batches) == [2, 1]
+
+
+def test_oversized_entry_gets_its_own_batch():
+    items = entries(1) + entries(1, "x" * 400) + entries(1)
+    assert sizes(batch_entries_by_tokens(items, max_input_tokens=21, max_output_tokens=10_000)) == [1, 1, 1]
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Tests for the per-batch repair loop and concurrent batch execution"""
+
+import re
+import threading
+import time
+
+import pytest
+
+from youdoub.subtitles.srt import Cue
+from youdoub.subtitles.translate import run_batches, translate_batch
+from youdoub.utils.llm_adapters import Translator
+
+
+class EchoTranslator(Translator):
+    """Answers ``id|text`` with ``id|ZH:text``, never answering texts in ``silent``."""
+
+    model = "fake"
+
+    def __init__(self, silent=(), flaky=(), delays=None, fail_on=None):
+        self.silent = set(silent)
+        self.flaky = set(flaky)
+        self.delays = delays or {}
+        self.fail_on = fail_on
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def translate(self, text, target_lang, prompt_template):
+        items = re.findall(r"^(\d+)\|(.*)$", text, flags=re.M)
+        with self.lock:
+            self.requests.append([body for _, body in items])
+        first = items[0][1]
+        time.sleep(self.delays.get(first, 0))
+        if first == self.fail_on:
+            raise RuntimeError("backend down")
+        lines = []
+        for item_id, body in items:
+            if body in self.silent:
+                lines.append(f"{item_id}|")
+            elif body in self.flaky:
+                # 第一次漏掉，重新请求时才返回
+                self.flaky.discard(body)
+            else:
+                lines.append(f"{item_id}|ZH:{body}")
+        return "\n".join(lines)
+
+
+def cues(*texts):
+    return [Cue(i * 1000, i * 1000 + 900, t) for i, t in enumerate(texts)]
+
+
+def test_repair_requests_only_missing_ids():
+    tr = EchoTranslator(flaky=["b"])
+    assert translate_batch(tr, cues("a", "b", "c", ""), "zh", "p") == ["ZH:a", "ZH:b", "ZH:c", ""]
+    assert tr.requests == [["a", "b", "c"], ["b"]]
+
+
+def test_never_translated_cue_keeps_source_text():
+    tr = EchoTranslator(silent=["♪"])
+    assert translate_batch(tr, cues("a", "♪"), "zh", "p", max_repairs=2) == ["ZH:a", "♪"]
+    assert tr.requests == [["a", "♪"], ["♪"], ["♪"]]
+
+
+def test_run_batches_keeps_batch_order():
+    # 第一批最慢，完成顺序与批次顺序相反
+    tr = EchoTranslator(delays={"a": 0.3, "b": 0.15, "c": 0})
+    finished = []
+    out = run_batches(
+        tr, [cues("a"), cues("b"), cues("c")], "zh", "p",
+        concurrency=3, on_batch_done=lambda i, parts: finished.append(i),
+    )
+    assert finished == [2, 1, 0]
+    assert out == [["ZH:a"], ["ZH:b"], ["ZH:c"]]
+
+
+def test_run_batches_cancels_pending_after_failure():
+    delays = {t: 0.2 for t in "bcdefgh"}
+    tr = EchoTranslator(delays=dict(delays, a=0.05), fail_on="a")
+    batches = [cues(t) for t in "abcdefgh"]
+    with pytest.raises(RuntimeError, match="backend down"):
+        run_batches(tr, batches, "zh", "p", concurrency=2)
+    # 失败时只有已开始的批次（至多再被空出的线程取走一批）会被发送，其余都被取消
+    assert len(tr.requests) <= 3
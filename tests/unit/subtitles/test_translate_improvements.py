@@ -3,6 +3,7 @@
 
 import os
 from pathlib import Path
+from src.youdoub.subtitles.srt import Cue, CueList, format_timestamp
 from src.youdoub.subtitles.translate import translate_srt_file, parse_srt, merge_short_entries
 
 def test_merge_timelines():
@@ -10,23 +11,25 @@ def test_merge_timelines():
     print("Testing timeline merging...")
 
     # Create test entries
-    entries = [
-        {"index": 1, "start": "00:00:00,000", "end": "00:00:01,000", "text": "Hello"},
-        {"index": 2, "start": "00:00:01,000", "end": "00:00:01,500", "text": "world"},
-        {"index": 3, "start": "00:00:01,500", "end": "00:00:03,000", "text": "This is a longer sentence that should not be merged"},
-        {"index": 4, "start": "00:00:03,000", "end": "00:00:03,200", "text": "Short"},
-        {"index": 5, "start": "00:00:03,200", "end": "00:00:03,400", "text": "words"},
-    ]
+    entries = CueList([
+        Cue(0, 1000, "Hello"),
+        Cue(1000, 1500, "world"),
+        Cue(1500, 3000, "This is a longer sentence that should not be merged"),
+        Cue(3000, 3200, "Short"),
+        Cue(3200, 3400, "words"),
+    ])
 
     print(f"Original entries: {len(entries)}")
-    for entry in entries:
-        print(f"  {entry['index']}: {entry['start']} -> {entry['end']}: {entry['text']}")
+    for i, entry in enumerate(entries, 1):
+        print(f"  {i}: {format_timestamp(entry.start)} -> {format_timestamp(entry.end)}: {entry.text}")
 
     # Test merging with 800ms threshold
     merged = merge_short_entries(entries, 800)
     print(f"\nMerged entries: {len(merged)}")
-    for entry in merged:
-        print(f"  {entry['index']}: {entry['start']} -> {entry['end']}: {entry['text']}")
+    for i, entry in enumerate(merged, 1):
+        print(f"  {i}: {format_timestamp(entry.start)} -> {format_timestamp(entry.end)}: {entry.text}")
+    assert merged.texts == ["Hello", "world", "This is a longer sentence that should not be merged", "Short words"]
+    assert (merged.starts[3], merged.ends[3]) == (3000, 3400)
 
 def test_parse_srt():
     """Test SRT parsing"""
@@ -38,8 +41,8 @@ def test_parse_srt():
         entries = parse_srt(test_file)
         print(f"Parsed {len(entries)} entries from {test_file}")
         print("First 3 entries:")
-        for i, entry in enumerate(entries[:3]):
-            print(f"  {entry['index']}: {entry['start']} -> {entry['end']}: {entry['text'][:50]}...")
+        for i, entry in enumerate(entries[:3], 1):
+            print(f"  {i}: {format_timestamp(entry.start)} -> {format_timestamp(entry.end)}: {entry.text[:50]}...")
     else:
         print(f"Test file {test_file} not found")
 
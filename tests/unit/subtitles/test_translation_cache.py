@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""Tests for the content-addressed translation cache"""
+
+from youdoub.subtitles.cache import TranslationCache, cache_key
+
+
+def test_cache_key_ignores_whitespace_differences():
+    a = cache_key("deepseek-chat", "zh-CN", "prompt", "Hello   world\n")
+    b = cache_key("deepseek-chat", "zh-CN", "prompt", "Hello world")
+    assert a == b
+    assert a != cache_key("deepseek-reasoner", "zh-CN", "prompt", "Hello world")
+    assert a != cache_key("deepseek-chat", "ja", "prompt", "Hello world")
+
+
+def test_cache_persists_across_instances(tmp_path):
+    path = tmp_path / "cache" / "translation.jsonl"
+    key = cache_key("m", "zh-CN", "p", "Hello")
+
+    cache = TranslationCache(path)
+    assert cache.get(key) is None
+    cache.put(key, "Hello", "你好")
+
+    reloaded = TranslationCache(path)
+    assert len(reloaded) == 1
+    assert reloaded.get(key) == "你好"
+    assert reloaded.hits == 1
+
+
+def test_cache_skips_truncated_lines(tmp_path):
+    path = tmp_path / "translation.jsonl"
+    key = cache_key("m", "zh-CN", "p", "Hello")
+    TranslationCache(path).put(key, "Hello", "你好")
+    with path.open("a", encoding="utf-8") as f:
+        f.write('{"key": "abc", "transl')
+
+    assert TranslationCache(path).get(key) == "你好"
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Tests for the WebVTT -> SRT converter"""
+
+from youdoub.subtitles.normalize import dedupe_rolling_captions
+from youdoub.subtitles.srt import Cue, CueList, iter_cues
+from youdoub.subtitles.vtt import clean_payload, parse_vtt_text, vtt_to_srt
+
+SAMPLE = """WEBVTT
+Kind: captions
+Language: en
+
+STYLE
+::cue { color: white; }
+
+NOTE this block is a comment
+
+intro
+00:01.000 --> 00:02.500 align:start position:0%
+<v Roger>Hello &amp; <i.loud>welcome</i></v>
+
+00:00:02.500 --> 00:00:04.000
+so<00:00:02.800><c> today</c><00:00:03.100><c> we</c>
+"""
+
+
+def test_parse_skips_header_style_and_notes():
+    cues = parse_vtt_text(SAMPLE)
+    assert cues == [
+        Cue(1000, 2500, "Hello & <i>welcome</i>"),
+        Cue(2500, 4000, "so today we"),
+    ]
+
+
+def test_clean_payload_drops_markup():
+    assert clean_payload("<c.colorE5E5E5>a</c>  <ruby>b<rt>x</rt></ruby>\n\n&lt;c&gt;") == "a bx\n<c>"
+
+
+def test_vtt_to_srt_round_trip(tmp_path):
+    src = tmp_path / "a.vtt"
+    src.write_text(SAMPLE.replace("\n", "\r\n"), encoding="utf-8")
+    dst = tmp_path / "a.srt"
+    assert vtt_to_srt(src, dst) == 2
+    assert [c.text for c in iter_cues(dst)] == ["Hello & <i>welcome</i>", "so today we"]
+
+
+# YouTube 自动字幕的真实结构：计时行后是一行空格，再是带逐词时间标签的新词
+AUTO_SUB = """WEBVTT
+Kind: captions
+Language: en
+
+00:00:00.160 --> 00:00:02.470 align:start position:0%
+ 
+hello<00:00:00.640><c> everyone</c><00:00:01.120><c> and</c><00:00:01.520><c> welcome</c>
+
+00:00:02.470 --> 00:00:02.480 align:start position:0%
+hello everyone and welcome
+ 
+
+00:00:02.480 --> 00:00:05.000 align:start position:0%
+hello everyone and welcome
+to<00:00:02.960><c> the</c><00:00:03.200><c> show</c>
+
+00:00:05.000 --> 00:00:05.010 align:start position:0%
+to the show
+ 
+"""
+
+
+def test_auto_sub_space_line_stays_inside_the_cue():
+    cues = parse_vtt_text(AUTO_SUB)
+    assert [(c.start, c.end, c.text) for c in cues] == [
+        (160, 2470, "hello everyone and welcome"),
+        (2470, 2480, "hello everyone and welcome"),
+        (2480, 5000, "hello everyone and welcome\nto the show"),
+        (5000, 5010, "to the show"),
+    ]
+
+    # 去重后每段文字从它第一次出现的时间开始
+    out, _ = dedupe_rolling_captions(CueList(cues))
+    assert list(zip(out.starts, out.ends, out.texts)) == [
+        (160, 2480, "hello everyone and welcome"),
+        (2480, 5010, "to the show"),
+    ]
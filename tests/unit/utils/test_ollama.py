@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Tests for the native Ollama backend: request payload, preloading and throttling"""
+
+import json
+
+import httpx
+import pytest
+
+from youdoub.utils.llm_adapters import OllamaTranslator
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    # 限流状态文件写入临时目录
+    monkeypatch.setenv("YOUDOUB_CACHE_DIR", str(tmp_path / "cache"))
+
+
+def ollama(handler, host, **kwargs):
+    # 每个测试使用独立地址，避免共享同一个限流控制器
+    tr = OllamaTranslator(api_url=host, model="qwen2.5:7b", **kwargs)
+    tr.client = httpx.Client(transport=httpx.MockTransport(handler))
+    return tr
+
+
+def reply(content):
+    return httpx.Response(200, json={"message": {"content": content}, "done": True, "prompt_eval_count": 10, "eval_count": 5})
+
+
+def test_payload_carries_keep_alive_and_num_ctx():
+    seen = []
+
+    def handler(request):
+        seen.append((request.url.path, json.loads(request.content)))
+        return reply("1|你好")
+
+    tr = ollama(handler, "http://ollama-payload:11434", keep_alive="-1", num_ctx=16384)
+    assert tr.translate("1|Hello", "中文", "{text}") == "1|你好"
+    path, body = seen[0]
+    assert path == "/api/chat"
+    assert body["keep_alive"] == -1
+    assert body["options"]["num_ctx"] == 16384
+    assert body["stream"] is False
+
+
+def test_defaults_without_num_ctx(monkeypatch):
+    monkeypatch.delenv("OLLAMA_KEEP_ALIVE", raising=False)
+    monkeypatch.delenv("OLLAMA_NUM_CTX", raising=False)
+    seen = []
+
+    def handler(request):
+        seen.append(json.loads(request.content))
+        return reply("1|你好")
+
+    tr = ollama(handler, "ollama-defaults:11434")
+    assert tr.api_url == "http://ollama-defaults:11434"
+    tr.translate("1|Hello", "中文", "{text}")
+    assert seen[0]["keep_alive"] == "30m"
+    assert "num_ctx" not in seen[0]["options"]
+
+
+def test_preload_pins_the_model_without_messages():
+    seen = []
+
+    def handler(request):
+        seen.append(json.loads(request.content))
+        return httpx.Response(200, json={"done": True, "done_reason": "load"})
+
+    tr = ollama(handler, "http://ollama-preload:11434", keep_alive="1h")
+    tr.preload()
+    assert seen == [{"model": "qwen2.5:7b", "messages": [], "keep_alive": "1h"}]
+
+
+def test_503_is_treated_as_throttling():
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        if len(calls) == 1:
+            # 队列已满时 Ollama 返回 503
+            return httpx.Response(503, headers={"retry-after": "0"}, json={"error": "server busy"})
+        return reply("1|你好")
+
+    tr = ollama(handler, "http://ollama-busy:11434", max_concurrency=4)
+    assert tr.translate("1|Hello", "中文", "{text}") == "1|你好"
+    assert len(calls) == 2
+    # 并发窗口减半后再由成功请求缓慢增长
+    assert tr.rate.limit < 4
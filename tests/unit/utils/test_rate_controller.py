@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Tests for the shared rate controller and Retry-After parsing"""
+
+import time
+from email.utils import formatdate
+from types import SimpleNamespace
+
+import pytest
+
+from youdoub.utils.llm_adapters import RateController, _retry_after
+
+
+def error_with(headers):
+    return Exception() if headers is None else SimpleNamespace(response=SimpleNamespace(headers=headers))
+
+
+def test_retry_after_forms():
+    assert _retry_after(error_with({"retry-after-ms": "1500"})) == 1.5
+    assert _retry_after(error_with({"retry-after": "7"})) == 7.0
+    date = _retry_after(error_with({"retry-after": formatdate(time.time() + 30, usegmt=True)}))
+    assert 25 <= date <= 31
+    assert _retry_after(error_with({"retry-after": "soon"})) is None
+    assert _retry_after(error_with({})) is None
+    assert _retry_after(error_with(None)) is None
+
+
+def test_burst_of_429s_halves_the_window_once():
+    rc = RateController(max_concurrency=8)
+    # 同一轮并发请求陆续返回 429
+    for _ in range(4):
+        rc.on_throttled(5.0)
+    assert rc.limit == 4
+    # 暂停结束后的新一轮限流才再次减半
+    rc.cooldown_until = time.monotonic() - 1
+    rc.on_throttled(0.0)
+    assert rc.limit == 2
+
+
+def test_success_grows_the_window_additively():
+    rc = RateController(max_concurrency=8)
+    rc.limit = 2.0
+    rc.on_success()
+    assert rc.limit == pytest.approx(2.5)
+    for _ in range(100):
+        rc.on_success()
+    assert rc.limit == 8
+
+
+def test_window_limits_in_flight_requests():
+    rc = RateController(max_concurrency=2)
+    with rc.slot(), rc.slot():
+        assert rc._wait_time(time.monotonic(), 0) is None
+    assert rc._wait_time(time.monotonic(), 0) == 0.0
+
+
+def test_request_bucket_spaces_requests():
+    rc = RateController(requests_per_sec=10)
+    t0 = time.monotonic()
+    for _ in range(12):
+        with rc.slot():
+            pass
+    # 桶内 10 次立即放行，之后约每 0.1 秒一次
+    assert 0.15 <= time.monotonic() - t0 < 1.0
+
+
+def test_token_bucket_waits_for_refill():
+    rc = RateController(tokens_per_min=600)
+    with rc.slot(est_tokens=600):
+        pass
+    # 桶已空：需要 60 tokens，按 10 tokens/秒补充约需 6 秒
+    assert rc._wait_time(time.monotonic(), 60) == pytest.approx(6.0, abs=0.1)
+    # 实际用量少于预估时把差额还回桶里
+    rc.record_usage(600, 300)
+    rc._refill(time.monotonic())
+    assert rc._wait_time(time.monotonic(), 60) == 0.0
+
+
+def test_processes_share_buckets_and_congestion(tmp_path):
+    # 两个控制器共用一个状态文件，相当于同一端点上的两个 youdoub 进程
+    state = tmp_path / "rate" / "endpoint.json"
+    a = RateController(requests_per_sec=2, max_concurrency=8, shared=state)
+    b = RateController(requests_per_sec=2, max_concurrency=8, shared=state)
+    for rc in (a, b):
+        with rc.slot():
+            pass
+    # 共享的请求桶已用完两次，第三次需要等待补充
+    with b._synced():
+        assert b._wait_time(time.monotonic(), 0) > 0.3
+
+    a.on_throttled(5.0)
+    assert a.limit == 4
+    with b._synced():
+        # 另一进程看到同一次限流：窗口减半一次，并一起暂停
+        assert b.limit == 4
+        assert b._wait_time(time.monotonic(), 0) > 4
+    # 暂停期间 b 自己收到的 429 只延长暂停
+    b.on_throttled(5.0)
+    for rc in (a, b):
+        with rc._synced():
+            pass
+    assert (a.limit, b.limit) == (4, 4)
+
+
+def test_new_controller_ignores_old_congestion(tmp_path):
+    state = tmp_path / "endpoint.json"
+    RateController(max_concurrency=8, shared=state).on_throttled(0.0)
+    rc = RateController(max_concurrency=8, shared=state)
+    with rc._synced():
+        pass
+    assert rc.limit == 8
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Tests for single-pass metadata extraction in yt dl"""
+
+import json
+import os
+import time
+
+import yt_dlp
+
+from youdoub.youtube import downloader
+from youdoub.youtube.info import InfoCache, fetch_info
+
+INFO = {"id": "abc123", "title": "t", "formats": []}
+
+
+class FakeYDL:
+    """Counts extractions; ``fail`` makes downloads raise like yt-dlp does."""
+
+    extracted = 0
+    processed = []
+    fail = False
+
+    def __init__(self, opts=None):
+        self.opts = opts
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+    def sanitize_info(self, info):
+        return json.loads(json.dumps(info))
+
+    def extract_info(self, url, download=False):
+        assert not download
+        FakeYDL.extracted += 1
+        return dict(INFO)
+
+    def process_ie_result(self, info, download=True):
+        FakeYDL.processed.append(info["id"])
+        if FakeYDL.fail:
+            raise yt_dlp.DownloadError("HTTP Error 403")
+        return dict(info, requested_subtitles=None)
+
+
+def reset(fail=False):
+    FakeYDL.extracted, FakeYDL.processed, FakeYDL.fail = 0, [], fail
+
+
+def test_cache_ttl(tmp_path):
+    cache = InfoCache(tmp_path, ttl=60)
+    assert cache.get("abc123") is None
+    cache.put(dict(INFO))
+    assert cache.get("abc123") == INFO
+    old = time.time() - 120
+    os.utime(tmp_path / "abc123.json", (old, old))
+    assert cache.get("abc123") is None
+    disabled = InfoCache(tmp_path / "off", ttl=0)
+    disabled.put(dict(INFO))
+    assert disabled.get("abc123") is None and not (tmp_path / "off").exists()
+
+
+def test_fetch_info_extracts_once(tmp_path):
+    reset()
+    cache = InfoCache(tmp_path, ttl=60)
+    assert fetch_info(FakeYDL(), "u", "abc123", cache) == INFO
+    assert fetch_info(FakeYDL(), "u", "abc123", cache) == INFO
+    assert FakeYDL.extracted == 1
+
+
+def test_download_reuses_cached_info(tmp_path, monkeypatch):
+    monkeypatch.setattr(yt_dlp, "YoutubeDL", FakeYDL)
+    cache = InfoCache(tmp_path / "cache", ttl=60)
+    cache.put(dict(INFO))
+    reset()
+    meta = tmp_path / "w" / "meta.json"
+    downloader.download_youtube_video(
+        url="u", video_out=tmp_path / "w" / "video.mp4", meta_out=meta, download_subs=False,
+        video_id="abc123", info_cache=cache,
+    )
+    assert FakeYDL.extracted == 0 and FakeYDL.processed == ["abc123"]
+    assert json.loads(meta.read_text(encoding="utf-8"))["title"] == "t"
+
+
+def test_failed_download_retries_fresh_once_then_keeps_info(tmp_path, monkeypatch):
+    monkeypatch.setattr(yt_dlp, "YoutubeDL", FakeYDL)
+    cache = InfoCache(tmp_path / "cache", ttl=60)
+    cache.put(dict(INFO))
+    reset(fail=True)
+    meta = tmp_path / "w" / "meta.json"
+    downloader.download_youtube_video(
+        url="u", video_out=tmp_path / "w" / "video.mp4", meta_out=meta, download_subs=False,
+        video_id="abc123", info_cache=cache,
+    )
+    # 缓存的直链可能过期：重新提取一次；回退元数据用已有信息，不再提取
+    assert FakeYDL.extracted == 1 and FakeYDL.processed == ["abc123", "abc123"]
+    data = json.loads(meta.read_text(encoding="utf-8"))
+    assert data["_fallback_metadata"] and data["id"] == "abc123"